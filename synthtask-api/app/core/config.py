@@ -35,9 +35,63 @@ class Settings:
     # Database Names
     MONGODB_DATABASE: str = "sintask_db"
     MONGODB_COLLECTION: str = "meetings"
+    MONGODB_SEND_JOBS_COLLECTION: str = "send_jobs"
+    MONGODB_RATE_LIMITS_COLLECTION: str = "rate_limits"
+    MONGODB_IDEMPOTENCY_COLLECTION: str = "idempotency_keys"
+    MONGODB_CACHE_EVENTS_COLLECTION: str = "metadata_cache_events"
+
+    # Meeting transcripts: zlib-compress above this size; offload to GridFS when still larger compressed
+    TRANSCRIPT_COMPRESS_THRESHOLD_BYTES: int = int(os.getenv("TRANSCRIPT_COMPRESS_THRESHOLD_BYTES", "16384"))
+    TRANSCRIPT_GRIDFS_THRESHOLD_BYTES: int = int(os.getenv("TRANSCRIPT_GRIDFS_THRESHOLD_BYTES", str(2 * 1024 * 1024)))
+
+    # How long Idempotency-Key responses are kept for replay
+    IDEMPOTENCY_RETENTION_HOURS: int = int(os.getenv("IDEMPOTENCY_RETENTION_HOURS", "24"))
+
+    # Bearer token required by GET /metrics; when unset only clients in METRICS_ALLOWED_NETWORKS
+    # (comma-separated CIDRs, loopback by default) may scrape it. Behind a reverse proxy the client
+    # address is the proxy's, so either set METRICS_TOKEN or allow the proxy/scraper network here
+    METRICS_TOKEN: Optional[str] = os.getenv("METRICS_TOKEN")
+    METRICS_ALLOWED_NETWORKS: str = os.getenv("METRICS_ALLOWED_NETWORKS", "127.0.0.1/32,::1/128")
 
     TIMEZONE: str = os.getenv("APP_TIMEZONE", "America/Sao_Paulo")
 
+    # Provider API base URLs (override to point at devtools/fake_providers.py)
+    TRELLO_API_BASE_URL: str = os.getenv("TRELLO_API_BASE_URL", "https://api.trello.com/1").rstrip("/")
+    ATLASSIAN_API_BASE_URL: str = os.getenv("ATLASSIAN_API_BASE_URL", "https://api.atlassian.com").rstrip("/")
+    ATLASSIAN_AUTH_BASE_URL: str = os.getenv("ATLASSIAN_AUTH_BASE_URL", "https://auth.atlassian.com").rstrip("/")
+
+    # Jira OAuth token endpoint body format tried first ("json", "form" or "basic"); the others are fallbacks
+    JIRA_TOKEN_EXCHANGE_STYLE: Optional[str] = (os.getenv("JIRA_TOKEN_EXCHANGE_STYLE") or "").strip().lower() or None
+
+    # Integration providers: enabled subset (e.g. "trello,jira") and extra "name=module:Class" entries
+    INTEGRATION_PROVIDERS: Optional[str] = os.getenv("INTEGRATION_PROVIDERS")
+    INTEGRATION_PROVIDER_MODULES: Optional[str] = os.getenv("INTEGRATION_PROVIDER_MODULES")
+
+    # Integration metadata cache: max entries per worker and how often each worker pulls
+    # webhook/disconnect events published by the other workers
+    METADATA_CACHE_MAX_ENTRIES: int = int(os.getenv("METADATA_CACHE_MAX_ENTRIES", "2048"))
+    METADATA_CACHE_SYNC_SECONDS: float = float(os.getenv("METADATA_CACHE_SYNC_SECONDS", "2"))
+
+    # Outbound provider calls: rate limit bucket storage ("memory" per process, or "mongo" shared
+    # by all workers), "<PROVIDER>_RATE_LIMIT=requests/seconds" overrides and connections kept per host
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory").strip().lower()
+    PROVIDER_RATE_LIMITS: dict = {
+        name[: -len("_RATE_LIMIT")].lower(): value
+        for name, value in os.environ.items()
+        if name.endswith("_RATE_LIMIT") and len(name) > len("_RATE_LIMIT")
+    }
+    INTEGRATIONS_HTTP_POOL_MAXSIZE: int = int(os.getenv("INTEGRATIONS_HTTP_POOL_MAXSIZE", "32"))
+
+    # Task search: "mongo" ($text index) or "memory" (per-user inverted index rebuilt every TTL seconds)
+    SEARCH_BACKEND: str = os.getenv("SEARCH_BACKEND", "mongo").strip().lower()
+    SEARCH_MAX_TIME_MS: int = int(os.getenv("SEARCH_MAX_TIME_MS", "2000"))
+    SEARCH_MEMORY_INDEX_TTL: float = float(os.getenv("SEARCH_MEMORY_INDEX_TTL", "30"))
+
+    # Provider webhooks: public URL of this API (used in callback URLs) and optional signing secrets
+    WEBHOOK_BASE_URL: Optional[str] = (os.getenv("WEBHOOK_BASE_URL") or "").rstrip("/") or None
+    TRELLO_WEBHOOK_SECRET: Optional[str] = os.getenv("TRELLO_WEBHOOK_SECRET")
+    JIRA_WEBHOOK_SECRET: Optional[str] = os.getenv("JIRA_WEBHOOK_SECRET")
+
 
 # Global settings instance
 settings = Settings()
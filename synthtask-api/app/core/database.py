@@ -2,7 +2,7 @@
 Configuração e conexões de banco de dados para MongoDB e PostgreSQL.
 """
 import sqlalchemy
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorGridFSBucket
 from databases import Database
 from datetime import datetime, timezone
 
@@ -12,6 +12,13 @@ from .config import settings
 mongodb_client = AsyncIOMotorClient(settings.MONGODB_URL)
 mongodb = mongodb_client[settings.MONGODB_DATABASE]
 meetings_collection = mongodb[settings.MONGODB_COLLECTION]
+send_jobs_collection = mongodb[settings.MONGODB_SEND_JOBS_COLLECTION]
+rate_limits_collection = mongodb[settings.MONGODB_RATE_LIMITS_COLLECTION]
+idempotency_collection = mongodb[settings.MONGODB_IDEMPOTENCY_COLLECTION]
+# Webhooks/desconexões repassados aos caches de metadados dos outros workers
+cache_events_collection = mongodb[settings.MONGODB_CACHE_EVENTS_COLLECTION]
+# Transcrições grandes (ver app/core/transcripts.py)
+transcripts_bucket = AsyncIOMotorGridFSBucket(mongodb, bucket_name="transcripts")
 
 # PostgreSQL Setup
 database = Database(settings.POSTGRES_URL)
@@ -50,6 +57,10 @@ projects_table = sqlalchemy.Table(
     sqlalchemy.Column("target_id", sqlalchemy.String, nullable=False),
     sqlalchemy.Column("target_name", sqlalchemy.String, nullable=True),
     sqlalchemy.Column("created_at", sqlalchemy.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)),
+    # Incrementada a cada atualização; base do ETag das leituras
+    sqlalchemy.Column("version", sqlalchemy.Integer, nullable=False, server_default="1"),
+    # Paginação por chave em GET /api/projects
+    sqlalchemy.Index("ix_projects_user_created_at_id", "user_id", sqlalchemy.text("created_at DESC"), sqlalchemy.text("id DESC")),
 )
 
 # SQLAlchemy engine for metadata operations
@@ -91,6 +102,29 @@ def drop_legacy_trello_columns():
         print(f"Aviso: não foi possível remover colunas legadas do Trello: {e}")
 
 
+def ensure_projects_indexes():
+    """Criar em bancos existentes os índices que create_all só cria com a tabela."""
+    try:
+        with engine.begin() as conn:
+            conn.execute(sqlalchemy.text(
+                "CREATE INDEX IF NOT EXISTS ix_projects_user_created_at_id "
+                "ON projects (user_id, created_at DESC, id DESC)"
+            ))
+    except Exception as e:
+        print(f"Aviso: não foi possível criar índices da tabela projects: {e}")
+
+
+def ensure_projects_version_column():
+    """Adicionar a coluna version em tabelas projects criadas antes do versionamento."""
+    try:
+        with engine.begin() as conn:
+            conn.execute(sqlalchemy.text(
+                "ALTER TABLE projects ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1"
+            ))
+    except Exception as e:
+        print(f"Aviso: não foi possível adicionar a coluna version em projects: {e}")
+
+
 async def connect_databases():
     """Conectar todos os bancos de dados"""
     try:
@@ -0,0 +1,165 @@
+"""
+Registro declarativo dos índices do MongoDB.
+
+Os índices são criados de forma idempotente na inicialização da API ou pela linha
+de comando:
+
+    python -m app.core.indexes            # cria/garante os índices
+    python -m app.core.indexes --check    # roda explain nas consultas conhecidas
+
+``QUERY_SHAPES`` lista as consultas que a aplicação faz; o ``--check`` executa
+``explain`` em cada uma e aponta as que caem em COLLSCAN ou ordenam em memória.
+"""
+import asyncio
+import logging
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo.errors import OperationFailure
+
+from .config import settings
+from .database import mongodb
+
+logger = logging.getLogger("indexes")
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    collection: str
+    keys: List[Tuple[str, Any]]
+    name: str
+    options: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class QueryShape:
+    description: str
+    collection: str
+    filter: Dict[str, Any]
+    sort: Optional[List[Tuple[str, int]]] = None
+
+
+INDEXES: List[IndexSpec] = [
+    # GET /api/meetings: reuniões do usuário, mais novas primeiro
+    IndexSpec(settings.MONGODB_COLLECTION, [("user_id", 1), ("created_at", -1), ("_id", -1)], "user_created_at_id"),
+    # GET /api/meetings/search: texto das tarefas e nome do arquivo, sempre filtrado por user_id
+    IndexSpec(
+        settings.MONGODB_COLLECTION,
+        [
+            ("user_id", 1),
+            ("tasks.title", "text"),
+            ("tasks.description", "text"),
+            ("tasks.assignee", "text"),
+            ("file_name", "text"),
+        ],
+        "meetings_text",
+        {
+            "weights": {"tasks.title": 10, "tasks.assignee": 5, "file_name": 3, "tasks.description": 2},
+            "default_language": "portuguese",
+            # Evita que um campo "language" nos documentos troque o idioma do índice
+            "language_override": "search_language",
+        },
+    ),
+    # Job ativo da reunião (SendService.start_job)
+    IndexSpec(
+        settings.MONGODB_SEND_JOBS_COLLECTION,
+        [("user_id", 1), ("meeting_id", 1), ("status", 1), ("created_at", -1)],
+        "user_meeting_status_created_at",
+    ),
+    # No máximo um job ativo por reunião (SendService.start_job trata o DuplicateKeyError)
+    IndexSpec(
+        settings.MONGODB_SEND_JOBS_COLLECTION,
+        [("user_id", 1), ("meeting_id", 1)],
+        "one_active_send_job",
+        {"unique": True, "partialFilterExpression": {"status": {"$in": ["pending", "running"]}}},
+    ),
+    # Eventos de cache só interessam aos workers por alguns minutos
+    IndexSpec(settings.MONGODB_CACHE_EVENTS_COLLECTION, [("created_at", 1)], "created_at_ttl", {"expireAfterSeconds": 3600}),
+    # Respostas de Idempotency-Key expiram sozinhas
+    IndexSpec(settings.MONGODB_IDEMPOTENCY_COLLECTION, [("expires_at", 1)], "expires_at_ttl", {"expireAfterSeconds": 0}),
+]
+
+QUERY_SHAPES: List[QueryShape] = [
+    QueryShape("listar reuniões do usuário", settings.MONGODB_COLLECTION, {"user_id": 0}, [("created_at", -1), ("_id", -1)]),
+    QueryShape("buscar reunião por id/dono", settings.MONGODB_COLLECTION, {"_id": 0, "user_id": 0}),
+    QueryShape(
+        "job ativo da reunião",
+        settings.MONGODB_SEND_JOBS_COLLECTION,
+        {"user_id": 0, "meeting_id": "", "status": {"$in": ["pending", "running"]}},
+        [("created_at", -1)],
+    ),
+]
+
+
+async def ensure_indexes() -> Tuple[List[str], Dict[str, str]]:
+    """Criar os índices declarados (sem efeito se já existirem).
+
+    Cada índice é tentado separadamente: um que falhe (ex.: índice de mesmo nome com
+    outras opções, ou dados que violam um índice único) é registrado no log e não
+    impede os demais.
+
+    Returns:
+        (nomes garantidos; índices que falharam -> mensagem de erro)
+    """
+    created: List[str] = []
+    failed: Dict[str, str] = {}
+    for spec in INDEXES:
+        qualified = f"{spec.collection}.{spec.name}"
+        try:
+            await mongodb[spec.collection].create_index(spec.keys, name=spec.name, **spec.options)
+        except OperationFailure as e:
+            logger.warning(f"Falha ao criar o índice {qualified}: {e}")
+            failed[qualified] = str(e)
+            continue
+        created.append(qualified)
+    return created, failed
+
+
+def _plan_stages(plan: Dict[str, Any]) -> List[str]:
+    stages = [plan.get("stage", "")]
+    for child_key in ("inputStage", "queryPlan"):
+        if isinstance(plan.get(child_key), dict):
+            stages += _plan_stages(plan[child_key])
+    for child in plan.get("inputStages", []) or []:
+        stages += _plan_stages(child)
+    return stages
+
+
+async def check_query_shapes() -> List[Dict[str, Any]]:
+    """Rodar explain em cada QUERY_SHAPE e marcar COLLSCAN / SORT em memória."""
+    report = []
+    for shape in QUERY_SHAPES:
+        cursor = mongodb[shape.collection].find(shape.filter)
+        if shape.sort:
+            cursor = cursor.sort(shape.sort)
+        explain = await cursor.explain()
+        winning = (explain.get("queryPlanner") or {}).get("winningPlan") or {}
+        stages = _plan_stages(winning)
+        problems = [s for s in stages if s in ("COLLSCAN", "SORT")]
+        report.append({
+            "query": shape.description,
+            "collection": shape.collection,
+            "stages": stages,
+            "indexed": not problems,
+        })
+    return report
+
+
+async def _main(argv: List[str]) -> int:
+    if "--check" in argv:
+        report = await check_query_shapes()
+        for item in report:
+            status = "ok" if item["indexed"] else "SEM ÍNDICE"
+            print(f"[{status}] {item['collection']}: {item['query']} -> {' > '.join(item['stages'])}")
+        return 0 if all(item["indexed"] for item in report) else 1
+    created, failed = await ensure_indexes()
+    for name in created:
+        print(f"índice garantido: {name}")
+    for name, error in failed.items():
+        print(f"[FALHOU] {name}: {error}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main(sys.argv[1:])))
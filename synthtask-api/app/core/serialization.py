@@ -0,0 +1,110 @@
+"""
+Serialização das respostas de leitura (reuniões e projetos).
+
+As rotas de leitura montam dicionários simples com ``meeting_payload`` /
+``project_payload`` e os devolvem em ``FastJSONResponse`` (declarada como
+``response_class`` só nessas rotas; o resto da API segue com a JSONResponse padrão).
+Como a rota retorna uma Response pronta, o FastAPI não revalida o corpo pelo
+``response_model``, que fica só para a documentação: os payloads precisam manter
+os mesmos campos dos modelos. O JSON é gerado pelo orjson. O fuso de exibição é
+resolvido uma única vez e as datas passam todas por ``format_datetime``.
+
+As leituras também enviam ``ETag`` derivado da versão dos documentos; quem manda
+``If-None-Match`` com o mesmo valor recebe 304 sem corpo.
+"""
+import hashlib
+from datetime import datetime, timezone, tzinfo
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Mapping, Optional
+from zoneinfo import ZoneInfo
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+from .config import settings
+from ..models import Task
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson está em requirements.txt
+    orjson = None
+
+# Campos de Task expostos na API (o documento pode guardar outros)
+TASK_FIELDS = tuple(Task.model_fields)
+
+
+@lru_cache(maxsize=1)
+def local_timezone() -> tzinfo:
+    return ZoneInfo(settings.TIMEZONE)
+
+
+def format_datetime(value: Any) -> str:
+    """Data em ISO 8601 no fuso da aplicação (datas sem fuso são tratadas como UTC)."""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.astimezone(local_timezone()).isoformat()
+    return str(value)
+
+
+def task_payload(task: Mapping[str, Any]) -> Dict[str, Any]:
+    return {name: task.get(name) for name in TASK_FIELDS}
+
+
+def meeting_payload(meeting: Mapping[str, Any], meeting_id: Optional[str] = None) -> Dict[str, Any]:
+    """Corpo de ProcessedMeeting a partir do documento do MongoDB, sem passar pelo Pydantic."""
+    return {
+        "id": meeting_id or str(meeting.get("_id", "")),
+        "tasks": [task_payload(task) for task in meeting.get("tasks", [])],
+        "created_at": format_datetime(meeting["created_at"]),
+        "sent": meeting.get("sent", meeting.get("sent_to_trello", False)),
+    }
+
+
+def project_payload(row: Mapping[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": row["id"],
+        "name": row["name"],
+        "provider": row["provider"],
+        "target_id": row["target_id"],
+        "target_name": row["target_name"],
+        "created_at": format_datetime(row["created_at"]),
+    }
+
+
+def resource_etag(kind: str, resource_id: Any, version: Optional[int]) -> str:
+    """ETag de um único documento: muda a cada escrita (campo ``version``)."""
+    return f'"{kind}-{resource_id}-{version or 0}"'
+
+
+def collection_etag(kind: str, parts: Iterable[Any]) -> str:
+    """ETag de uma listagem a partir de (id, versão) dos itens e do cursor da página."""
+    digest = hashlib.sha1(repr(list(parts)).encode("utf-8")).hexdigest()
+    return f'"{kind}-{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+
+
+def etag_headers(etag: str, extra: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    # no-cache: o navegador pode guardar, mas revalida com If-None-Match a cada uso
+    return {"ETag": etag, "Cache-Control": "private, no-cache", **(extra or {})}
+
+
+def not_modified(etag: str, extra: Optional[Dict[str, str]] = None) -> Response:
+    return Response(status_code=304, headers=etag_headers(etag, extra))
+
+
+if orjson is not None:
+    class FastJSONResponse(JSONResponse):
+        """JSONResponse serializada com orjson (UTF-8 direto, sem json.dumps)."""
+
+        def render(self, content: Any) -> bytes:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+else:
+    FastJSONResponse = JSONResponse
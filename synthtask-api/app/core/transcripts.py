@@ -0,0 +1,71 @@
+"""
+Armazenamento do texto original (transcrição) das reuniões.
+
+Transcrições pequenas ficam como texto em ``original_text``. Acima de
+TRANSCRIPT_COMPRESS_THRESHOLD_BYTES o texto é comprimido com zlib em um campo
+binário (``original_text_z``); se mesmo comprimido passar de
+TRANSCRIPT_GRIDFS_THRESHOLD_BYTES, vai para o GridFS (bucket ``transcripts``) e o
+documento guarda só a referência. ``load_transcript`` descomprime/baixa apenas
+quando o texto é de fato necessário.
+"""
+import logging
+import zlib
+from typing import Any, Dict
+
+from bson import Binary, ObjectId
+from gridfs.errors import NoFile
+
+from .config import settings
+from .database import transcripts_bucket
+
+logger = logging.getLogger("transcripts")
+
+# Campos de transcrição no documento da reunião (para projeções que os excluem)
+TRANSCRIPT_FIELDS = ("original_text", "original_text_z", "original_text_file_id")
+
+
+async def encode_transcript(text: str) -> Dict[str, Any]:
+    """Campos a gravar no documento da reunião para o texto informado."""
+    raw = text.encode("utf-8")
+    if len(raw) < settings.TRANSCRIPT_COMPRESS_THRESHOLD_BYTES:
+        return {"original_text": text}
+    compressed = zlib.compress(raw, 6)
+    fields: Dict[str, Any] = {"original_text_encoding": "zlib", "original_text_size": len(raw)}
+    if len(compressed) > settings.TRANSCRIPT_GRIDFS_THRESHOLD_BYTES:
+        file_id = await transcripts_bucket.upload_from_stream(
+            "transcript.txt.zz", compressed, metadata={"encoding": "zlib", "size": len(raw)}
+        )
+        fields["original_text_file_id"] = file_id
+    else:
+        fields["original_text_z"] = Binary(compressed)
+    return fields
+
+
+async def load_transcript(meeting: Dict[str, Any]) -> str:
+    """Texto original da reunião, qualquer que seja a forma em que foi gravado."""
+    if meeting.get("original_text") is not None:
+        return meeting["original_text"]
+    if meeting.get("original_text_z") is not None:
+        return zlib.decompress(bytes(meeting["original_text_z"])).decode("utf-8")
+    file_id = meeting.get("original_text_file_id")
+    if file_id is not None:
+        stream = await transcripts_bucket.open_download_stream(file_id)
+        return zlib.decompress(await stream.read()).decode("utf-8")
+    return ""
+
+
+async def delete_transcript_file(meeting: Dict[str, Any]) -> None:
+    """Remover do GridFS a transcrição de uma reunião apagada ou não gravada (se houver).
+
+    Falhas são apenas registradas: a reunião já não existe e a remoção dos demais
+    arquivos não deve ser interrompida.
+    """
+    file_id = meeting.get("original_text_file_id")
+    if not isinstance(file_id, ObjectId):
+        return
+    try:
+        await transcripts_bucket.delete(file_id)
+    except NoFile:
+        pass
+    except Exception as e:
+        logger.warning(f"Não foi possível remover a transcrição {file_id} do GridFS: {e}")
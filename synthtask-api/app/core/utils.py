@@ -2,14 +2,18 @@
 Funções utilitárias centrais para operações de banco de dados e formatação de respostas.
 Centraliza consultas ao banco e conversões de modelos.
 """
-from typing import Dict, Optional
+import base64
+import json
+from typing import Any, Dict, List, Optional, Set, Tuple
 from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 from datetime import datetime, timezone
-from zoneinfo import ZoneInfo
 
 from .database import database, users_table, meetings_collection
-from .config import settings
-from ..models import User, ProcessedMeeting, Task
+from .serialization import format_datetime
+from .transcripts import TRANSCRIPT_FIELDS, delete_transcript_file, encode_transcript, load_transcript
+from ..models import User, ProcessedMeeting, Task, SendJob
 
 
 # ============================================================================
@@ -102,27 +106,105 @@ async def get_user_meeting(meeting_id: str, user_id: int) -> Optional[Dict]:
         Exception: Se meeting_id não for um ObjectId válido
     """
     try:
-        return await meetings_collection.find_one({
-            "_id": ObjectId(meeting_id),
-            "user_id": user_id
-        })
+        # A transcrição não é usada por quem lê a reunião; ver get_user_meeting_transcript
+        return await meetings_collection.find_one(
+            {"_id": ObjectId(meeting_id), "user_id": user_id},
+            {field: 0 for field in TRANSCRIPT_FIELDS},
+        )
+    except Exception as e:
+        raise ValueError(f"ID de reunião inválido: {str(e)}")
+
+
+async def get_user_meeting_version(meeting_id: str, user_id: int) -> Optional[int]:
+    """
+    Buscar só a versão da reunião (para responder If-None-Match sem carregar o documento).
+    
+    Returns:
+        Versão da reunião (0 para documentos anteriores ao versionamento) ou None se não encontrada
+    """
+    meeting = await meetings_collection.find_one(
+        {"_id": ObjectId(meeting_id), "user_id": user_id},
+        {"version": 1},
+    )
+    if meeting is None:
+        return None
+    return meeting.get("version", 0)
+
+
+async def get_user_meeting_transcript(meeting_id: str, user_id: int) -> Optional[str]:
+    """
+    Buscar apenas o texto original da reunião, descomprimindo/baixando do GridFS se preciso.
+    
+    Returns:
+        Texto da transcrição ou None se a reunião não for encontrada
+        
+    Raises:
+        ValueError: Se meeting_id não for um ObjectId válido
+    """
+    try:
+        oid = ObjectId(meeting_id)
     except Exception as e:
         raise ValueError(f"ID de reunião inválido: {str(e)}")
+    meeting = await meetings_collection.find_one(
+        {"_id": oid, "user_id": user_id},
+        {field: 1 for field in TRANSCRIPT_FIELDS},
+    )
+    if meeting is None:
+        return None
+    return await load_transcript(meeting)
 
 
-async def get_user_meetings(user_id: int, limit: int = 100) -> list[Dict]:
+async def get_user_meeting_summaries(
+    user_id: int,
+    limit: int = 100,
+    cursor: Optional[str] = None
+) -> Tuple[list[Dict], Optional[str]]:
     """
-    Buscar todas as reuniões de um usuário, ordenadas por criação (mais novas primeiro).
+    Buscar uma página do resumo das reuniões de um usuário, mais novas primeiro.
+    O texto original e o corpo das tarefas não saem do MongoDB: a contagem de
+    tarefas é calculada no servidor com $size.
+    
+    A paginação é por chave (created_at, _id): cada página parte do último item da
+    anterior pelo índice, então páginas profundas custam o mesmo que a primeira.
     
     Args:
         user_id: ID do usuário
-        limit: Número máximo de reuniões a retornar
+        limit: Tamanho da página
+        cursor: Cursor opaco devolvido pela página anterior
         
     Returns:
-        Lista de dicionários de reuniões do MongoDB
+        (lista com _id, file_name, created_at, tasks_count e sent; cursor da próxima página ou None)
+        
+    Raises:
+        ValueError: Se o cursor for inválido
     """
-    cursor = meetings_collection.find({"user_id": user_id}).sort("created_at", -1)
-    return await cursor.to_list(length=limit)
+    match: Dict[str, Any] = {"user_id": user_id}
+    if cursor:
+        created_at, last_id = decode_cursor(cursor)
+        last_oid = ObjectId(str(last_id))
+        match["$or"] = [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": last_oid}},
+        ]
+    pipeline: list[Dict[str, Any]] = [
+        {"$match": match},
+        {"$sort": {"created_at": -1, "_id": -1}},
+        {"$limit": limit + 1},
+        {"$project": {
+            "_id": 1,
+            "file_name": 1,
+            "created_at": 1,
+            "tasks_count": {"$size": {"$ifNull": ["$tasks", []]}},
+            "sent": {"$ifNull": ["$sent", {"$ifNull": ["$sent_to_trello", False]}]},
+            "version": {"$ifNull": ["$version", 0]},
+        }},
+    ]
+    items = await meetings_collection.aggregate(pipeline).to_list(length=limit + 1)
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1]["created_at"], str(items[-1]["_id"]))
+    return items, next_cursor
 
 
 async def save_processed_meeting(
@@ -130,10 +212,11 @@ async def save_processed_meeting(
     original_text: str,
     processed_data: Dict,
     file_name: Optional[str] = None
-) -> str:
+) -> Dict:
     """
     Salvar uma reunião processada no MongoDB.
     Centraliza a estrutura do documento de reunião para evitar inconsistências.
+    Retorna o documento gravado (com _id), dispensando releitura do banco.
     
     Args:
         user_id: ID do usuário (proprietário)
@@ -142,43 +225,231 @@ async def save_processed_meeting(
         file_name: Nome do arquivo original opcional, se enviado
         
     Returns:
-        ObjectId do MongoDB como string (meeting_id)
+        Documento da reunião como gravado no MongoDB, incluindo _id
         
     Exemplo:
-        meeting_id = await save_processed_meeting(
+        meeting = await save_processed_meeting(
             user_id=1,
             original_text="Notas da reunião...",
             processed_data={"summary": "...", "key_points": [...], "tasks": [...]},
             file_name="reuniao.txt"
         )
     """
+    # O MongoDB guarda datas com precisão de milissegundos; truncar antes para que
+    # o documento retornado seja idêntico ao gravado
+    now = datetime.now(timezone.utc)
+    created_at = now.replace(microsecond=now.microsecond // 1000 * 1000)
     meeting_doc = {
         "user_id": user_id,
-        "original_text": original_text,
+        # Texto puro, comprimido ou referência ao GridFS conforme o tamanho
+        **await encode_transcript(original_text),
         "tasks": processed_data.get("tasks", []),
-        "created_at": datetime.now(timezone.utc),
+        "created_at": created_at,
         "sent": False,
+        # Incrementada a cada escrita; base do ETag das leituras
+        "version": 1,
     }
     
     if file_name:
         meeting_doc["file_name"] = file_name
     
-    result = await meetings_collection.insert_one(meeting_doc)
-    return str(result.inserted_id)
+    # insert_one preenche meeting_doc["_id"]
+    try:
+        await meetings_collection.insert_one(meeting_doc)
+    except Exception:
+        # A transcrição já pode ter ido para o GridFS; não deixar o arquivo órfão
+        await delete_transcript_file(meeting_doc)
+        raise
+    return meeting_doc
 
 
-async def update_meeting_tasks(meeting_id: str, tasks: list[Dict]) -> None:
+async def user_meeting_exists(meeting_id: str, user_id: int) -> bool:
+    """
+    Verificar se a reunião existe e pertence ao usuário (sem carregar o documento).
     """
-    Atualizar o array de tasks em um documento de reunião.
+    count = await meetings_collection.count_documents(
+        {"_id": ObjectId(meeting_id), "user_id": user_id}, limit=1
+    )
+    return count > 0
+
+
+async def update_meeting_task(meeting_id: str, user_id: int, task_id: str, fields: Dict) -> bool:
+    """
+    Atualizar campos de uma tarefa da reunião com um único update atômico.
+    Campos não informados (ex.: external_id gravado no envio) são preservados.
     
     Args:
         meeting_id: ObjectId da reunião no MongoDB como string
-        tasks: Nova lista de dicionários de tarefas
+        user_id: ID do usuário (proprietário)
+        task_id: ID da tarefa dentro de ``tasks``
+        fields: Campos a gravar na tarefa
+        
+    Returns:
+        True se a reunião do usuário com essa tarefa foi encontrada
     """
-    await meetings_collection.update_one(
-        {"_id": ObjectId(meeting_id)},
-        {"$set": {"tasks": tasks}}
+    result = await meetings_collection.update_one(
+        {"_id": ObjectId(meeting_id), "user_id": user_id, "tasks.id": task_id},
+        {"$set": {f"tasks.$[t].{field}": value for field, value in fields.items()}, "$inc": {"version": 1}},
+        array_filters=[{"t.id": task_id}],
     )
+    return result.matched_count > 0
+
+
+async def push_meeting_task(meeting_id: str, user_id: int, task: Dict) -> bool:
+    """
+    Adicionar uma tarefa ao fim de ``tasks`` ($push).
+    
+    Returns:
+        True se a reunião do usuário foi encontrada
+    """
+    result = await meetings_collection.update_one(
+        {"_id": ObjectId(meeting_id), "user_id": user_id},
+        {"$push": {"tasks": task}, "$inc": {"version": 1}},
+    )
+    return result.matched_count > 0
+
+
+async def pull_meeting_task(meeting_id: str, user_id: int, task_id: str) -> bool:
+    """
+    Remover uma tarefa de ``tasks`` ($pull).
+    
+    Returns:
+        True se a reunião do usuário com essa tarefa foi encontrada
+    """
+    result = await meetings_collection.update_one(
+        {"_id": ObjectId(meeting_id), "user_id": user_id, "tasks.id": task_id},
+        {"$pull": {"tasks": {"id": task_id}}, "$inc": {"version": 1}},
+    )
+    return result.matched_count > 0
+
+
+# Erros do insert implícito de um upsert cujo filtro não casou (ver apply_meeting_task_operations):
+# 11000 = _id duplicado (reunião existe sem a tarefa ou é de outro usuário); 2/28 = ``tasks``
+# semeado pelo filtro não é array, então $pull/$[t] não se aplicam e nada é inserido
+_UPSERT_MISS_CODES = {2, 28, 11000}
+
+
+async def apply_meeting_task_operations(meeting_id: str, user_id: int, operations: List[Dict]) -> Optional[List[Dict]]:
+    """
+    Aplicar várias criações/edições/remoções de tarefas da reunião com um único bulkWrite.
+    
+    As operações são aplicadas na ordem recebida; cada uma tem o próprio resultado
+    (ok, not_found ou invalid) e uma operação inválida não impede as demais. Se o
+    MongoDB rejeitar uma escrita por outro motivo, ela fica como ``error`` e as
+    seguintes como ``skipped`` (não aplicadas); as anteriores já foram gravadas.
+    
+    A pré-condição de cada operação está no próprio filtro (reunião do usuário e,
+    para edição/remoção, ``tasks.id``), sem leitura prévia. Edições e remoções usam
+    ``upsert``: quando o filtro não casa, o insert implícito sempre falha (``_id``
+    duplicado ou ``tasks`` que não é array), e o ``writeErrors[].index`` aponta a
+    operação ``not_found``. Nada chega a ser inserido. Como o bulk ordenado para no
+    primeiro erro, as operações restantes seguem em um novo bulkWrite; no caso comum
+    (tudo casa) é uma única ida ao banco.
+    
+    Args:
+        meeting_id: ObjectId da reunião no MongoDB como string
+        user_id: ID do usuário (proprietário)
+        operations: Itens com ``op`` (create/update/delete), ``task_id`` e ``task`` (campos)
+        
+    Returns:
+        Resultado por operação, ou None se a reunião do usuário não existe
+    """
+    owner = {"_id": ObjectId(meeting_id), "user_id": user_id}
+    requests = []
+    results: List[Dict] = []
+    queued: List[Dict] = []
+    for index, item in enumerate(operations):
+        op, task_id, fields = item["op"], item.get("task_id"), item.get("task")
+        result: Dict = {"index": index, "op": op, "task_id": task_id, "status": "ok"}
+        results.append(result)
+        if op != "create" and not task_id:
+            result.update(status="invalid", detail="task_id é obrigatório")
+            continue
+        if op != "delete" and fields is None:
+            result.update(status="invalid", detail="task é obrigatório")
+            continue
+        if op == "create":
+            task = {"id": str(ObjectId()), **fields}
+            result.update(task_id=task["id"], task=task)
+            requests.append(UpdateOne(owner, {"$push": {"tasks": task}, "$inc": {"version": 1}}))
+        elif op == "update":
+            requests.append(UpdateOne(
+                {**owner, "tasks.id": task_id},
+                {"$set": {f"tasks.$[t].{field}": value for field, value in fields.items()}, "$inc": {"version": 1}},
+                array_filters=[{"t.id": task_id}],
+                upsert=True,
+            ))
+        else:
+            requests.append(UpdateOne(
+                {**owner, "tasks.id": task_id},
+                {"$pull": {"tasks": {"id": task_id}}, "$inc": {"version": 1}},
+                upsert=True,
+            ))
+        queued.append(result)
+    if not requests:
+        return results
+
+    start = 0
+    while start < len(requests):
+        try:
+            outcome = await meetings_collection.bulk_write(requests[start:], ordered=True)
+            executed, matched, stop = len(requests) - start, outcome.matched_count, None
+        except BulkWriteError as e:
+            error = e.details["writeErrors"][0]
+            executed, matched, stop = error["index"], e.details.get("nMatched", 0), start + error["index"]
+            if error.get("code") in _UPSERT_MISS_CODES:
+                queued[stop].update(status="not_found", task=None)
+            else:
+                queued[stop].update(status="error", detail=error.get("errmsg"), task=None)
+                for result in queued[stop + 1:]:
+                    result.update(status="skipped", detail="Não aplicada: operação anterior falhou", task=None)
+        segment = queued[start:start + executed]
+        # Edições/remoções executadas sem erro casaram; o que faltar em nMatched são criações
+        # sem reunião (a reunião do usuário não existe mais)
+        creates = [r for r in segment if r["op"] == "create"]
+        if matched < len(segment):
+            for result in creates:
+                result.update(status="not_found", task=None)
+        if stop is None or queued[stop]["status"] != "not_found":
+            break
+        start = stop + 1
+
+    if not any(result["status"] == "ok" for result in queued) and not await user_meeting_exists(meeting_id, user_id):
+        return None
+    return results
+
+
+async def delete_user_meetings(meeting_ids: List[ObjectId], user_id: int) -> Set[ObjectId]:
+    """
+    Apagar várias reuniões do usuário (e suas transcrições no GridFS).
+    
+    Returns:
+        IDs das reuniões encontradas e apagadas
+    """
+    owned = await meetings_collection.find(
+        {"_id": {"$in": meeting_ids}, "user_id": user_id},
+        {"original_text_file_id": 1},
+    ).to_list(length=None)
+    if not owned:
+        return set()
+    deleted_ids = [m["_id"] for m in owned]
+    await meetings_collection.delete_many({"_id": {"$in": deleted_ids}, "user_id": user_id})
+    for meeting in owned:
+        await delete_transcript_file(meeting)
+    return set(deleted_ids)
+
+
+async def mark_user_meetings_sent(meeting_ids: List[ObjectId], user_id: int) -> Set[ObjectId]:
+    """
+    Marcar várias reuniões do usuário como enviadas.
+    
+    Returns:
+        IDs das reuniões do usuário encontradas
+    """
+    owned = await meetings_collection.distinct("_id", {"_id": {"$in": meeting_ids}, "user_id": user_id})
+    if owned:
+        await meetings_collection.update_many({"_id": {"$in": owned}, "user_id": user_id}, {"$set": {"sent": True}, "$inc": {"version": 1}})
+    return set(owned)
 
 
 async def mark_meeting_sent(meeting_id: str) -> None:
@@ -190,10 +461,65 @@ async def mark_meeting_sent(meeting_id: str) -> None:
     """
     await meetings_collection.update_one(
         {"_id": ObjectId(meeting_id)},
-        {"$set": {"sent": True}}
+        {"$set": {"sent": True}, "$inc": {"version": 1}}
+    )
+
+
+async def record_task_external_refs(meeting_id: str, user_id: int, refs: Dict[str, Dict]) -> None:
+    """
+    Gravar referências externas (issue/card) em várias tarefas com um único update.
+    
+    Args:
+        meeting_id: ObjectId da reunião no MongoDB como string
+        user_id: ID do usuário (proprietário)
+        refs: Mapa task_id -> campos a gravar (ex.: external_id, external_url)
+    """
+    if not refs:
+        return
+    updates: Dict = {}
+    array_filters = []
+    for n, (task_id, fields) in enumerate(refs.items()):
+        for field, value in fields.items():
+            updates[f"tasks.$[t{n}].{field}"] = value
+        array_filters.append({f"t{n}.id": task_id})
+    await meetings_collection.update_one(
+        {"_id": ObjectId(meeting_id), "user_id": user_id},
+        {"$set": updates, "$inc": {"version": 1}},
+        array_filters=array_filters,
     )
 
 
+# ============================================================================
+# KEYSET PAGINATION
+# ============================================================================
+
+# Tamanho de página das listagens quando só ``cursor`` é informado
+DEFAULT_PAGE_SIZE = 100
+
+
+def encode_cursor(created_at: datetime, last_id: Any) -> str:
+    """
+    Gerar cursor opaco a partir da chave de ordenação (created_at, id) do último item.
+    """
+    raw = json.dumps({"c": created_at.isoformat(), "i": last_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, Any]:
+    """
+    Ler o cursor gerado por encode_cursor.
+    
+    Raises:
+        ValueError: Se o cursor estiver malformado
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(data["c"]), data["i"]
+    except Exception as e:
+        raise ValueError(f"Cursor inválido: {str(e)}")
+
+
 # ============================================================================
 # MEETING RESPONSE FORMATTING
 # ============================================================================
@@ -215,20 +541,40 @@ def format_meeting_response(
     if not meeting_id:
         meeting_id = str(meeting_data.get("_id", ""))
     
-    dt = meeting_data["created_at"]
-    if isinstance(dt, datetime) and dt.tzinfo is None:
-        dt = dt.replace(tzinfo=timezone.utc)
-    tz = ZoneInfo(settings.TIMEZONE)
-    dt_local = dt.astimezone(tz) if isinstance(dt, datetime) else dt
-    created_iso = dt_local.isoformat() if isinstance(dt_local, datetime) else str(dt_local)
     return ProcessedMeeting(
         id=meeting_id,
         tasks=[Task(**task) for task in meeting_data.get("tasks", [])],
-        created_at=created_iso,
+        created_at=format_datetime(meeting_data["created_at"]),
         sent=meeting_data.get("sent", meeting_data.get("sent_to_trello", False)),
     )
 
 
+def format_send_job_response(job: Dict) -> SendJob:
+    """
+    Converter documento de job de envio do MongoDB para o modelo Pydantic SendJob.
+    
+    Args:
+        job: Dicionário cru do job vindo do MongoDB
+        
+    Returns:
+        Instância do modelo Pydantic SendJob
+    """
+    dates = {field: format_datetime(job.get(field)) for field in ("created_at", "updated_at")}
+    return SendJob(
+        id=str(job["_id"]),
+        meeting_id=job["meeting_id"],
+        project_id=job["project_id"],
+        provider=job["provider"],
+        status=job["status"],
+        total=job.get("total", 0),
+        sent=job.get("sent", 0),
+        skipped=job.get("skipped", 0),
+        failed=job.get("failed", 0),
+        errors=job.get("errors", []),
+        **dates,
+    )
+
+
 # ============================================================================
 # VALIDATION HELPERS
 # ============================================================================
@@ -259,10 +605,14 @@ async def delete_user_meeting(meeting_id: str, user_id: int) -> bool:
     Retorna True se apagou, False se não encontrada.
     """
     try:
-        result = await meetings_collection.delete_one({
-            "_id": ObjectId(meeting_id),
-            "user_id": user_id
-        })
-        return result.deleted_count > 0
+        oid = ObjectId(meeting_id)
     except Exception as e:
         raise ValueError(f"ID de reunião inválido: {str(e)}")
+    deleted = await meetings_collection.find_one_and_delete(
+        {"_id": oid, "user_id": user_id},
+        projection={"original_text_file_id": 1},
+    )
+    if deleted is None:
+        return False
+    await delete_transcript_file(deleted)
+    return True
@@ -1,8 +1,8 @@
 """
 Pydantic models for the Sintask API
 """
-from pydantic import BaseModel, EmailStr
-from typing import List, Optional
+from pydantic import BaseModel, EmailStr, Field
+from typing import List, Literal, Optional
 from datetime import datetime
 
 
@@ -34,6 +34,8 @@ class Task(BaseModel):
     description: str
     assignee: Optional[str] = None
     due_date: Optional[str] = None
+    external_id: Optional[str] = None
+    external_url: Optional[str] = None
 
 
 class ProcessedMeeting(BaseModel):
@@ -43,6 +45,19 @@ class ProcessedMeeting(BaseModel):
     sent: bool = False
 
 
+class TaskSearchHit(BaseModel):
+    meeting_id: str
+    file_name: Optional[str] = None
+    task: Task
+    score: float
+
+
+class TaskSearchResponse(BaseModel):
+    query: str
+    hits: List[TaskSearchHit]
+    next_offset: Optional[int] = None
+
+
 class TaskUpdate(BaseModel):
     title: str
     description: str
@@ -51,6 +66,46 @@ class TaskUpdate(BaseModel):
 
 
 
+class TaskOperation(BaseModel):
+    # create: task obrigatório; update: task_id e task; delete: task_id
+    op: Literal["create", "update", "delete"]
+    task_id: Optional[str] = None
+    task: Optional[TaskUpdate] = None
+
+
+class TaskBatchRequest(BaseModel):
+    operations: List[TaskOperation] = Field(..., min_length=1, max_length=200)
+
+
+class TaskOperationResult(BaseModel):
+    index: int
+    op: str
+    task_id: Optional[str] = None
+    # error: rejeitada pelo MongoDB; skipped: não aplicada por causa de um error anterior
+    status: Literal["ok", "not_found", "invalid", "error", "skipped"]
+    detail: Optional[str] = None
+    task: Optional[Task] = None
+
+
+class TaskBatchResponse(BaseModel):
+    results: List[TaskOperationResult]
+
+
+class MeetingBatchRequest(BaseModel):
+    action: Literal["delete", "mark_sent"]
+    meeting_ids: List[str] = Field(..., min_length=1, max_length=200)
+
+
+class MeetingOperationResult(BaseModel):
+    meeting_id: str
+    status: Literal["ok", "not_found", "invalid"]
+
+
+class MeetingBatchResponse(BaseModel):
+    action: str
+    results: List[MeetingOperationResult]
+
+
 class AuthResponse(BaseModel):
     token: str
     user: User
@@ -74,3 +129,22 @@ class Project(BaseModel):
     target_id: str
     target_name: Optional[str] = None
     created_at: str
+
+
+class SendMeetingRequest(BaseModel):
+    project_id: int
+
+
+class SendJob(BaseModel):
+    id: str
+    meeting_id: str
+    project_id: int
+    provider: str
+    status: str
+    total: int
+    sent: int
+    skipped: int
+    failed: int
+    errors: List[dict] = []
+    created_at: str
+    updated_at: str
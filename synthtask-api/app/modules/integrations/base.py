@@ -3,7 +3,9 @@ Interface base para integrações plug-and-play.
 Define capacidades e operações comuns para ferramentas de gestão de projetos.
 """
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
 
 
 class IntegrationService(ABC):
@@ -19,13 +21,27 @@ class IntegrationService(ABC):
         """Recuperar credenciais do usuário para este provedor."""
 
     # Auxiliares de descoberta opcionais (sobrescreva conforme necessário)
-    async def get_boards(self, user_id: int) -> List[Dict[str, Any]]:
+    async def get_boards(self, user_id: int, refresh: bool = False) -> List[Dict[str, Any]]:
         raise NotImplementedError
 
-    async def get_projects(self, user_id: int) -> List[Dict[str, Any]]:
+    async def get_projects(self, user_id: int, query: Optional[str] = None, refresh: bool = False) -> List[Dict[str, Any]]:
         raise NotImplementedError
 
     # Operação principal
     @abstractmethod
     async def create_task(self, user_id: int, target_id: str, task_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Criar tarefa/card no container alvo (lista/projeto)."""
\ No newline at end of file
+        """Criar tarefa/card no container alvo (lista/projeto)."""
+
+    async def create_tasks_bulk(self, user_id: int, target_id: str, tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Criar várias tarefas no mesmo alvo, retornando um resultado por tarefa.
+
+        Implementação padrão sequencial; provedores com API de lote devem sobrescrever.
+        """
+        results: List[Dict[str, Any]] = []
+        for task in tasks:
+            try:
+                result = await self.create_task(user_id, target_id, task)
+                results.append({"task_id": task.get("id"), "ok": True, "result": result})
+            except HTTPException as e:
+                results.append({"task_id": task.get("id"), "ok": False, "status": e.status_code, "error": e.detail})
+        return results
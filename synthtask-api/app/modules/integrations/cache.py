@@ -0,0 +1,311 @@
+"""
+Cache de metadados dos provedores (boards, listas, membros, projetos, roles, usuários).
+Compartilhado por TrelloService e JiraService, com chave por provedor, conta e recurso.
+
+Semântica stale-while-revalidate: dentro do TTL o valor é servido direto; depois do
+TTL e até ``max_stale`` o valor antigo é servido imediatamente e uma atualização roda
+em segundo plano; após essa janela a busca volta a ser síncrona. Carregamentos
+concorrentes da mesma chave compartilham a mesma chamada ao provedor.
+
+Contas com webhooks ativos no provedor (veja ``integrations.webhooks``) usam TTLs
+longos: as mudanças chegam por webhook e invalidam ou corrigem as entradas. Cada
+webhook chega a um único worker, então ele é publicado em ``metadata_cache_events``
+(``publish_webhook``/``publish_reset``) e os demais workers o reaplicam ao próprio
+cache, verificando novos eventos a cada METADATA_CACHE_SYNC_SECONDS. Enquanto essa
+propagação não funciona (sem coleção de eventos ou com falha ao consultá-la), os
+TTLs longos ficam desligados.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.database import cache_events_collection
+
+logger = logging.getLogger("integrations.cache")
+
+CacheKey = Tuple[str, Any, str, Tuple[Hashable, ...]]
+
+# recurso -> (ttl em segundos, janela máxima servindo valor vencido)
+DEFAULT_RESOURCE_TTLS: Dict[str, Tuple[float, float]] = {
+    "boards": (300, 3600),
+    "lists": (120, 1800),
+    "members": (300, 3600),
+    "board_context": (120, 1800),
+    "projects": (300, 3600),
+    "project_roles": (900, 6 * 3600),
+    "role_actors": (300, 3600),
+    "assignable_users": (300, 3600),
+    "user_directory": (300, 3600),
+    # Classificação de target_id (lista, board ou inexistente) feita após um create recusado
+    "list_target": (600, 0),
+}
+FALLBACK_TTL: Tuple[float, float] = (60, 600)
+
+# Eventos publicados perto do mesmo instante por workers diferentes podem chegar fora
+# de ordem; cada consulta relê essa janela e ignora os já aplicados
+EVENTS_OVERLAP = timedelta(seconds=10)
+
+# TTLs para contas cujas mudanças chegam por webhook; o TTL só cobre webhooks perdidos
+WEBHOOK_RESOURCE_TTLS: Dict[str, Tuple[float, float]] = {
+    "boards": (6 * 3600, 24 * 3600),
+    "lists": (6 * 3600, 24 * 3600),
+    "members": (6 * 3600, 24 * 3600),
+    "board_context": (6 * 3600, 24 * 3600),
+    "projects": (6 * 3600, 24 * 3600),
+    "project_roles": (12 * 3600, 24 * 3600),
+    "role_actors": (6 * 3600, 24 * 3600),
+    "assignable_users": (6 * 3600, 24 * 3600),
+    "user_directory": (6 * 3600, 24 * 3600),
+    "list_target": (6 * 3600, 0),
+}
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    fresh_until: float
+    stale_until: float
+
+
+class MetadataCache:
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        resource_ttls: Optional[Dict[str, Tuple[float, float]]] = None,
+        events: Any = None,
+        sync_interval: float = 2.0,
+    ):
+        self.max_entries = max_entries
+        self.resource_ttls = dict(resource_ttls or DEFAULT_RESOURCE_TTLS)
+        self._entries: "OrderedDict[CacheKey, CacheEntry]" = OrderedDict()
+        self._inflight: Dict[CacheKey, "asyncio.Future[Any]"] = {}
+        self._webhook_accounts: Set[Tuple[str, Any]] = set()
+        # Propagação entre workers (coleção do MongoDB; None desliga os TTLs longos)
+        self._events = events
+        self._sync_interval = sync_interval
+        self._origin = uuid.uuid4().hex
+        self._events_ok = False
+        self._synced_at = 0.0
+        self._events_since = datetime.now(timezone.utc)
+        self._seen_events: Dict[Any, datetime] = {}
+
+    def ttl_for(self, resource: str, provider: Optional[str] = None, account: Any = None) -> Tuple[float, float]:
+        if (
+            self._events_ok
+            and (provider, account) in self._webhook_accounts
+            and resource in WEBHOOK_RESOURCE_TTLS
+        ):
+            return WEBHOOK_RESOURCE_TTLS[resource]
+        return self.resource_ttls.get(resource, FALLBACK_TTL)
+
+    def mark_webhook_account(self, provider: str, account: Any) -> None:
+        """Passar a usar TTLs longos para a conta (webhooks registrados ou recebidos)."""
+        self._webhook_accounts.add((provider, account))
+
+    def unmark_webhook_account(self, provider: str, account: Any) -> None:
+        self._webhook_accounts.discard((provider, account))
+
+    async def get_or_load(
+        self,
+        provider: str,
+        account: Any,
+        resource: str,
+        args: Tuple[Hashable, ...],
+        loader: Callable[[], Awaitable[Any]],
+        refresh: bool = False,
+    ) -> Any:
+        """Obter o valor em cache ou carregá-lo com ``loader``.
+
+        ``refresh=True`` ignora o cache (ex.: ``?refresh=1``) e substitui a entrada.
+        """
+        key: CacheKey = (provider, account, resource, tuple(args))
+        await self.sync_events()
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and not refresh:
+            if now < entry.fresh_until:
+                self._entries.move_to_end(key)
+                return entry.value
+            if now < entry.stale_until:
+                self._entries.move_to_end(key)
+                if key not in self._inflight:
+                    self._start_load(key, resource, loader).add_done_callback(_log_background_failure)
+                return entry.value
+        return await self._start_load(key, resource, loader)
+
+    async def publish_webhook(self, provider: str, account: Any, payload: Dict[str, Any]) -> None:
+        """Repassar aos outros workers um webhook já aplicado neste (``handle_webhook``)."""
+        await self._publish({"kind": "webhook", "provider": provider, "account": account, "payload": payload})
+
+    async def publish_reset(self, provider: str, account: Any) -> None:
+        """Descartar o cache e a marca de webhook da conta em todos os workers (inclusive este)."""
+        self.invalidate(provider=provider, account=account)
+        self.unmark_webhook_account(provider, account)
+        await self._publish({"kind": "reset", "provider": provider, "account": account})
+
+    async def _publish(self, event: Dict[str, Any]) -> None:
+        if self._events is None:
+            return
+        try:
+            await self._events.insert_one({**event, "origin": self._origin, "created_at": datetime.now(timezone.utc)})
+        except Exception as e:
+            # Os outros workers podem ficar com dados antigos: sem TTLs longos até a próxima sincronização ok
+            self._events_ok = False
+            logger.warning(f"Falha ao publicar evento de cache ({event.get('kind')}): {e}")
+
+    async def sync_events(self, force: bool = False) -> None:
+        """Aplicar os eventos publicados pelos outros workers desde a última consulta."""
+        if self._events is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._synced_at < self._sync_interval:
+            return
+        self._synced_at = now
+        started = datetime.now(timezone.utc)
+        try:
+            cursor = self._events.find(
+                {"created_at": {"$gte": self._events_since - EVENTS_OVERLAP}, "origin": {"$ne": self._origin}}
+            ).sort("created_at", 1)
+            events = await cursor.to_list(length=None)
+        except Exception as e:
+            if self._events_ok:
+                logger.warning(f"Falha ao consultar eventos de cache; TTLs longos desligados: {e}")
+            self._events_ok = False
+            return
+        for event in events:
+            if event["_id"] in self._seen_events:
+                continue
+            self._seen_events[event["_id"]] = event["created_at"]
+            self._apply_event(event)
+        self._events_since = started
+        cutoff = (started - 2 * EVENTS_OVERLAP).replace(tzinfo=None)
+        self._seen_events = {
+            k: v for k, v in self._seen_events.items() if v.replace(tzinfo=None) >= cutoff
+        }
+        self._events_ok = True
+
+    def _apply_event(self, event: Dict[str, Any]) -> None:
+        provider, account = event.get("provider"), event.get("account")
+        if event.get("kind") == "reset":
+            self.invalidate(provider=provider, account=account)
+            self.unmark_webhook_account(provider, account)
+            return
+        from .registry import get_integration
+        try:
+            get_integration(provider).handle_webhook(account, event.get("payload") or {})
+        except Exception as e:
+            # Sem como aplicar com precisão: descartar tudo do provedor neste worker
+            logger.warning(f"Falha ao aplicar webhook de {provider} de outro worker: {e}")
+            self.invalidate(provider=provider)
+
+    def _start_load(self, key: CacheKey, resource: str, loader: Callable[[], Awaitable[Any]]) -> "asyncio.Future[Any]":
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return inflight
+
+        async def run() -> Any:
+            try:
+                value = await loader()
+                self.set(key, resource, value)
+                return value
+            finally:
+                self._inflight.pop(key, None)
+
+        task = asyncio.ensure_future(run())
+        self._inflight[key] = task
+        return task
+
+    def peek(
+        self, provider: str, account: Any, resource: str, args: Tuple[Hashable, ...], fresh_only: bool = False
+    ) -> Any:
+        """Valor em cache (mesmo vencido, salvo ``fresh_only``) sem disparar carregamento; None se ausente."""
+        entry = self._entries.get((provider, account, resource, tuple(args)))
+        if entry is None or (fresh_only and time.monotonic() >= entry.fresh_until):
+            return None
+        return entry.value
+
+    def values(self, provider: str, account: Any, resource: str) -> List[Any]:
+        """Valores em cache (mesmo vencidos) de um recurso da conta, para todos os argumentos."""
+        return [self._entries[key].value for key in self._matching(provider, account, resource, None)]
+
+    def set(self, key: CacheKey, resource: str, value: Any) -> None:
+        ttl, max_stale = self.ttl_for(resource, key[0], key[1])
+        now = time.monotonic()
+        self._entries[key] = CacheEntry(value=value, fresh_until=now + ttl, stale_until=now + ttl + max_stale)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(
+        self,
+        provider: Optional[str] = None,
+        account: Any = None,
+        resource: Optional[str] = None,
+        predicate: Optional[Callable[[CacheKey], bool]] = None,
+    ) -> int:
+        """Remover entradas que casam com os filtros informados. Retorna quantas saíram."""
+        removed = 0
+        for key in self._matching(provider, account, resource, predicate):
+            del self._entries[key]
+            removed += 1
+        return removed
+
+    def patch(
+        self,
+        update: Callable[[Any], Any],
+        provider: Optional[str] = None,
+        account: Any = None,
+        resource: Optional[str] = None,
+        predicate: Optional[Callable[[CacheKey], bool]] = None,
+    ) -> int:
+        """Corrigir em memória as entradas que casam com os filtros, mantendo o TTL.
+
+        ``update`` recebe o valor atual e devolve o novo valor, ou None quando a
+        entrada não foi afetada. Retorna quantas entradas mudaram.
+        """
+        patched = 0
+        for key in self._matching(provider, account, resource, predicate):
+            new_value = update(self._entries[key].value)
+            if new_value is not None:
+                self._entries[key].value = new_value
+                patched += 1
+        return patched
+
+    def _matching(
+        self,
+        provider: Optional[str],
+        account: Any,
+        resource: Optional[str],
+        predicate: Optional[Callable[[CacheKey], bool]],
+    ) -> List[CacheKey]:
+        keys = []
+        for key in self._entries.keys():
+            p, a, r, _ = key
+            if provider is not None and p != provider:
+                continue
+            if account is not None and a != account:
+                continue
+            if resource is not None and r != resource:
+                continue
+            if predicate is not None and not predicate(key):
+                continue
+            keys.append(key)
+        return keys
+
+
+def _log_background_failure(task: "asyncio.Future[Any]") -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Falha ao revalidar metadados em segundo plano: {task.exception()}")
+
+
+metadata_cache = MetadataCache(
+    max_entries=settings.METADATA_CACHE_MAX_ENTRIES,
+    events=cache_events_collection,
+    sync_interval=settings.METADATA_CACHE_SYNC_SECONDS,
+)
@@ -0,0 +1,113 @@
+"""
+Índice de usuários para resolver responsáveis em texto livre (ex.: "Marcela") para
+o identificador do provedor (accountId no Jira).
+
+Os termos (nome completo, cada parte do nome e o prefixo do e-mail) são normalizados
+sem acentos e mantidos em um array ordenado, permitindo busca exata e por prefixo
+com ``bisect``. Quando nada casa por prefixo, recorre a substring e, por fim, a
+similaridade aproximada (difflib).
+"""
+import difflib
+import unicodedata
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple
+
+# Pontuação por tipo de casamento (maior vence)
+SCORE_EXACT_NAME = 100
+SCORE_EXACT_TOKEN = 90
+SCORE_EXACT_EMAIL = 85
+SCORE_PREFIX_NAME = 80
+SCORE_PREFIX_TOKEN = 70
+SCORE_PREFIX_EMAIL = 65
+SCORE_SUBSTRING = 50
+SCORE_FUZZY = 40
+FUZZY_CUTOFF = 0.8
+
+KIND_NAME = "name"
+KIND_TOKEN = "token"
+KIND_EMAIL = "email"
+
+_EXACT_SCORES = {KIND_NAME: SCORE_EXACT_NAME, KIND_TOKEN: SCORE_EXACT_TOKEN, KIND_EMAIL: SCORE_EXACT_EMAIL}
+_PREFIX_SCORES = {KIND_NAME: SCORE_PREFIX_NAME, KIND_TOKEN: SCORE_PREFIX_TOKEN, KIND_EMAIL: SCORE_PREFIX_EMAIL}
+
+
+def fold(text: Any) -> str:
+    """Normalizar texto: sem acentos, minúsculo e com espaços colapsados."""
+    decomposed = unicodedata.normalize("NFKD", str(text or ""))
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().split())
+
+
+class UserDirectory:
+    def __init__(
+        self,
+        users: List[Dict[str, Any]],
+        id_field: str = "accountId",
+        name_field: str = "displayName",
+        email_field: str = "emailAddress",
+    ):
+        self.users = [u for u in users if u.get(id_field)]
+        self.id_field = id_field
+        self.name_field = name_field
+        # Termos ordenados: (termo, tipo, índice do usuário)
+        entries: List[Tuple[str, str, int]] = []
+        for idx, u in enumerate(self.users):
+            name = fold(u.get(name_field))
+            if name:
+                entries.append((name, KIND_NAME, idx))
+                tokens = name.split()
+                if len(tokens) > 1:
+                    entries.extend((t, KIND_TOKEN, idx) for t in set(tokens))
+            email = fold(u.get(email_field))
+            if "@" in email:
+                entries.append((email.split("@", 1)[0], KIND_EMAIL, idx))
+        entries.sort()
+        self._entries = entries
+        self._terms = [e[0] for e in entries]
+        self._unique_terms = sorted(set(self._terms))
+
+    def __len__(self) -> int:
+        return len(self.users)
+
+    def search(self, query: str, limit: int = 5) -> List[Tuple[int, Dict[str, Any]]]:
+        """Retornar até ``limit`` usuários como (pontuação, usuário), do melhor para o pior."""
+        q = fold(query)
+        if not q:
+            return []
+        best: Dict[int, int] = {}
+
+        def offer(idx: int, score: int) -> None:
+            if score > best.get(idx, -1):
+                best[idx] = score
+
+        # Exato e prefixo via busca binária no array ordenado
+        pos = bisect_left(self._terms, q)
+        while pos < len(self._entries) and self._entries[pos][0].startswith(q):
+            term, kind, idx = self._entries[pos]
+            offer(idx, _EXACT_SCORES[kind] if term == q else _PREFIX_SCORES[kind])
+            pos += 1
+
+        if not best:
+            for term, _, idx in self._entries:
+                if q in term:
+                    offer(idx, SCORE_SUBSTRING)
+
+        if not best:
+            close = difflib.get_close_matches(q, self._unique_terms, n=limit, cutoff=FUZZY_CUTOFF)
+            for term in close:
+                ratio = difflib.SequenceMatcher(None, q, term).ratio()
+                pos = bisect_left(self._terms, term)
+                while pos < len(self._entries) and self._entries[pos][0] == term:
+                    offer(self._entries[pos][2], int(SCORE_FUZZY * ratio))
+                    pos += 1
+
+        # Empate: nome mais curto (mais específico) e depois ordem original
+        ranked = sorted(best.items(), key=lambda item: (-item[1], len(fold(self.users[item[0]].get(self.name_field))), item[0]))
+        return [(score, self.users[idx]) for idx, score in ranked[:limit]]
+
+    def resolve(self, query: str) -> Optional[str]:
+        """Identificador do usuário mais bem ranqueado para ``query`` ou None."""
+        hits = self.search(query, limit=1)
+        if not hits:
+            return None
+        return hits[0][1].get(self.id_field)
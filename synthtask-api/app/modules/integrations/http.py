@@ -0,0 +1,96 @@
+"""
+Cliente HTTP de saída compartilhado pelas integrações.
+
+Todas as chamadas aos provedores passam por ``request``: a requisição aguarda o
+limitador do provedor/credencial, roda em thread (``requests`` é bloqueante) e, em
+caso de 429, pausa o balde pelo Retry-After antes de tentar novamente. Cada
+tentativa é registrada em ``integrations.metrics``.
+
+As conexões vêm de uma ``requests.Session`` compartilhada (keep-alive/TLS
+reaproveitados entre chamadas), sem cookie jar para não misturar sessões de contas
+diferentes.
+"""
+import asyncio
+import time
+from http.cookiejar import DefaultCookiePolicy
+from typing import Any, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.core.config import settings
+from app.modules.integrations import metrics
+from app.modules.integrations.ratelimit import get_limiter, parse_retry_after
+
+DEFAULT_TIMEOUT = 30
+MAX_RATE_LIMIT_RETRIES = 3
+DEFAULT_RETRY_AFTER = 10.0
+# Conexões mantidas por host (deve cobrir a concorrência dos envios em lote)
+POOL_MAXSIZE = settings.INTEGRATIONS_HTTP_POOL_MAXSIZE
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=POOL_MAXSIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+_session = _build_session()
+
+
+async def request(
+    provider: str,
+    method: str,
+    url: str,
+    credential: Optional[str] = None,
+    max_retries: int = MAX_RATE_LIMIT_RETRIES,
+    **kwargs: Any,
+) -> requests.Response:
+    """Executar uma chamada ao provedor respeitando o limite de taxa.
+
+    ``credential`` identifica o balde (token, conta); sem ele a chamada não é limitada.
+    """
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    limiter = get_limiter(provider, credential) if credential else None
+    attempt = 0
+    while True:
+        if limiter is not None:
+            await limiter.acquire()
+        started = time.perf_counter()
+        try:
+            resp = await asyncio.to_thread(_session.request, method, url, **kwargs)
+        except Exception:
+            metrics.record_call(provider, method, url, time.perf_counter() - started, None, retries=1 if attempt else 0)
+            raise
+        metrics.record_call(
+            provider,
+            method,
+            url,
+            time.perf_counter() - started,
+            resp.status_code,
+            retries=1 if attempt else 0,
+            bytes_sent=_body_size(resp.request.body if resp.request is not None else None),
+            bytes_received=len(resp.content or b""),
+        )
+        if resp.status_code != 429 or attempt >= max_retries:
+            return resp
+        attempt += 1
+        wait = parse_retry_after(resp.headers.get("Retry-After"), DEFAULT_RETRY_AFTER)
+        if limiter is not None:
+            await limiter.pause(wait)
+        else:
+            await asyncio.sleep(wait)
+
+
+def _body_size(body: Any) -> int:
+    if body is None:
+        return 0
+    if isinstance(body, str):
+        return len(body.encode("utf-8"))
+    try:
+        return len(body)
+    except TypeError:
+        return 0
@@ -1,17 +1,51 @@
 """
 Integração Jira implementando o adaptador IntegrationService.
 """
-from typing import Any, Dict, List, Tuple, Set
+from typing import Any, Dict, List, Optional, Tuple, Set
+import asyncio
+import logging
 import os
 import time
 import requests
 from fastapi import HTTPException
 
+from app.core.config import settings
+from app.modules.integrations import http, webhooks
 from app.modules.integrations.base import IntegrationService
+from app.modules.integrations.cache import metadata_cache
+from app.modules.integrations.directory import UserDirectory
 from app.modules.integrations.storage import IntegrationStorage
 
-ATLASSIAN_TOKEN_URL = "https://auth.atlassian.com/oauth/token"
-ATLASSIAN_RESOURCES_URL = "https://api.atlassian.com/oauth/token/accessible-resources"
+logger = logging.getLogger("integrations.jira")
+
+ATLASSIAN_TOKEN_URL = f"{settings.ATLASSIAN_AUTH_BASE_URL}/oauth/token"
+ATLASSIAN_RESOURCES_URL = f"{settings.ATLASSIAN_API_BASE_URL}/oauth/token/accessible-resources"
+
+# Paginação de /project/search (100 é o máximo aceito pelo Jira Cloud)
+PROJECTS_PAGE_SIZE = 100
+PROJECTS_MAX_CONCURRENCY = 5
+
+# Paginação de /user/assignable/search (o diretório de responsáveis precisa da lista completa)
+ASSIGNABLE_USERS_PAGE_SIZE = 100
+ASSIGNABLE_USERS_MAX_PAGES = 50
+
+# Limite de issueUpdates aceito por POST /issue/bulk
+BULK_CHUNK_SIZE = 50
+
+# Eventos que alteram metadados em cache (projetos, roles, usuários)
+WEBHOOK_EVENTS = [
+    "project_created",
+    "project_updated",
+    "project_deleted",
+    "project_soft_deleted",
+    "project_restored_deleted",
+    "project_archived",
+    "project_restored_archived",
+    "user_created",
+    "user_updated",
+    "user_deleted",
+]
+PROJECT_SCOPED_RESOURCES = ("project_roles", "role_actors", "assignable_users", "user_directory")
 
 class JiraService(IntegrationService):
     provider_name = "jira"
@@ -28,6 +62,7 @@ class JiraService(IntegrationService):
         # Normaliza base_url removendo barra final
         payload["base_url"] = str(payload["base_url"]).rstrip("/")
         await self.storage.save(user_id, payload)
+        await metadata_cache.publish_reset(self.provider_name, user_id)
 
     async def get_user_credentials(self, user_id: int) -> Dict[str, Any]:
         creds = await self.storage.get(user_id)
@@ -52,7 +87,9 @@ class JiraService(IntegrationService):
             client_secret = os.getenv("JIRA_CLIENT_SECRET")
             refresh_token = creds.get("refresh_token")
             if client_id and client_secret and refresh_token:
-                resp = requests.post(
+                resp = await http.request(
+                    self.provider_name,
+                    "POST",
                     ATLASSIAN_TOKEN_URL,
                     json={
                         "grant_type": "refresh_token",
@@ -68,7 +105,9 @@ class JiraService(IntegrationService):
                     creds["expires_in"] = tokens.get("expires_in") or creds.get("expires_in")
                     creds["obtained_at"] = now
                     try:
-                        r2 = requests.get(
+                        r2 = await http.request(
+                            self.provider_name,
+                            "GET",
                             ATLASSIAN_RESOURCES_URL,
                             headers={"Authorization": f"Bearer {creds['access_token']}", "Accept": "application/json"},
                         )
@@ -90,10 +129,31 @@ class JiraService(IntegrationService):
                     await self.storage.save(user_id, creds)
         return creds
 
-    async def get_projects(self, user_id: int) -> List[Dict[str, Any]]:
+    async def get_projects(self, user_id: int, query: Optional[str] = None, refresh: bool = False) -> List[Dict[str, Any]]:
+        """Listar todos os projetos do site Jira conectado.
+
+        A lista completa fica no cache de metadados por site (cloud_id ou base_url) e
+        conta Jira, então usuários que conectam a mesma conta compartilham a entrada e
+        webhooks do site a corrigem para todos. O filtro ``query`` (chave ou nome) é
+        aplicado sobre o cache, sem nova chamada ao Jira.
+        """
         creds = await self.get_user_credentials(user_id)
+        projects = await metadata_cache.get_or_load(
+            self.provider_name, self.site_key(creds), "projects", (self.account_key(creds),),
+            lambda: self.fetch_projects(user_id, creds), refresh=refresh,
+        )
+        if query:
+            q = query.strip().lower()
+            return [
+                p for p in projects
+                if q in str(p.get("key") or "").lower() or q in str(p.get("name") or "").lower()
+            ]
+        return list(projects)
+
+    async def fetch_projects(self, user_id: int, creds: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        if creds is None:
+            creds = await self.get_user_credentials(user_id)
         use_oauth = bool(creds.get("oauth") and creds.get("access_token") and creds.get("cloud_id"))
-        params = {"startAt": 0, "maxResults": 50}
 
         if use_oauth:
             creds = await self.refresh_oauth_tokens_if_expired(user_id, creds)
@@ -114,19 +174,78 @@ class JiraService(IntegrationService):
             auth = self.get_basic_auth(creds)
 
         try:
-            resp = requests.get(url, params=params, auth=auth, headers=headers)
-            if resp.status_code >= 400:
-                detail = self.parse_jira_error_response(resp)
-                raise HTTPException(status_code=resp.status_code, detail=detail)
-            data = resp.json()
-            projects_raw = data.get("values") if isinstance(data, dict) else data
-            projects = projects_raw or []
-            return [{"id": p.get("id"), "key": p.get("key"), "name": p.get("name")} for p in projects]
+            return await self.fetch_all_projects(url, headers, auth, self.rate_limit_key(creds))
         except HTTPException:
             raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
+    async def fetch_all_projects(
+        self, url: str, headers: Dict[str, str], auth: Optional[Tuple[str, str]], credential: str
+    ) -> List[Dict[str, Any]]:
+        """Buscar todas as páginas de /project/search.
+
+        A primeira página é sequencial para descobrir ``total``; as restantes são
+        disparadas em paralelo (limitadas por PROJECTS_MAX_CONCURRENCY). Se o Jira
+        não informar ``total``, segue página a página até ``isLast``.
+        """
+        async def fetch_page(start_at: int) -> Dict[str, Any]:
+            # /project/search não tem seleção de campos; sem expand a resposta fica no
+            # básico (sem description, lead, issueTypes...) e normalize guarda id/key/name
+            params = {"startAt": start_at, "maxResults": PROJECTS_PAGE_SIZE, "orderBy": "key", "expand": ""}
+            resp = await http.request(
+                self.provider_name, "GET", url, credential=credential, params=params, auth=auth, headers=headers
+            )
+            if resp.status_code >= 400:
+                detail = self.parse_jira_error_response(resp)
+                raise HTTPException(status_code=resp.status_code, detail=detail)
+            data = resp.json()
+            # Algumas instâncias antigas devolvem lista simples em vez de página
+            if isinstance(data, list):
+                return {"values": data, "isLast": True}
+            return data or {}
+
+        def normalize(page: Dict[str, Any]) -> List[Dict[str, Any]]:
+            return [
+                {"id": p.get("id"), "key": p.get("key"), "name": p.get("name")}
+                for p in (page.get("values") or [])
+            ]
+
+        first = await fetch_page(0)
+        projects = normalize(first)
+        if first.get("isLast", True) and "total" not in first:
+            return projects
+
+        total = first.get("total")
+        if isinstance(total, int):
+            page_size = len(first.get("values") or []) or PROJECTS_PAGE_SIZE
+            semaphore = asyncio.Semaphore(PROJECTS_MAX_CONCURRENCY)
+
+            async def fetch_limited(start_at: int) -> Dict[str, Any]:
+                async with semaphore:
+                    return await fetch_page(start_at)
+
+            pages = await asyncio.gather(*[
+                fetch_limited(start_at) for start_at in range(page_size, total, page_size)
+            ])
+            for page in pages:
+                projects.extend(normalize(page))
+        else:
+            page = first
+            while not page.get("isLast", True) and page.get("values"):
+                page = await fetch_page(len(projects))
+                projects.extend(normalize(page))
+
+        # Páginas paralelas podem se sobrepor se projetos forem criados durante a busca
+        seen: Set[str] = set()
+        unique: List[Dict[str, Any]] = []
+        for p in projects:
+            pid = str(p.get("id"))
+            if pid not in seen:
+                seen.add(pid)
+                unique.append(p)
+        return unique
+
     async def create_task(self, user_id: int, target_id: str, task_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Criar uma issue no Jira.
@@ -146,16 +265,173 @@ class JiraService(IntegrationService):
             raise HTTPException(status_code=400, detail="Título é obrigatório para criar issue")
 
         creds = await self.get_user_credentials(user_id)
-        use_oauth = creds.get("oauth") and creds.get("access_token") and creds.get("cloud_id")
+        resolved_key = await self.resolve_target_project_key(user_id, target_id, creds)
+        directory = None
+        if self.needs_assignee_lookup(task_data):
+            directory = await self.load_user_directory_safely(user_id, resolved_key)
+        fields = self.build_issue_fields(resolved_key, task_data, directory)
+
+        creds = await self.refresh_oauth_tokens_if_expired(user_id, creds)
+        url, headers, auth, browse_base = self.issue_endpoint(creds)
+        try:
+            resp = await http.request(
+                self.provider_name, "POST", url, credential=self.rate_limit_key(creds),
+                json={"fields": fields}, auth=auth, headers=headers,
+            )
+            if resp.status_code >= 400:
+                detail = self.parse_jira_error_response(resp)
+                raise HTTPException(status_code=resp.status_code, detail=detail)
+            data = resp.json()
+            return {
+                "id": data.get("id"),
+                "key": data.get("key"),
+                "url": f"{browse_base}/browse/{data.get('key')}" if data.get("key") else None,
+                "name": title,
+            }
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    async def create_tasks_bulk(self, user_id: int, target_id: str, tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Criar várias issues via POST /rest/api/3/issue/bulk.
+
+        Credenciais, chave do projeto e usuários atribuíveis são resolvidos uma
+        única vez; as issues são enviadas em lotes de até BULK_CHUNK_SIZE. Retorna
+        um item por tarefa, na ordem recebida:
+        { task_id, ok, result? , error?, status? }
+        """
+        if not target_id:
+            raise HTTPException(status_code=400, detail="target_id (project key) é obrigatório")
+        if not tasks:
+            return []
+
+        creds = await self.get_user_credentials(user_id)
+        resolved_key = await self.resolve_target_project_key(user_id, target_id, creds)
+        directory = None
+        if any(self.needs_assignee_lookup(t) for t in tasks):
+            directory = await self.load_user_directory_safely(user_id, resolved_key)
+        creds = await self.refresh_oauth_tokens_if_expired(user_id, creds)
+        url, headers, auth, browse_base = self.issue_endpoint(creds)
+        url = f"{url}/bulk"
+
+        results: List[Dict[str, Any]] = [{} for _ in tasks]
+        pending: List[Tuple[int, Dict[str, Any]]] = []
+        for i, task in enumerate(tasks):
+            if not task.get("title"):
+                results[i] = {"task_id": task.get("id"), "ok": False, "status": 400, "error": "Título é obrigatório para criar issue"}
+                continue
+            pending.append((i, {"fields": self.build_issue_fields(resolved_key, task, directory)}))
+
+        for offset in range(0, len(pending), BULK_CHUNK_SIZE):
+            chunk = pending[offset:offset + BULK_CHUNK_SIZE]
+            try:
+                resp = await http.request(
+                    self.provider_name,
+                    "POST",
+                    url,
+                    credential=self.rate_limit_key(creds),
+                    json={"issueUpdates": [update for _, update in chunk]},
+                    auth=auth,
+                    headers=headers,
+                    timeout=60,
+                )
+            except Exception as e:
+                for i, _ in chunk:
+                    results[i] = {"task_id": tasks[i].get("id"), "ok": False, "status": 500, "error": str(e)}
+                continue
+            try:
+                data = resp.json() or {}
+            except Exception:
+                data = {}
+
+            # Falha global (ex.: 401/403) sem detalhamento por elemento
+            if resp.status_code >= 400 and not (isinstance(data, dict) and data.get("errors")):
+                detail = self.parse_jira_error_response(resp)
+                for i, _ in chunk:
+                    results[i] = {"task_id": tasks[i].get("id"), "ok": False, "status": resp.status_code, "error": detail}
+                continue
+
+            failed: Dict[int, Dict[str, Any]] = {}
+            for err in data.get("errors") or []:
+                element = err.get("failedElementNumber")
+                if isinstance(element, int):
+                    failed[element] = err
+            issues = iter(data.get("issues") or [])
+            for element, (i, _) in enumerate(chunk):
+                task = tasks[i]
+                if element in failed:
+                    err = failed[element]
+                    results[i] = {
+                        "task_id": task.get("id"),
+                        "ok": False,
+                        "status": err.get("status") or 400,
+                        "error": self.format_jira_element_errors(err.get("elementErrors") or {}),
+                    }
+                    continue
+                # Issues criadas vêm na mesma ordem dos elementos sem erro
+                issue = next(issues, None)
+                if not issue:
+                    results[i] = {"task_id": task.get("id"), "ok": False, "status": 502, "error": "Jira não retornou a issue criada"}
+                    continue
+                key = issue.get("key")
+                results[i] = {
+                    "task_id": task.get("id"),
+                    "ok": True,
+                    "result": {
+                        "id": issue.get("id"),
+                        "key": key,
+                        "url": f"{browse_base}/browse/{key}" if key else None,
+                        "name": task.get("title"),
+                    },
+                }
+        return results
 
-        # Suporta tanto chave (ex.: PROJ) quanto id numérico (ex.: 10000)
+    async def resolve_target_project_key(self, user_id: int, target_id: str, creds: Dict[str, Any]) -> str:
+        """Aceitar tanto chave (ex.: PROJ) quanto id numérico (ex.: 10000)."""
         key_or_id = str(target_id)
-        resolved_key = key_or_id
         if key_or_id.isdigit():
-            resolved_key = await self.resolve_project_key(user_id, key_or_id, creds)
+            return await self.resolve_project_key(user_id, key_or_id, creds)
+        return key_or_id
+
+    def needs_assignee_lookup(self, task_data: Dict[str, Any]) -> bool:
+        """Indica se o assignee é um nome livre (precisa de busca) e não um accountId."""
+        s = str(task_data.get("assignee") or "").strip()
+        return bool(s) and not (":" in s or len(s) >= 20)
+
+    async def get_user_directory(self, user_id: int, project_key: str, refresh: bool = False) -> UserDirectory:
+        """Índice de usuários atribuíveis do projeto, construído uma vez e mantido em cache."""
+        async def build() -> UserDirectory:
+            users = await self.get_assignable_users(user_id, project_key, refresh=refresh)
+            return UserDirectory(users)
+
+        return await metadata_cache.get_or_load(
+            self.provider_name, user_id, "user_directory", (str(project_key),),
+            build, refresh=refresh,
+        )
+
+    async def load_user_directory_safely(self, user_id: int, project_key: str) -> Optional[UserDirectory]:
+        try:
+            return await self.get_user_directory(user_id, project_key)
+        except Exception:
+            return None
+
+    def resolve_assignee_account_id(self, assignee: Any, directory: Optional[UserDirectory]) -> Optional[str]:
+        s = str(assignee or "").strip()
+        if not s:
+            return None
+        if ":" in s or len(s) >= 20:
+            return s
+        if directory is None:
+            return None
+        return directory.resolve(s)
+
+    def build_issue_fields(self, project_key: str, task_data: Dict[str, Any], directory: Optional[UserDirectory] = None) -> Dict[str, Any]:
+        """Montar ``fields`` da issue a partir dos dados da tarefa."""
         fields: Dict[str, Any] = {
-            "project": {"key": resolved_key},
-            "summary": title,
+            "project": {"key": project_key},
+            "summary": task_data.get("title"),
             "issuetype": {"name": "Task"},
         }
 
@@ -176,62 +452,33 @@ class JiraService(IntegrationService):
         if priority:
             fields["priority"] = {"name": priority}
 
-        assignee = task_data.get("assignee")
-        if assignee:
-            account_id = None
-            s = str(assignee).strip()
-            if s:
-                if ":" in s or len(s) >= 20:
-                    account_id = s
-                else:
-                    try:
-                        users = await self.get_assignable_users(user_id, resolved_key)
-                        ns = s.lower()
-                        for u in users:
-                            dn = str(u.get("displayName") or "").lower()
-                            if ns == dn or dn.startswith(ns) or ns in dn:
-                                account_id = u.get("accountId")
-                                break
-                    except Exception:
-                        account_id = None
-            if account_id:
-                fields["assignee"] = {"accountId": account_id}
+        account_id = self.resolve_assignee_account_id(task_data.get("assignee"), directory)
+        if account_id:
+            fields["assignee"] = {"accountId": account_id}
 
         due_date = task_data.get("due_date")
         if due_date:
             fields["duedate"] = due_date
+        return fields
 
-        payload = {"fields": fields}
-        if use_oauth:
-            # Garantir token válido antes de chamar a API
-            creds = await self.refresh_oauth_tokens_if_expired(user_id, creds)
-            base = f"https://api.atlassian.com/ex/jira/{creds['cloud_id']}/rest/api/3"
-            url = f"{base}/issue"
+    def issue_endpoint(self, creds: Dict[str, Any]) -> Tuple[str, Dict[str, str], Optional[Tuple[str, str]], str]:
+        """Retorna (url de /issue, headers, auth, base para links de browse)."""
+        if creds.get("oauth") and creds.get("access_token") and creds.get("cloud_id"):
+            base = f"{settings.ATLASSIAN_API_BASE_URL}/ex/jira/{creds['cloud_id']}/rest/api/3"
             headers = {"Accept": "application/json", "Content-Type": "application/json", "Authorization": f"Bearer {creds['access_token']}"}
-            auth = None
-            browse_base = f"https://api.atlassian.com/ex/jira/{creds['cloud_id']}"
-        else:
-            base_url = creds["base_url"]
-            url = f"{base_url}/rest/api/3/issue"
-            headers = {"Accept": "application/json", "Content-Type": "application/json"}
-            auth = self.get_basic_auth(creds)
-            browse_base = base_url
-        try:
-            resp = requests.post(url, json=payload, auth=auth, headers=headers)
-            if resp.status_code >= 400:
-                detail = self.parse_jira_error_response(resp)
-                raise HTTPException(status_code=resp.status_code, detail=detail)
-            data = resp.json()
-            return {
-                "id": data.get("id"),
-                "key": data.get("key"),
-                "url": f"{browse_base}/browse/{data.get('key')}" if data.get("key") else None,
-                "name": title,
-            }
-        except HTTPException:
-            raise
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
+            return f"{base}/issue", headers, None, f"{settings.ATLASSIAN_API_BASE_URL}/ex/jira/{creds['cloud_id']}"
+        base_url = creds["base_url"]
+        headers = {"Accept": "application/json", "Content-Type": "application/json"}
+        return f"{base_url}/rest/api/3/issue", headers, self.get_basic_auth(creds), base_url
+
+    def format_jira_element_errors(self, element_errors: Dict[str, Any]) -> str:
+        msgs = element_errors.get("errorMessages")
+        if isinstance(msgs, list) and msgs:
+            return "; ".join(msgs)
+        errs = element_errors.get("errors")
+        if isinstance(errs, dict) and errs:
+            return "; ".join([f"{k}: {v}" for k, v in errs.items()])
+        return str(element_errors) if element_errors else "Erro ao criar issue"
 
     async def search_users(self, user_id: int, query: str) -> List[Dict[str, Any]]:
         """Buscar usuários do Jira pelo parâmetro 'query' (email, nome ou username).
@@ -253,7 +500,7 @@ class JiraService(IntegrationService):
             headers = {"Accept": "application/json"}
             auth = self.get_basic_auth(creds)
         try:
-            resp = requests.get(url, params=params, auth=auth, headers=headers)
+            resp = await http.request(self.provider_name, "GET", url, credential=self.rate_limit_key(creds), params=params, auth=auth, headers=headers)
             if resp.status_code >= 400:
                 detail = self.parse_jira_error_response(resp)
                 raise HTTPException(status_code=resp.status_code, detail=detail)
@@ -271,7 +518,14 @@ class JiraService(IntegrationService):
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
-    async def get_assignable_users(self, user_id: int, project_key: str) -> List[Dict[str, Any]]:
+    async def get_assignable_users(self, user_id: int, project_key: str, refresh: bool = False) -> List[Dict[str, Any]]:
+        """Usuários atribuíveis de um projeto (cache de metadados)."""
+        return await metadata_cache.get_or_load(
+            self.provider_name, user_id, "assignable_users", (str(project_key),),
+            lambda: self.fetch_assignable_users(user_id, project_key), refresh=refresh,
+        )
+
+    async def fetch_assignable_users(self, user_id: int, project_key: str) -> List[Dict[str, Any]]:
         creds = await self.get_user_credentials(user_id)
         use_oauth = bool(creds.get("oauth") and creds.get("access_token") and creds.get("cloud_id"))
         # Resolve project key when an ID (numeric) is provided
@@ -279,7 +533,6 @@ class JiraService(IntegrationService):
         resolved_key = key_or_id
         if key_or_id.isdigit():
             resolved_key = await self.resolve_project_key(user_id, key_or_id, creds)
-        params = {"project": resolved_key, "maxResults": 50}
 
         if use_oauth:
             creds = await self.refresh_oauth_tokens_if_expired(user_id, creds)
@@ -294,8 +547,33 @@ class JiraService(IntegrationService):
             auth = self.get_basic_auth(creds)
 
         try:
-            resp = requests.get(url, params=params, auth=auth, headers=headers)
-            if resp.status_code >= 400:
+            users: List[Dict[str, Any]] = []
+            for page in range(ASSIGNABLE_USERS_MAX_PAGES):
+                params = {"project": resolved_key, "startAt": page * ASSIGNABLE_USERS_PAGE_SIZE, "maxResults": ASSIGNABLE_USERS_PAGE_SIZE}
+                try:
+                    resp = await http.request(self.provider_name, "GET", url, credential=self.rate_limit_key(creds), params=params, auth=auth, headers=headers)
+                    failure = f"HTTP {resp.status_code}" if resp.status_code >= 400 else None
+                except Exception as e:
+                    if not users:
+                        raise
+                    failure = str(e)
+                if failure:
+                    if users:
+                        # Falha numa página seguinte: usar o que já veio em vez de perder o diretório
+                        logger.warning(
+                            f"Jira: usuários atribuíveis de {resolved_key} truncados em {len(users)} "
+                            f"({failure} em startAt={params['startAt']})"
+                        )
+                    break
+                batch = resp.json() or []
+                users.extend(batch)
+                # O Jira pode devolver menos que maxResults por filtro de permissão mesmo
+                # havendo mais usuários; só a página vazia indica o fim
+                if not batch:
+                    break
+            else:
+                logger.warning(f"Jira: usuários atribuíveis de {resolved_key} truncados em {len(users)}")
+            if not users and resp.status_code >= 400:
                 # Fallback: if unauthorized due to scope, aggregate users from project roles
                 if resp.status_code in (401, 403):
                     roles = await self.get_project_roles(user_id, resolved_key)
@@ -314,9 +592,12 @@ class JiraService(IntegrationService):
                     return result
                 detail = self.parse_jira_error_response(resp)
                 raise HTTPException(status_code=resp.status_code, detail=detail)
-            users = resp.json() or []
             normalized = []
+            seen_ids: Set[str] = set()
             for u in users:
+                if u.get("accountId") in seen_ids:
+                    continue
+                seen_ids.add(u.get("accountId"))
                 normalized.append({
                     "accountId": u.get("accountId"),
                     "displayName": u.get("displayName"),
@@ -328,6 +609,114 @@ class JiraService(IntegrationService):
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
+    async def register_webhooks(self, user_id: int) -> Dict[str, Any]:
+        """
+        Registrar o webhook de projetos e usuários do site (API de webhooks do administrador).
+
+        Webhooks dinâmicos de apps OAuth só aceitam eventos de issue/comentário, então
+        o registro exige credenciais básicas de um administrador do Jira.
+        """
+        creds = await self.get_user_credentials(user_id)
+        if not (creds.get("base_url") and creds.get("email") and creds.get("api_token")):
+            raise HTTPException(
+                status_code=400,
+                detail="Webhooks de projeto exigem credenciais básicas de administrador do Jira (não disponíveis via OAuth)",
+            )
+        body: Dict[str, Any] = {
+            "name": "SynthTask",
+            "url": webhooks.callback_url(self.provider_name, user_id),
+            "events": WEBHOOK_EVENTS,
+            "excludeBody": False,
+        }
+        if settings.JIRA_WEBHOOK_SECRET:
+            body["secret"] = settings.JIRA_WEBHOOK_SECRET
+        url = f"{creds['base_url'].rstrip('/')}/rest/webhooks/1.0/webhook"
+        resp = await http.request(
+            self.provider_name, "POST", url, credential=self.rate_limit_key(creds),
+            json=body, auth=self.get_basic_auth(creds), headers={"Accept": "application/json"},
+        )
+        if resp.status_code >= 400:
+            raise HTTPException(status_code=resp.status_code, detail=self.parse_jira_error_response(resp))
+        metadata_cache.mark_webhook_account(self.provider_name, user_id)
+        metadata_cache.mark_webhook_account(self.provider_name, self.site_key(creds))
+        data = resp.json() or {}
+        return {"ok": True, "webhook": data.get("self") or data.get("id"), "events": WEBHOOK_EVENTS}
+
+    def handle_webhook(self, user_id: int, payload: Dict[str, Any]) -> Dict[str, int]:
+        """
+        Aplicar uma notificação do Jira ao cache de metadados da conta.
+
+        Projeto atualizado é corrigido em memória na lista de projetos; projeto
+        removido/arquivado sai da lista; criação/restauração invalida a lista. Os
+        recursos por projeto (roles, usuários atribuíveis) e os de usuários são
+        invalidados.
+        """
+        metadata_cache.mark_webhook_account(self.provider_name, user_id)
+        event = str(payload.get("webhookEvent") or "")
+        project = payload.get("project") or {}
+        pid = str(project.get("id") or "")
+        counts = {"patched": 0, "invalidated": 0}
+
+        if event.startswith("user_"):
+            for resource in ("assignable_users", "user_directory", "role_actors"):
+                counts["invalidated"] += metadata_cache.invalidate(provider=self.provider_name, account=user_id, resource=resource)
+            return counts
+        if not event.startswith("project_"):
+            return counts
+
+        # A lista de projetos é cacheada por site; o site vem da URL ``self`` do projeto.
+        # Sem ela, ids de projeto (iguais entre sites) não bastam: invalida as listas do provedor
+        site = str(project.get("self") or "").split("/rest/", 1)[0].rstrip("/")
+        if site:
+            metadata_cache.mark_webhook_account(self.provider_name, site)
+
+        # Chaves antigas do projeto (a chave pode ter mudado) para limpar recursos por projeto
+        refs = {pid, str(project.get("key") or "")} - {""}
+        for projects in (metadata_cache.values(self.provider_name, site, "projects") if site else []):
+            for p in projects or []:
+                if str(p.get("id")) == pid and p.get("key"):
+                    refs.add(str(p["key"]))
+
+        if not site:
+            counts["invalidated"] += metadata_cache.invalidate(provider=self.provider_name, resource="projects")
+        elif event == "project_updated" and pid:
+            def update(projects: Any) -> Optional[List[Dict[str, Any]]]:
+                if not any(str(p.get("id")) == pid for p in projects or []):
+                    return None
+                return [
+                    {**p, "key": project.get("key") or p.get("key"), "name": project.get("name") or p.get("name")}
+                    if str(p.get("id")) == pid else p
+                    for p in projects
+                ]
+            counts["patched"] += metadata_cache.patch(update, provider=self.provider_name, account=site, resource="projects")
+        elif event in ("project_deleted", "project_soft_deleted", "project_archived") and pid:
+            def remove(projects: Any) -> Optional[List[Dict[str, Any]]]:
+                if not any(str(p.get("id")) == pid for p in projects or []):
+                    return None
+                return [p for p in projects if str(p.get("id")) != pid]
+            counts["patched"] += metadata_cache.patch(remove, provider=self.provider_name, account=site, resource="projects")
+        else:
+            counts["invalidated"] += metadata_cache.invalidate(provider=self.provider_name, account=site, resource="projects")
+
+        for resource in PROJECT_SCOPED_RESOURCES:
+            counts["invalidated"] += metadata_cache.invalidate(
+                provider=self.provider_name, account=user_id, resource=resource,
+                predicate=lambda key: bool(key[3]) and str(key[3][0]) in refs,
+            )
+        return counts
+
+    def site_key(self, creds: Dict[str, Any]) -> str:
+        """Identificar o site Jira (cloud_id no OAuth, base_url nas credenciais básicas)."""
+        return str(creds.get("cloud_id") or creds.get("base_url") or "").rstrip("/")
+
+    def account_key(self, creds: Dict[str, Any]) -> str:
+        """Identificar a conta Jira no site (estável entre refresh de token)."""
+        return str(creds.get("user_account_id") or creds.get("email") or creds.get("access_token") or "")
+
+    def rate_limit_key(self, creds: Dict[str, Any]) -> str:
+        """Identificar o balde de taxa pela conta no site."""
+        return f"{self.site_key(creds)}|{self.account_key(creds)}"
+
     def get_basic_auth(self, creds: Dict[str, Any]) -> Tuple[str, str]:
         return (creds["email"], creds["api_token"])
 
@@ -349,7 +738,7 @@ class JiraService(IntegrationService):
 
     def jira_api_base_url(self, creds: Dict[str, Any], use_oauth: bool) -> str:
         if use_oauth:
-            return f"https://api.atlassian.com/ex/jira/{creds['cloud_id']}/rest/api/3"
+            return f"{settings.ATLASSIAN_API_BASE_URL}/ex/jira/{creds['cloud_id']}/rest/api/3"
         return f"{creds['base_url'].rstrip('/')}/rest/api/3"
 
     def has_required_user_read_scope(self, scopes: Set[str]) -> bool:
@@ -373,7 +762,7 @@ class JiraService(IntegrationService):
             headers = {"Accept": "application/json"}
             auth = self.get_basic_auth(creds)
         try:
-            resp = requests.get(url, auth=auth, headers=headers)
+            resp = await http.request(self.provider_name, "GET", url, credential=self.rate_limit_key(creds), auth=auth, headers=headers)
             if resp.status_code >= 400:
                 detail = self.parse_jira_error_response(resp)
                 raise HTTPException(status_code=resp.status_code, detail=detail)
@@ -387,7 +776,14 @@ class JiraService(IntegrationService):
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
-    async def get_project_roles(self, user_id: int, project_key_or_id: str) -> List[Dict[str, Any]]:
+    async def get_project_roles(self, user_id: int, project_key_or_id: str, refresh: bool = False) -> List[Dict[str, Any]]:
+        """Roles de um projeto (cache de metadados)."""
+        return await metadata_cache.get_or_load(
+            self.provider_name, user_id, "project_roles", (str(project_key_or_id),),
+            lambda: self.fetch_project_roles(user_id, project_key_or_id), refresh=refresh,
+        )
+
+    async def fetch_project_roles(self, user_id: int, project_key_or_id: str) -> List[Dict[str, Any]]:
         """List project roles (name and id) for a project using v2 endpoint."""
         creds = await self.get_user_credentials(user_id)
         use_oauth = bool(creds.get("oauth") and creds.get("access_token") and creds.get("cloud_id"))
@@ -402,7 +798,7 @@ class JiraService(IntegrationService):
             resolved_key = await self.resolve_project_key(user_id, key_or_id, creds)
         if use_oauth:
             creds = await self.refresh_oauth_tokens_if_expired(user_id, creds)
-            base = f"https://api.atlassian.com/ex/jira/{creds['cloud_id']}/rest/api/2"
+            base = f"{settings.ATLASSIAN_API_BASE_URL}/ex/jira/{creds['cloud_id']}/rest/api/2"
             url = f"{base}/project/{resolved_key}/role"
             headers = {"Accept": "application/json", "Authorization": f"Bearer {creds['access_token']}"}
             auth = None
@@ -412,7 +808,7 @@ class JiraService(IntegrationService):
             headers = {"Accept": "application/json"}
             auth = self.get_basic_auth(creds)
         try:
-            resp = requests.get(url, auth=auth, headers=headers)
+            resp = await http.request(self.provider_name, "GET", url, credential=self.rate_limit_key(creds), auth=auth, headers=headers)
             if resp.status_code >= 400:
                 detail = self.parse_jira_error_response(resp)
                 raise HTTPException(status_code=resp.status_code, detail=detail)
@@ -433,7 +829,14 @@ class JiraService(IntegrationService):
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
-    async def get_project_role_actors(self, user_id: int, project_key_or_id: str, role_id: str) -> List[Dict[str, Any]]:
+    async def get_project_role_actors(self, user_id: int, project_key_or_id: str, role_id: str, refresh: bool = False) -> List[Dict[str, Any]]:
+        """Usuários de um role do projeto (cache de metadados)."""
+        return await metadata_cache.get_or_load(
+            self.provider_name, user_id, "role_actors", (str(project_key_or_id), str(role_id)),
+            lambda: self.fetch_project_role_actors(user_id, project_key_or_id, role_id), refresh=refresh,
+        )
+
+    async def fetch_project_role_actors(self, user_id: int, project_key_or_id: str, role_id: str) -> List[Dict[str, Any]]:
         """Get user actors for a given project role using v2 endpoint."""
         creds = await self.get_user_credentials(user_id)
         use_oauth = bool(creds.get("oauth") and creds.get("access_token") and creds.get("cloud_id"))
@@ -447,7 +850,7 @@ class JiraService(IntegrationService):
             resolved_key = await self.resolve_project_key(user_id, key_or_id, creds)
         if use_oauth:
             creds = await self.refresh_oauth_tokens_if_expired(user_id, creds)
-            base = f"https://api.atlassian.com/ex/jira/{creds['cloud_id']}/rest/api/2"
+            base = f"{settings.ATLASSIAN_API_BASE_URL}/ex/jira/{creds['cloud_id']}/rest/api/2"
             url = f"{base}/project/{resolved_key}/role/{role_id}"
             headers = {"Accept": "application/json", "Authorization": f"Bearer {creds['access_token']}"}
             auth = None
@@ -457,7 +860,7 @@ class JiraService(IntegrationService):
             headers = {"Accept": "application/json"}
             auth = self.get_basic_auth(creds)
         try:
-            resp = requests.get(url, auth=auth, headers=headers)
+            resp = await http.request(self.provider_name, "GET", url, credential=self.rate_limit_key(creds), auth=auth, headers=headers)
             if resp.status_code >= 400:
                 detail = self.parse_jira_error_response(resp)
                 raise HTTPException(status_code=resp.status_code, detail=detail)
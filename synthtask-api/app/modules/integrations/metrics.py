@@ -0,0 +1,168 @@
+"""
+Métricas das chamadas de saída aos provedores (Trello, Jira, Atlassian OAuth).
+
+Cada chamada feita por ``integrations.http.request`` é registrada por provedor,
+método e template do caminho (sem o host, que identifica o site Jira do cliente,
+e com ids substituídos por placeholders): histograma de
+latência, contagem por status, retentativas por 429 e bytes enviados/recebidos.
+As chamadas também são anexadas ao trace da requisição atual (contextvar), que o
+middleware da aplicação expõe no header ``Server-Timing``.
+"""
+import re
+import threading
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Limites superiores (segundos) dos buckets do histograma de latência
+LATENCY_BUCKETS: Tuple[float, ...] = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_ID_SEGMENT = re.compile(
+    r"^(?:[0-9a-fA-F]{24}|\d{2,}|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})$"
+)
+# Segmentos de um dígito (versões da API, ex.: /1/, /rest/api/3/) são mantidos
+# Chaves de projeto Jira (ex.: PROJ, ABC1)
+_KEY_SEGMENT = re.compile(r"^[A-Z][A-Z0-9_]+$")
+
+
+def endpoint_template(url: str) -> str:
+    """Reduzir a URL a um template estável: só o caminho, com ids substituídos."""
+    parts = urlsplit(url)
+    segments = []
+    for seg in parts.path.split("/"):
+        if _ID_SEGMENT.match(seg):
+            segments.append("{id}")
+        elif _KEY_SEGMENT.match(seg):
+            segments.append("{key}")
+        else:
+            segments.append(seg)
+    return "/".join(segments)
+
+
+class EndpointStats:
+    def __init__(self) -> None:
+        self.count = 0
+        self.latency_sum = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.statuses: Dict[str, int] = {}
+        self.retries = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def observe(self, seconds: float, status: str, retries: int, sent: int, received: int) -> None:
+        self.count += 1
+        self.latency_sum += seconds
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.retries += retries
+        self.bytes_sent += sent
+        self.bytes_received += received
+
+
+_lock = threading.Lock()
+_STATS: Dict[Tuple[str, str, str], EndpointStats] = {}
+_trace: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar("integrations_trace", default=None)
+
+
+def record_call(
+    provider: str,
+    method: str,
+    url: str,
+    seconds: float,
+    status: Optional[int],
+    retries: int = 0,
+    bytes_sent: int = 0,
+    bytes_received: int = 0,
+) -> None:
+    """Registrar uma chamada concluída (``status`` None indica erro de rede/timeout)."""
+    template = endpoint_template(url)
+    status_label = str(status) if status is not None else "error"
+    with _lock:
+        stats = _STATS.setdefault((provider, method.upper(), template), EndpointStats())
+        stats.observe(seconds, status_label, retries, bytes_sent, bytes_received)
+    trace = _trace.get()
+    if trace is not None:
+        trace.append({
+            "provider": provider,
+            "method": method.upper(),
+            "endpoint": template,
+            "status": status_label,
+            "duration_ms": round(seconds * 1000, 1),
+            "retries": retries,
+        })
+
+
+def start_trace() -> Any:
+    """Iniciar a coleta das chamadas de saída da requisição atual."""
+    return _trace.set([])
+
+
+def end_trace(token: Any) -> List[Dict[str, Any]]:
+    calls = _trace.get() or []
+    _trace.reset(token)
+    return calls
+
+
+def server_timing_header(calls: List[Dict[str, Any]]) -> Optional[str]:
+    """Resumir as chamadas por provedor no formato do header Server-Timing."""
+    totals: Dict[str, Tuple[float, int]] = {}
+    for c in calls:
+        total, count = totals.get(c["provider"], (0.0, 0))
+        totals[c["provider"]] = (total + c["duration_ms"], count + 1)
+    if not totals:
+        return None
+    return ", ".join(
+        f'{provider};dur={total:.1f};desc="{count} chamada(s)"' for provider, (total, count) in totals.items()
+    )
+
+
+def snapshot() -> List[Dict[str, Any]]:
+    """Cópia das métricas acumuladas neste processo."""
+    with _lock:
+        items = list(_STATS.items())
+        return [
+            {
+                "provider": provider,
+                "method": method,
+                "endpoint": template,
+                "count": s.count,
+                "latency_sum": s.latency_sum,
+                "buckets": list(s.buckets),
+                "statuses": dict(s.statuses),
+                "retries": s.retries,
+                "bytes_sent": s.bytes_sent,
+                "bytes_received": s.bytes_received,
+            }
+            for (provider, method, template), s in items
+        ]
+
+
+def render_prometheus() -> str:
+    """Exportar as métricas no formato texto do Prometheus."""
+    lines = [
+        "# TYPE integration_request_duration_seconds histogram",
+        "# TYPE integration_requests_total counter",
+        "# TYPE integration_retries_total counter",
+        "# TYPE integration_bytes_sent_total counter",
+        "# TYPE integration_bytes_received_total counter",
+    ]
+    for item in snapshot():
+        labels = f'provider="{item["provider"]}",method="{item["method"]}",endpoint="{item["endpoint"]}"'
+        cumulative = 0
+        for bound, n in zip(LATENCY_BUCKETS, item["buckets"]):
+            cumulative += n
+            lines.append(f'integration_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'integration_request_duration_seconds_bucket{{{labels},le="+Inf"}} {item["count"]}')
+        lines.append(f"integration_request_duration_seconds_sum{{{labels}}} {item['latency_sum']:.6f}")
+        lines.append(f"integration_request_duration_seconds_count{{{labels}}} {item['count']}")
+        for status, n in sorted(item["statuses"].items()):
+            lines.append(f'integration_requests_total{{{labels},status="{status}"}} {n}')
+        lines.append(f"integration_retries_total{{{labels}}} {item['retries']}")
+        lines.append(f"integration_bytes_sent_total{{{labels}}} {item['bytes_sent']}")
+        lines.append(f"integration_bytes_received_total{{{labels}}} {item['bytes_received']}")
+    return "\n".join(lines) + "\n"
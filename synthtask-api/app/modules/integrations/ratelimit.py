@@ -0,0 +1,210 @@
+"""
+Controle de taxa (token bucket) para chamadas de saída aos provedores.
+
+Cada par provedor/credencial tem seu próprio balde, respeitando os limites por token
+das APIs (ex.: Trello permite 100 requisições a cada 10 segundos por token). O estado
+do balde fica em memória (um processo) ou no MongoDB, para coordenar vários workers
+do uvicorn (RATE_LIMIT_BACKEND=mongo).
+"""
+import asyncio
+import hashlib
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from pymongo import ReturnDocument
+
+from app.core.config import settings
+
+# provedor -> (requisições, período em segundos); sobrescreva com <PROVIDER>_RATE_LIMIT="100/10"
+DEFAULT_PROVIDER_LIMITS: Dict[str, Tuple[int, float]] = {
+    "trello": (100, 10.0),
+    "jira": (100, 10.0),
+}
+FALLBACK_LIMIT: Tuple[int, float] = (50, 10.0)
+
+
+def provider_limit(provider: str) -> Tuple[int, float]:
+    raw = settings.PROVIDER_RATE_LIMITS.get(provider.lower())
+    if raw and "/" in raw:
+        try:
+            requests_str, period_str = raw.split("/", 1)
+            return int(requests_str), float(period_str)
+        except ValueError:
+            pass
+    return DEFAULT_PROVIDER_LIMITS.get(provider, FALLBACK_LIMIT)
+
+
+class TokenBucket:
+    """Balde de tokens em memória com reabastecimento contínuo.
+
+    ``capacity`` requisições podem ser feitas a cada ``period`` segundos. ``pause``
+    bloqueia o balde inteiro (ex.: ao receber 429 com Retry-After).
+    """
+
+    def __init__(self, capacity: int, period: float):
+        self.capacity = float(capacity)
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated_at = now
+
+    async def try_acquire(self) -> float:
+        """Consumir um token; retorna 0 se conseguiu ou quantos segundos esperar."""
+        now = time.monotonic()
+        if now < self.paused_until:
+            return self.paused_until - now
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    async def pause(self, seconds: float) -> None:
+        """Suspender o balde por ``seconds`` e zerar os tokens acumulados."""
+        now = time.monotonic()
+        self.paused_until = max(self.paused_until, now + max(0.0, seconds))
+        self.tokens = 0.0
+        self.updated_at = self.paused_until
+
+
+class MongoTokenBucket:
+    """Balde de tokens compartilhado entre processos via documento no MongoDB.
+
+    Reabastecimento e consumo acontecem atomicamente em um único
+    ``find_one_and_update`` com pipeline de agregação.
+    """
+
+    def __init__(self, collection: Any, key: str, capacity: int, period: float):
+        self.collection = collection
+        self.key = key
+        self.capacity = float(capacity)
+        self.rate = capacity / period
+
+    async def try_acquire(self) -> float:
+        now = time.time()
+        elapsed = {"$max": [0, {"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}]}
+        doc = await self.collection.find_one_and_update(
+            {"_id": self.key},
+            [
+                {"$set": {
+                    "tokens": {"$min": [self.capacity, {"$add": [
+                        {"$ifNull": ["$tokens", self.capacity]},
+                        {"$multiply": [elapsed, self.rate]},
+                    ]}]},
+                    "updated_at": {"$max": [now, {"$ifNull": ["$updated_at", now]}]},
+                    "paused_until": {"$ifNull": ["$paused_until", 0]},
+                }},
+                {"$set": {"granted": {"$and": [
+                    {"$gte": ["$tokens", 1]},
+                    {"$lte": ["$paused_until", now]},
+                ]}}},
+                {"$set": {"tokens": {"$cond": ["$granted", {"$subtract": ["$tokens", 1]}, "$tokens"]}}},
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc.get("granted"):
+            return 0.0
+        paused_for = float(doc.get("paused_until") or 0) - now
+        if paused_for > 0:
+            return paused_for
+        return max(0.01, (1 - float(doc.get("tokens") or 0)) / self.rate)
+
+    async def pause(self, seconds: float) -> None:
+        until = time.time() + max(0.0, seconds)
+        await self.collection.update_one(
+            {"_id": self.key},
+            [{"$set": {
+                "paused_until": {"$max": [{"$ifNull": ["$paused_until", 0]}, until]},
+                "tokens": 0,
+                "updated_at": {"$max": [{"$ifNull": ["$updated_at", 0]}, until]},
+            }}],
+            upsert=True,
+        )
+
+
+class RateLimiter:
+    """Limitador de um provedor/credencial com fila de espera observável."""
+
+    def __init__(self, provider: str, key: str, bucket: Any):
+        self.provider = provider
+        self.key = key
+        self.bucket = bucket
+        self.queued = 0
+        self.throttled_total = 0
+
+    async def acquire(self) -> None:
+        """Aguardar até haver um token disponível e consumi-lo."""
+        self.queued += 1
+        try:
+            while True:
+                wait = await self.bucket.try_acquire()
+                if wait <= 0:
+                    return
+                await asyncio.sleep(wait)
+        finally:
+            self.queued -= 1
+
+    async def pause(self, seconds: float) -> None:
+        self.throttled_total += 1
+        await self.bucket.pause(seconds)
+
+
+_LIMITERS: Dict[str, RateLimiter] = {}
+
+
+def credential_key(provider: str, credential: str) -> str:
+    """Chave estável do balde sem manter o segredo em memória como chave."""
+    digest = hashlib.sha256(credential.encode("utf-8")).hexdigest()[:16]
+    return f"{provider}:{digest}"
+
+
+def _make_bucket(key: str, capacity: int, period: float) -> Any:
+    if settings.RATE_LIMIT_BACKEND == "mongo":
+        from app.core.database import rate_limits_collection
+
+        return MongoTokenBucket(rate_limits_collection, key, capacity, period)
+    return TokenBucket(capacity, period)
+
+
+def get_limiter(provider: str, credential: str) -> RateLimiter:
+    key = credential_key(provider, credential)
+    limiter = _LIMITERS.get(key)
+    if limiter is None:
+        capacity, period = provider_limit(provider)
+        limiter = RateLimiter(provider, key, _make_bucket(key, capacity, period))
+        _LIMITERS[key] = limiter
+    return limiter
+
+
+def limiter_stats() -> Dict[str, Dict[str, int]]:
+    """Fila de espera e quantidade de 429 recebidos, agregados por provedor."""
+    stats: Dict[str, Dict[str, int]] = {}
+    for limiter in _LIMITERS.values():
+        s = stats.setdefault(limiter.provider, {"credentials": 0, "queued": 0, "throttled": 0})
+        s["credentials"] += 1
+        s["queued"] += limiter.queued
+        s["throttled"] += limiter.throttled_total
+    return stats
+
+
+def parse_retry_after(value: Optional[str], default: float) -> float:
+    """Interpretar o header Retry-After (segundos ou data HTTP)."""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        from email.utils import parsedate_to_datetime
+
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except Exception:
+        return default
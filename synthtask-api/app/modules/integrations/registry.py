@@ -1,21 +1,91 @@
 """
 Registro de provedores e fábrica para integrações.
+
+Os provedores são declarados como ``"modulo:Classe"`` e só são importados e
+instanciados no primeiro uso. Fontes, em ordem de precedência:
+
+- ``INTEGRATION_PROVIDER_MODULES`` (ex.: ``asana=meu_pacote.asana:AsanaService``);
+- entry points do grupo ``synthtask.integrations`` de pacotes instalados;
+- os provedores embutidos (Trello e Jira).
+
+``INTEGRATION_PROVIDERS`` (ex.: ``trello,jira``) restringe quais ficam habilitados.
 """
-from typing import Dict
+import importlib
+import logging
+import threading
+from importlib.metadata import entry_points
+from typing import Dict, List, Optional
+
+from app.core.config import settings
 
 from .base import IntegrationService
-from .trello.service import TrelloService
-from .jira.service import JiraService
 
+logger = logging.getLogger("integrations.registry")
 
-REGISTRY: Dict[str, IntegrationService] = {
-    "trello": TrelloService(),
-    "jira": JiraService(),
+ENTRY_POINT_GROUP = "synthtask.integrations"
+
+BUILTIN_PROVIDERS: Dict[str, str] = {
+    "trello": "app.modules.integrations.trello.service:TrelloService",
+    "jira": "app.modules.integrations.jira.service:JiraService",
 }
 
+_instances: Dict[str, IntegrationService] = {}
+_lock = threading.Lock()
+_providers: Optional[Dict[str, str]] = None
+
+
+def _configured_providers() -> Dict[str, str]:
+    providers: Dict[str, str] = {}
+    for item in (settings.INTEGRATION_PROVIDER_MODULES or "").split(","):
+        name, sep, target = item.partition("=")
+        if sep and name.strip() and target.strip():
+            providers[name.strip().lower()] = target.strip()
+    return providers
+
+
+def _entry_point_providers() -> Dict[str, str]:
+    try:
+        return {ep.name.lower(): ep.value for ep in entry_points(group=ENTRY_POINT_GROUP)}
+    except Exception as e:
+        logger.warning(f"Falha ao ler entry points de integrações: {e}")
+        return {}
+
+
+def available_providers() -> Dict[str, str]:
+    """Provedores habilitados (nome -> ``modulo:Classe``), sem importá-los."""
+    global _providers
+    if _providers is None:
+        providers = {**BUILTIN_PROVIDERS, **_entry_point_providers(), **_configured_providers()}
+        enabled = [p.strip().lower() for p in (settings.INTEGRATION_PROVIDERS or "").split(",") if p.strip()]
+        if enabled:
+            providers = {name: target for name, target in providers.items() if name in enabled}
+        _providers = providers
+    return _providers
+
+
+def provider_names() -> List[str]:
+    return sorted(available_providers())
+
+
+def _load(target: str) -> IntegrationService:
+    module_name, _, class_name = target.partition(":")
+    cls = getattr(importlib.import_module(module_name), class_name)
+    service = cls()
+    if not isinstance(service, IntegrationService):
+        raise TypeError(f"{target} não implementa IntegrationService")
+    return service
+
 
 def get_integration(provider: str) -> IntegrationService:
-    service = REGISTRY.get(provider)
-    if not service:
+    service = _instances.get(provider)
+    if service is not None:
+        return service
+    target = available_providers().get(provider)
+    if not target:
         raise ValueError(f"Provider não suportado: {provider}")
-    return service
\ No newline at end of file
+    with _lock:
+        service = _instances.get(provider)
+        if service is None:
+            service = _load(target)
+            _instances[provider] = service
+    return service
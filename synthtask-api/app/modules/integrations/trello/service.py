@@ -1,17 +1,27 @@
 """
 Integração Trello implementando o adaptador IntegrationService.
 """
+import asyncio
+import re
 import requests
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 from fastapi import HTTPException
 
+from app.core.config import settings
+from app.modules.integrations import http, webhooks
 from app.modules.integrations.base import IntegrationService
+from app.modules.integrations.cache import metadata_cache
 from app.modules.integrations.storage import IntegrationStorage
 
+BULK_CONCURRENCY = 10
+# Máximo de rotas aceitas por GET /1/batch
+BATCH_MAX_URLS = 10
+BOARD_TARGET_DETAIL = "target_id inválido: informe o ID da lista (idList), não do board"
+
 class TrelloService(IntegrationService):
     provider_name = "trello"
     capabilities = ["boards", "lists", "members", "create_task"]
-    BASE_URL = "https://api.trello.com/1"
+    BASE_URL = settings.TRELLO_API_BASE_URL
 
     def __init__(self):
         self.storage = IntegrationStorage(provider=self.provider_name)
@@ -25,7 +35,7 @@ class TrelloService(IntegrationService):
         try:
             url = f"{self.BASE_URL}/members/me"
             params = {"key": payload["api_key"], "token": payload["token"], "fields": "username,fullName,email"}
-            resp = requests.get(url, params=params, timeout=20)
+            resp = await http.request(self.provider_name, "GET", url, credential=payload["token"], params=params, timeout=20)
             if resp.status_code < 400:
                 me = resp.json() or {}
                 if isinstance(me, dict):
@@ -39,6 +49,8 @@ class TrelloService(IntegrationService):
             # Não bloquear o save se enriquecimento falhar
             pass
         await self.storage.save(user_id, payload)
+        # Só depois de gravar: um save que falha não descarta o cache da conta atual
+        await metadata_cache.publish_reset(self.provider_name, user_id)
 
     async def get_user_credentials(self, user_id: int) -> Dict[str, Any]:
         creds = await self.storage.get(user_id)
@@ -46,54 +58,138 @@ class TrelloService(IntegrationService):
             raise HTTPException(status_code=400, detail="Credenciais Trello não configuradas")
         return creds
 
-    async def get_boards(self, user_id: int) -> List[Dict[str, Any]]:
+    async def get_boards(self, user_id: int, refresh: bool = False) -> List[Dict[str, Any]]:
+        """Listar boards do usuário (cache de metadados; ``refresh`` força nova busca)."""
+        return await metadata_cache.get_or_load(
+            self.provider_name, user_id, "boards", (),
+            lambda: self.fetch_boards(user_id), refresh=refresh,
+        )
+
+    async def fetch_boards(self, user_id: int) -> List[Dict[str, Any]]:
         creds = await self.get_user_credentials(user_id)
         url = f"{self.BASE_URL}/members/me/boards"
         params = {"key": creds["api_key"], "token": creds["token"], "fields": "id,name"}
-        resp = requests.get(url, params=params)
+        resp = await http.request(self.provider_name, "GET", url, credential=creds["token"], params=params)
         if resp.status_code != 200:
             raise HTTPException(status_code=400, detail=f"Erro ao listar boards: {resp.text}")
         return resp.json()
 
-    async def get_lists(self, user_id: int, board_id: str) -> List[Dict[str, Any]]:
+    async def get_lists(self, user_id: int, board_id: str, refresh: bool = False) -> List[Dict[str, Any]]:
+        """Listar listas de um board (cache de metadados)."""
+        return await metadata_cache.get_or_load(
+            self.provider_name, user_id, "lists", (board_id,),
+            lambda: self.fetch_lists(user_id, board_id), refresh=refresh,
+        )
+
+    async def fetch_lists(self, user_id: int, board_id: str) -> List[Dict[str, Any]]:
         creds = await self.get_user_credentials(user_id)
         url = f"{self.BASE_URL}/boards/{board_id}/lists"
         params = {"key": creds["api_key"], "token": creds["token"], "fields": "id,name"}
-        resp = requests.get(url, params=params)
+        resp = await http.request(self.provider_name, "GET", url, credential=creds["token"], params=params)
         if resp.status_code != 200:
             raise HTTPException(status_code=400, detail=f"Erro ao listar listas: {resp.text}")
         return resp.json()
 
-    async def get_members(self, user_id: int, board_id: str) -> List[Dict[str, Any]]:
+    async def get_members(self, user_id: int, board_id: str, refresh: bool = False) -> List[Dict[str, Any]]:
+        """Listar membros de um board (cache de metadados)."""
+        return await metadata_cache.get_or_load(
+            self.provider_name, user_id, "members", (board_id,),
+            lambda: self.fetch_members(user_id, board_id), refresh=refresh,
+        )
+
+    async def fetch_members(self, user_id: int, board_id: str) -> List[Dict[str, Any]]:
         creds = await self.get_user_credentials(user_id)
         url = f"{self.BASE_URL}/boards/{board_id}/members"
         params = {"key": creds["api_key"], "token": creds["token"]}
         try:
-            resp = requests.get(url, params=params, timeout=20)
+            resp = await http.request(self.provider_name, "GET", url, credential=creds["token"], params=params, timeout=20)
             if resp.status_code >= 400:
                 # Propaga o status original para melhor diagnóstico (401/403/404)
                 raise HTTPException(status_code=resp.status_code, detail=f"Erro ao listar membros: {resp.text}")
             members = resp.json() or []
-            normalized = []
-            for m in members:
-                normalized.append({
-                    "id": m.get("id"),
-                    "username": m.get("username"),
-                    "fullName": m.get("fullName"),
-                    "avatarUrl": m.get("avatarUrl"),
-                })
-            return normalized
+            return [self.normalize_member(m) for m in members]
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    def normalize_member(self, m: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": m.get("id"),
+            "username": m.get("username"),
+            "fullName": m.get("fullName"),
+            "avatarUrl": m.get("avatarUrl"),
+        }
+
+    async def get_board_context(self, user_id: int, board_ids: List[str], refresh: bool = False) -> Dict[str, Dict[str, Any]]:
+        """Contexto de boards (board, listas, membros) via cache de metadados."""
+        ids = tuple(dict.fromkeys(str(b).strip() for b in board_ids if str(b).strip()))
+        return await metadata_cache.get_or_load(
+            self.provider_name, user_id, "board_context", ids,
+            lambda: self.fetch_board_context(user_id, list(ids)), refresh=refresh,
+        )
+
+    async def fetch_board_context(self, user_id: int, board_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Buscar board, listas e membros de um ou mais boards via GET /1/batch.
+
+        Cada board gera 3 rotas e o Trello aceita até BATCH_MAX_URLS rotas por
+        chamada; lotes distintos são enviados em paralelo. Retorna
+        { board_id: { board, lists, members, errors? } }.
+        """
+        creds = await self.get_user_credentials(user_id)
+        ids = list(dict.fromkeys(str(b).strip() for b in board_ids if str(b).strip()))
+        if not ids:
+            return {}
+        per_batch = max(1, BATCH_MAX_URLS // 3)
+        url = f"{self.BASE_URL}/batch"
+
+        async def fetch_batch(chunk: List[str]) -> List[Any]:
+            # Vírgula separa as rotas do batch, então cada rota pede no máximo um campo
+            routes: List[str] = []
+            for bid in chunk:
+                routes += [f"/boards/{bid}?fields=name", f"/boards/{bid}/lists?fields=name", f"/boards/{bid}/members"]
+            params = {"key": creds["api_key"], "token": creds["token"], "urls": ",".join(routes)}
+            resp = await http.request(self.provider_name, "GET", url, credential=creds["token"], params=params)
+            if resp.status_code >= 400:
+                raise HTTPException(status_code=resp.status_code, detail=f"Erro ao consultar batch do Trello: {resp.text}")
+            data = resp.json()
+            return data if isinstance(data, list) else []
+
+        chunks = [ids[i:i + per_batch] for i in range(0, len(ids), per_batch)]
+        try:
+            responses = await asyncio.gather(*[fetch_batch(c) for c in chunks])
         except HTTPException:
             raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
+        context: Dict[str, Dict[str, Any]] = {}
+        for chunk, items in zip(chunks, responses):
+            for n, bid in enumerate(chunk):
+                parts = items[n * 3:n * 3 + 3]
+                entry: Dict[str, Any] = {"board": None, "lists": [], "members": []}
+                errors: Dict[str, Any] = {}
+                for name, item in zip(("board", "lists", "members"), parts):
+                    if isinstance(item, dict) and "200" in item:
+                        entry[name] = item["200"]
+                    else:
+                        errors[name] = item
+                if isinstance(entry["board"], dict):
+                    entry["board"] = {"id": entry["board"].get("id"), "name": entry["board"].get("name")}
+                entry["lists"] = [{"id": l.get("id"), "name": l.get("name")} for l in entry["lists"] or []]
+                entry["members"] = [self.normalize_member(m) for m in entry["members"] or []]
+                if errors or len(parts) < 3:
+                    entry["errors"] = errors or {"batch": "Resposta incompleta do Trello"}
+                context[bid] = entry
+        return context
+
     async def get_board_id_for_list(self, user_id: int, list_id: str) -> str:
         creds = await self.get_user_credentials(user_id)
         url = f"{self.BASE_URL}/lists/{list_id}"
         params = {"key": creds["api_key"], "token": creds["token"], "fields": "idBoard"}
         try:
-            resp = requests.get(url, params=params, timeout=20)
+            resp = await http.request(self.provider_name, "GET", url, credential=creds["token"], params=params, timeout=20)
             if resp.status_code >= 400:
                 raise HTTPException(status_code=resp.status_code, detail=f"Erro ao obter board da lista: {resp.text}")
             data = resp.json() or {}
@@ -106,6 +202,178 @@ class TrelloService(IntegrationService):
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
+    async def ensure_list_target(self, user_id: int, list_id: str) -> None:
+        """Recusar de imediato um target_id já conhecido como board, sem consultar o Trello.
+
+        Ids ainda não classificados seguem direto para o create; só quando o Trello
+        recusa o card (400/404) ``list_target_error`` descobre se era um board.
+        """
+        if metadata_cache.peek(self.provider_name, user_id, "list_target", (str(list_id),), fresh_only=True) == "board":
+            raise HTTPException(status_code=400, detail=BOARD_TARGET_DETAIL)
+
+    async def list_target_error(self, user_id: int, list_id: str) -> Optional[str]:
+        """Depois de um create recusado (400/404): mensagem de board no lugar de lista, se for o caso.
+
+        A classificação é refeita (o valor em cache pode ter ficado velho) e só é guardada
+        quando o Trello responde de forma definitiva; criações paralelas recusadas
+        compartilham a mesma consulta.
+        """
+        try:
+            outcome = await metadata_cache.get_or_load(
+                self.provider_name, user_id, "list_target", (str(list_id),),
+                lambda: self.check_list_target(user_id, list_id),
+                refresh=True,
+            )
+        except Exception:
+            return None
+        return BOARD_TARGET_DETAIL if outcome == "board" else None
+
+    async def check_list_target(self, user_id: int, list_id: str) -> str:
+        """Classificar o id como "list", "board" ou "missing".
+
+        Respostas que não são 2xx/400/404 (429, 5xx) e falhas de rede levantam exceção,
+        para que o cache não guarde um resultado transitório.
+        """
+        creds = await self.get_user_credentials(user_id)
+        params = {"key": creds["api_key"], "token": creds["token"]}
+        lr = await http.request(
+            self.provider_name, "GET", f"{self.BASE_URL}/lists/{list_id}",
+            credential=creds["token"], params={**params, "fields": "idBoard"}, timeout=20,
+        )
+        if lr.status_code < 300:
+            return "list"
+        if lr.status_code not in (400, 404):
+            raise HTTPException(status_code=lr.status_code, detail=f"Erro ao consultar lista: {lr.text}")
+        br = await http.request(
+            self.provider_name, "GET", f"{self.BASE_URL}/boards/{list_id}",
+            credential=creds["token"], params={**params, "fields": "id"}, timeout=20,
+        )
+        if br.status_code < 300:
+            return "board"
+        if br.status_code not in (400, 404):
+            raise HTTPException(status_code=br.status_code, detail=f"Erro ao consultar board: {br.text}")
+        return "missing"
+
+    async def register_webhooks(self, user_id: int, board_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Registrar um webhook do Trello por board (todos os boards do usuário por padrão).
+
+        Mudanças em boards, listas e membros passam a chegar em
+        /api/integrations/trello/webhooks/{token}, e a conta passa a usar TTLs longos
+        no cache de metadados. Registrar de novo um board já coberto é inofensivo.
+        """
+        creds = await self.get_user_credentials(user_id)
+        callback = webhooks.callback_url(self.provider_name, user_id)
+        if board_ids is None:
+            board_ids = [str(b.get("id")) for b in await self.get_boards(user_id) if b.get("id")]
+        url = f"{self.BASE_URL}/webhooks"
+        semaphore = asyncio.Semaphore(BULK_CONCURRENCY)
+
+        async def register_one(board_id: str) -> Dict[str, Any]:
+            params = {
+                "key": creds["api_key"],
+                "token": creds["token"],
+                "callbackURL": callback,
+                "idModel": board_id,
+                "description": "SynthTask",
+            }
+            async with semaphore:
+                resp = await http.request(self.provider_name, "POST", url, credential=creds["token"], params=params)
+            if resp.status_code == 200:
+                return {"board_id": board_id, "ok": True, "webhook_id": (resp.json() or {}).get("id")}
+            if resp.status_code == 400 and "already exists" in resp.text:
+                return {"board_id": board_id, "ok": True, "webhook_id": None}
+            return {"board_id": board_id, "ok": False, "status": resp.status_code, "error": resp.text}
+
+        results = list(await asyncio.gather(*[register_one(b) for b in dict.fromkeys(board_ids)]))
+        if any(r["ok"] for r in results):
+            metadata_cache.mark_webhook_account(self.provider_name, user_id)
+        return results
+
+    def handle_webhook(self, user_id: int, payload: Dict[str, Any]) -> Dict[str, int]:
+        """
+        Aplicar uma notificação do Trello ao cache de metadados.
+
+        Renomear lista ou board corrige as entradas em memória; as demais mudanças
+        (listas criadas, arquivadas ou movidas, membros, boards fechados) invalidam
+        o que depende do board. Ids de board são globais, então as entradas de todas
+        as contas que enxergam o board são atualizadas.
+        """
+        metadata_cache.mark_webhook_account(self.provider_name, user_id)
+        action = payload.get("action") or {}
+        kind = str(action.get("type") or "")
+        data = action.get("data") or {}
+        old = data.get("old") or {}
+        board_id = str((data.get("board") or {}).get("id") or (payload.get("model") or {}).get("id") or "")
+        lst = data.get("list") or {}
+        counts = {"patched": 0, "invalidated": 0}
+        if not board_id:
+            return counts
+
+        if kind == "updateList" and "name" in old and not lst.get("closed") and lst.get("id"):
+            counts["patched"] += self.patch_list_name(board_id, str(lst["id"]), lst.get("name"))
+        elif kind in ("createList", "updateList", "moveListFromBoard", "moveListToBoard"):
+            counts["invalidated"] += self.invalidate_board(board_id, ("lists", "board_context"))
+            if lst.get("id"):
+                counts["invalidated"] += metadata_cache.invalidate(
+                    provider=self.provider_name, resource="list_target",
+                    predicate=lambda key: key[3] == (str(lst["id"]),),
+                )
+        elif kind == "updateBoard" and "name" in old and not (data.get("board") or {}).get("closed"):
+            counts["patched"] += self.patch_board_name(board_id, (data.get("board") or {}).get("name"))
+        elif kind in ("addMemberToBoard", "removeMemberFromBoard", "makeNormalMemberOfBoard",
+                      "makeAdminOfBoard", "makeObserverOfBoard", "updateMember"):
+            counts["invalidated"] += self.invalidate_board(board_id, ("members", "board_context"))
+            # O membro adicionado/removido pode ser outro usuário do SynthTask
+            counts["invalidated"] += metadata_cache.invalidate(provider=self.provider_name, resource="boards")
+        elif kind in ("updateBoard", "deleteBoard", "moveBoardToOrganization", "moveBoardFromOrganization"):
+            counts["invalidated"] += self.invalidate_board(board_id)
+            counts["invalidated"] += metadata_cache.invalidate(provider=self.provider_name, resource="boards")
+        return counts
+
+    def invalidate_board(self, board_id: str, resources: Tuple[str, ...] = ("lists", "members", "board_context")) -> int:
+        return sum(
+            metadata_cache.invalidate(provider=self.provider_name, resource=r, predicate=lambda key: board_id in key[3])
+            for r in resources
+        )
+
+    def patch_list_name(self, board_id: str, list_id: str, name: Any) -> int:
+        def rename(items: Any) -> Optional[List[Dict[str, Any]]]:
+            if not any(isinstance(i, dict) and i.get("id") == list_id for i in items or []):
+                return None
+            return [{**i, "name": name} if i.get("id") == list_id else i for i in items]
+
+        def rename_in_context(context: Dict[str, Dict[str, Any]]) -> Optional[Dict[str, Dict[str, Any]]]:
+            entry = context.get(board_id)
+            lists = rename(entry.get("lists")) if entry else None
+            return {**context, board_id: {**entry, "lists": lists}} if lists is not None else None
+
+        in_board = lambda key: board_id in key[3]
+        return (
+            metadata_cache.patch(rename, provider=self.provider_name, resource="lists", predicate=in_board)
+            + metadata_cache.patch(rename_in_context, provider=self.provider_name, resource="board_context", predicate=in_board)
+        )
+
+    def patch_board_name(self, board_id: str, name: Any) -> int:
+        def rename(boards: Any) -> Optional[List[Dict[str, Any]]]:
+            if not any(isinstance(b, dict) and b.get("id") == board_id for b in boards or []):
+                return None
+            return [{**b, "name": name} if b.get("id") == board_id else b for b in boards]
+
+        def rename_in_context(context: Dict[str, Dict[str, Any]]) -> Optional[Dict[str, Dict[str, Any]]]:
+            entry = context.get(board_id)
+            if not entry or not isinstance(entry.get("board"), dict):
+                return None
+            return {**context, board_id: {**entry, "board": {**entry["board"], "name": name}}}
+
+        return (
+            metadata_cache.patch(rename, provider=self.provider_name, resource="boards")
+            + metadata_cache.patch(
+                rename_in_context, provider=self.provider_name, resource="board_context",
+                predicate=lambda key: board_id in key[3],
+            )
+        )
+
     def build_card_description(self, task_data: Dict[str, Any]) -> str:
         description = (task_data.get("description") or "") + "\n\n"
         assignee = task_data.get("assignee")
@@ -117,40 +385,76 @@ class TrelloService(IntegrationService):
         description += "\n---\n_Criado pelo SynthTask_"
         return description
 
-    async def create_task(self, user_id: int, target_list_id: str, task_data: Dict[str, Any]) -> Dict[str, Any]:
-        creds = await self.get_user_credentials(user_id)
-        url = f"{self.BASE_URL}/cards"
-
-        description = self.build_card_description(task_data)
+    def build_card_params(self, creds: Dict[str, Any], target_list_id: str, task_data: Dict[str, Any]) -> Dict[str, Any]:
         params = {
             "key": creds["api_key"],
             "token": creds["token"],
             "idList": target_list_id,
             "name": task_data.get("title", "Tarefa"),
-            "desc": description,
+            "desc": self.build_card_description(task_data),
         }
         due_date = task_data.get("due_date")
         if due_date:
             params["due"] = due_date
         assignee = task_data.get("assignee")
         if assignee:
-            try:
-                import re
-                s = str(assignee).strip()
-                # Trello IDs geralmente têm 24 caracteres hexadecimais
-                if re.fullmatch(r"[0-9a-fA-F]{24}", s):
-                    params["idMembers"] = s
-            except Exception:
-                pass
-
-        resp = requests.post(url, params=params)
+            s = str(assignee).strip()
+            # Trello IDs geralmente têm 24 caracteres hexadecimais
+            if re.fullmatch(r"[0-9a-fA-F]{24}", s):
+                params["idMembers"] = s
+        return params
+
+    def parse_card_error(self, resp: requests.Response) -> str:
+        msg = resp.text
+        try:
+            data = resp.json() or {}
+            if isinstance(data, dict) and data.get("message") == "Invalid objectId":
+                msg = "idList ou idMembers inválido"
+        except Exception:
+            pass
+        return f"Erro ao criar card: {msg}"
+
+    async def create_task(self, user_id: int, target_list_id: str, task_data: Dict[str, Any]) -> Dict[str, Any]:
+        creds = await self.get_user_credentials(user_id)
+        url = f"{self.BASE_URL}/cards"
+        params = self.build_card_params(creds, target_list_id, task_data)
+
+        resp = await http.request(self.provider_name, "POST", url, credential=creds["token"], params=params)
         if resp.status_code != 200:
-            msg = resp.text
-            try:
-                data = resp.json() or {}
-                if isinstance(data, dict) and data.get("message") == "Invalid objectId":
-                    msg = "idList ou idMembers inválido"
-            except Exception:
-                pass
-            raise HTTPException(status_code=400, detail=f"Erro ao criar card: {msg}")
+            if resp.status_code in (400, 404):
+                # Id de board no lugar da lista, ou lista removida/arquivada
+                detail = await self.list_target_error(user_id, target_list_id)
+                if detail:
+                    raise HTTPException(status_code=400, detail=detail)
+            raise HTTPException(status_code=400, detail=self.parse_card_error(resp))
         return resp.json()
+
+    async def create_tasks_bulk(self, user_id: int, target_list_id: str, tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Criar vários cards na mesma lista em paralelo.
+
+        Os POSTs passam pelo limitador da credencial (100 req / 10 s), que pausa
+        pelo Retry-After ao receber 429 antes de tentar novamente. Retorna um
+        resultado por tarefa, na ordem recebida.
+        """
+        if not tasks:
+            return []
+        creds = await self.get_user_credentials(user_id)
+        url = f"{self.BASE_URL}/cards"
+        semaphore = asyncio.Semaphore(BULK_CONCURRENCY)
+
+        async def create_one(task: Dict[str, Any]) -> Dict[str, Any]:
+            params = self.build_card_params(creds, target_list_id, task)
+            async with semaphore:
+                try:
+                    resp = await http.request(self.provider_name, "POST", url, credential=creds["token"], params=params)
+                except Exception as e:
+                    return {"task_id": task.get("id"), "ok": False, "status": 500, "error": str(e)}
+            if resp.status_code != 200:
+                detail = None
+                if resp.status_code in (400, 404):
+                    detail = await self.list_target_error(user_id, target_list_id)
+                return {"task_id": task.get("id"), "ok": False, "status": resp.status_code, "error": detail or self.parse_card_error(resp)}
+            return {"task_id": task.get("id"), "ok": True, "result": resp.json()}
+
+        return list(await asyncio.gather(*[create_one(t) for t in tasks]))
@@ -0,0 +1,60 @@
+"""
+Webhooks dos provedores: URL de callback por conta e verificação de assinaturas.
+
+A URL de callback termina em um token ``<user_id>.<hmac>`` derivado de
+ENCRYPTION_SECRET, então o endpoint identifica a conta afetada sem consultar o
+banco e rejeita chamadas com token forjado. As assinaturas nativas dos provedores
+(Trello: X-Trello-Webhook; Jira: X-Hub-Signature) são conferidas quando o segredo
+correspondente está configurado.
+"""
+import base64
+import hashlib
+import hmac
+from typing import Optional
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+
+
+def _sign(provider: str, user_id: int) -> str:
+    message = f"{provider}:{user_id}".encode("utf-8")
+    digest = hmac.new(settings.ENCRYPTION_SECRET.encode("utf-8"), message, hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest[:18]).decode("ascii")
+
+
+def webhook_token(provider: str, user_id: int) -> str:
+    return f"{user_id}.{_sign(provider, user_id)}"
+
+
+def parse_webhook_token(provider: str, token: str) -> Optional[int]:
+    """Retorna o user_id do token ou None se o token for inválido."""
+    user_part, _, signature = token.partition(".")
+    if not user_part.isdigit() or not signature:
+        return None
+    user_id = int(user_part)
+    if not hmac.compare_digest(signature, _sign(provider, user_id)):
+        return None
+    return user_id
+
+
+def callback_url(provider: str, user_id: int) -> str:
+    if not settings.WEBHOOK_BASE_URL:
+        raise HTTPException(status_code=400, detail="Configure WEBHOOK_BASE_URL com a URL pública da API para registrar webhooks")
+    return f"{settings.WEBHOOK_BASE_URL}/api/integrations/{provider}/webhooks/{webhook_token(provider, user_id)}"
+
+
+def verify_trello_signature(body: bytes, callback: str, signature: Optional[str]) -> bool:
+    """HMAC-SHA1 (base64) do corpo + callbackURL com o segredo do app Trello."""
+    if not settings.TRELLO_WEBHOOK_SECRET:
+        return True
+    digest = hmac.new(settings.TRELLO_WEBHOOK_SECRET.encode("utf-8"), body + callback.encode("utf-8"), hashlib.sha1).digest()
+    return bool(signature) and hmac.compare_digest(base64.b64encode(digest).decode("ascii"), signature or "")
+
+
+def verify_jira_signature(body: bytes, signature: Optional[str]) -> bool:
+    """Header ``X-Hub-Signature: sha256=<hex>`` dos webhooks Jira com segredo."""
+    if not settings.JIRA_WEBHOOK_SECRET:
+        return True
+    expected = "sha256=" + hmac.new(settings.JIRA_WEBHOOK_SECRET.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return bool(signature) and hmac.compare_digest(expected, signature or "")
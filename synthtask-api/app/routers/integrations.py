@@ -1,7 +1,8 @@
 """
 Endpoints de integrações com provedores (Trello, Jira) usando adaptadores.
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
+import asyncio
 import logging
 import os
 import time
@@ -10,12 +11,27 @@ from typing import Optional, List, Dict, Any
 from pydantic import BaseModel
 
 from app.core.auth import get_current_user
-from app.modules.integrations.registry import get_integration
+from app.core.config import settings
+from app.modules.integrations import http, webhooks
+from app.modules.integrations.cache import metadata_cache
+from app.modules.integrations.ratelimit import limiter_stats
+from app.modules.integrations.registry import get_integration, provider_names
 from app.modules.integrations.storage import IntegrationStorage
+from app.services.idempotency_service import idempotency_service
 
 router = APIRouter(prefix="/api/integrations", tags=["Integrations"])
 logger = logging.getLogger("integrations.jira")
 
+@router.get("/providers")
+async def list_providers(current_user: dict = Depends(get_current_user)):
+    """Provedores habilitados nesta instalação."""
+    return {"providers": provider_names()}
+
+@router.get("/limits")
+async def rate_limits(current_user: dict = Depends(get_current_user)):
+    """Estado dos limitadores de saída por provedor (fila de espera e 429 recebidos) neste worker."""
+    return {"providers": limiter_stats()}
+
 @router.post("/{provider}/connect")
 async def connect(provider: str, payload: Dict[str, Any], current_user: dict = Depends(get_current_user)):
     """Salvar credenciais do usuário para um provedor (ex.: Trello, Jira)."""
@@ -31,6 +47,7 @@ async def disconnect(provider: str, current_user: dict = Depends(get_current_use
 
     storage = IntegrationStorage(provider=provider)
     await storage.delete(current_user["id"])
+    await metadata_cache.publish_reset(provider, current_user["id"])
     return {"message": f"Credenciais removidas para {provider}"}
 
 @router.get("/{provider}/status")
@@ -49,8 +66,8 @@ async def status(provider: str, current_user: dict = Depends(get_current_user)):
     except Exception:
         raise HTTPException(status_code=400, detail="Credenciais não configuradas")
 
-ATLASSIAN_TOKEN_URL = "https://auth.atlassian.com/oauth/token"
-ATLASSIAN_RESOURCES_URL = "https://api.atlassian.com/oauth/token/accessible-resources"
+ATLASSIAN_TOKEN_URL = f"{settings.ATLASSIAN_AUTH_BASE_URL}/oauth/token"
+ATLASSIAN_RESOURCES_URL = f"{settings.ATLASSIAN_API_BASE_URL}/oauth/token/accessible-resources"
 
 class JiraOAuthExchangePayload(BaseModel):
     code: str
@@ -61,7 +78,40 @@ class JiraSelectPayload(BaseModel):
     site_url: Optional[str] = None
 
 # Seção: Helpers
-def _exchange_code_for_token(code: str, redirect_uri: str) -> Dict[str, Any]:
+# Formatos aceitos pelo endpoint de token, na ordem padrão de tentativa
+TOKEN_EXCHANGE_STYLES = ("json", "form", "basic")
+
+
+def _exchange_style_order() -> List[str]:
+    """Formato configurado em JIRA_TOKEN_EXCHANGE_STYLE primeiro; os demais como fallback."""
+    styles = list(TOKEN_EXCHANGE_STYLES)
+    preferred = settings.JIRA_TOKEN_EXCHANGE_STYLE
+    if preferred in styles:
+        styles.remove(preferred)
+        styles.insert(0, preferred)
+    return styles
+
+
+async def _post_token_request(style: str, payload: Dict[str, Any], client_id: str, client_secret: str) -> requests.Response:
+    if style == "json":
+        return await http.request(
+            "atlassian", "POST", ATLASSIAN_TOKEN_URL, json=payload,
+            headers={"Content-Type": "application/json", "Accept": "application/json"},
+        )
+    form_headers = {"Content-Type": "application/x-www-form-urlencoded", "Accept": "application/json"}
+    if style == "form":
+        return await http.request("atlassian", "POST", ATLASSIAN_TOKEN_URL, data=payload, headers=form_headers)
+    return await http.request(
+        "atlassian", "POST", ATLASSIAN_TOKEN_URL, data=payload, headers=form_headers, auth=(client_id, client_secret)
+    )
+
+
+async def _exchange_code_for_token(code: str, redirect_uri: str) -> Dict[str, Any]:
+    """Trocar o authorization code por tokens.
+
+    Alguns ambientes só aceitam form-url-encoded ou Basic Auth; configurar
+    JIRA_TOKEN_EXCHANGE_STYLE com o formato aceito evita as tentativas que falham.
+    """
     client_id_raw = os.getenv("JIRA_CLIENT_ID") or ""
     client_secret_raw = os.getenv("JIRA_CLIENT_SECRET") or ""
     client_id = client_id_raw.replace("`", "").strip()
@@ -78,75 +128,42 @@ def _exchange_code_for_token(code: str, redirect_uri: str) -> Dict[str, Any]:
     }
     masked_id = (client_id[:4] + "***") if client_id else ""
     logger.info(f"Jira OAuth token exchange start status=initiated redirect_uri={redirect_uri} client_id={masked_id}")
-    resp = requests.post(ATLASSIAN_TOKEN_URL, json=payload, headers={"Content-Type": "application/json", "Accept": "application/json"})
-    if resp.status_code >= 400:
-        # Tentar fallback com application/x-www-form-urlencoded (alguns ambientes exigem esta forma)
-        form_payload = {
-            "grant_type": "authorization_code",
-            "client_id": client_id,
-            "client_secret": client_secret,
-            "code": code,
-            "redirect_uri": redirect_uri,
-        }
-        resp_form = requests.post(
-            ATLASSIAN_TOKEN_URL,
-            data=form_payload,
-            headers={"Content-Type": "application/x-www-form-urlencoded", "Accept": "application/json"},
-        )
-        if resp_form.status_code >= 400:
-            # Tentar fallback com Basic Auth + form-url-encoded
-            resp_basic = requests.post(
-                ATLASSIAN_TOKEN_URL,
-                data=form_payload,
-                headers={"Content-Type": "application/x-www-form-urlencoded", "Accept": "application/json"},
-                auth=(client_id, client_secret),
-            )
-            if resp_basic.status_code >= 400:
-                try:
-                    errb = resp_basic.json() or {}
-                    msgb = errb.get("error_description") or errb.get("error") or resp_basic.text
-                except Exception:
-                    msgb = resp_basic.text
-                logger.error(
-                    f"Jira OAuth token exchange failed status={resp_basic.status_code} message={msgb} redirect_uri={redirect_uri} client_id={masked_id}"
-                )
-                raise HTTPException(
-                    status_code=resp_basic.status_code,
-                    detail=f"{msgb}; verifique JIRA_CLIENT_ID/JIRA_CLIENT_SECRET e JIRA_REDIRECT_URI/JIRA_REDIRECT_URL"
-                )
-            try:
-                err = resp_form.json() or {}
-                msg = err.get("error_description") or err.get("error") or resp_form.text
-            except Exception:
-                msg = resp_form.text
-            logger.error(
-                f"Jira OAuth token exchange failed status={resp_form.status_code} message={msg} redirect_uri={redirect_uri} client_id={masked_id}"
-            )
-            raise HTTPException(
-                status_code=resp_form.status_code,
-                detail=f"{msg}; verifique JIRA_CLIENT_ID/JIRA_CLIENT_SECRET e JIRA_REDIRECT_URI/JIRA_REDIRECT_URL"
-            )
-        data = resp_form.json()
-        if not data.get("access_token"):
-            logger.error("Jira OAuth token exchange missing access_token (form)")
-            raise HTTPException(status_code=400, detail="Não foi possível obter access_token")
-        logger.info("Jira OAuth token exchange success (form)")
-        return data
-    data = resp.json()
-    if not data.get("access_token"):
-        logger.error("Jira OAuth token exchange missing access_token")
-        raise HTTPException(status_code=400, detail="Não foi possível obter access_token")
-    logger.info("Jira OAuth token exchange success")
-    return data
-
-def _get_userinfo(access_token: str) -> Dict[str, Any]:
-    url1 = "https://api.atlassian.com/oauth/userinfo"
-    resp1 = requests.get(url1, headers={"Authorization": f"Bearer {access_token}", "Accept": "application/json"})
+    resp: Optional[requests.Response] = None
+    for style in _exchange_style_order():
+        resp = await _post_token_request(style, payload, client_id, client_secret)
+        if resp.status_code < 400:
+            data = resp.json()
+            if not data.get("access_token"):
+                logger.error(f"Jira OAuth token exchange missing access_token ({style})")
+                raise HTTPException(status_code=400, detail="Não foi possível obter access_token")
+            if style != settings.JIRA_TOKEN_EXCHANGE_STYLE:
+                logger.info(f"Jira OAuth token exchange success ({style}); defina JIRA_TOKEN_EXCHANGE_STYLE={style} para tentar este formato primeiro")
+            else:
+                logger.info(f"Jira OAuth token exchange success ({style})")
+            return data
+
+    try:
+        err = resp.json() or {}
+        msg = err.get("error_description") or err.get("error") or resp.text
+    except Exception:
+        msg = resp.text
+    logger.error(
+        f"Jira OAuth token exchange failed status={resp.status_code} message={msg} redirect_uri={redirect_uri} client_id={masked_id}"
+    )
+    raise HTTPException(
+        status_code=resp.status_code,
+        detail=f"{msg}; verifique JIRA_CLIENT_ID/JIRA_CLIENT_SECRET e JIRA_REDIRECT_URI/JIRA_REDIRECT_URL"
+    )
+
+async def _get_userinfo(access_token: str) -> Dict[str, Any]:
+    headers = {"Authorization": f"Bearer {access_token}", "Accept": "application/json"}
+    url1 = f"{settings.ATLASSIAN_API_BASE_URL}/oauth/userinfo"
+    resp1 = await http.request("atlassian", "GET", url1, headers=headers)
     if resp1.status_code < 400:
         d = resp1.json() or {}
         return d if isinstance(d, dict) else {}
-    url2 = "https://api.atlassian.com/me"
-    resp2 = requests.get(url2, headers={"Authorization": f"Bearer {access_token}", "Accept": "application/json"})
+    url2 = f"{settings.ATLASSIAN_API_BASE_URL}/me"
+    resp2 = await http.request("atlassian", "GET", url2, headers=headers)
     if resp2.status_code >= 400:
         return {}
     data = resp2.json() or {}
@@ -156,8 +173,10 @@ def _get_userinfo(access_token: str) -> Dict[str, Any]:
     email = data.get("email") or data.get("emailAddress")
     return {"sub": acct, "email": email}
 
-def _get_accessible_resources(access_token: str) -> List[Dict[str, Any]]:
-    resp = requests.get(
+async def _get_accessible_resources(access_token: str) -> List[Dict[str, Any]]:
+    resp = await http.request(
+        "atlassian",
+        "GET",
         ATLASSIAN_RESOURCES_URL,
         headers={"Authorization": f"Bearer {access_token}", "Accept": "application/json"},
     )
@@ -197,12 +216,13 @@ async def jira_oauth_exchange(payload: JiraOAuthExchangePayload, current_user: d
     if not code or not redirect_uri:
         raise HTTPException(status_code=400, detail="code e redirect_uri são obrigatórios")
 
-    tokens = _exchange_code_for_token(code, redirect_uri)
+    tokens = await _exchange_code_for_token(code, redirect_uri)
     access_token = tokens.get("access_token")
     refresh_token = tokens.get("refresh_token")
     expires_in = int(tokens.get("expires_in") or 0)
 
-    resources = _get_accessible_resources(access_token)
+    # Sites acessíveis e dados do usuário são independentes: buscar em paralelo
+    resources, info = await asyncio.gather(_get_accessible_resources(access_token), _get_userinfo(access_token))
     selected = _select_jira_resource(resources)
 
     cloud_id = selected.get("id")
@@ -211,7 +231,6 @@ async def jira_oauth_exchange(payload: JiraOAuthExchangePayload, current_user: d
     if not cloud_id:
         raise HTTPException(status_code=400, detail="Não foi possível determinar o cloud_id do Jira")
 
-    info = _get_userinfo(access_token)
     user_email = info.get("email")
     user_account_id = info.get("sub")
     storage = IntegrationStorage(provider="jira")
@@ -230,6 +249,7 @@ async def jira_oauth_exchange(payload: JiraOAuthExchangePayload, current_user: d
             "user_account_id": user_account_id,
         },
     )
+    await metadata_cache.publish_reset("jira", current_user["id"])
     logger.info(f"Jira OAuth connected cloud_id={cloud_id} site_url={site_url} user_account_id={user_account_id}")
     return {"message": "Jira conectado via OAuth", "cloud_id": cloud_id, "scopes": selected_scopes, "site_url": site_url, "user_email": user_email, "user_account_id": user_account_id}
 
@@ -240,7 +260,7 @@ async def jira_oauth_resources(current_user: dict = Depends(get_current_user)):
     creds = await storage.get(current_user["id"])
     if not creds or not creds.get("access_token"):
         raise HTTPException(status_code=400, detail="Jira não conectado")
-    resources = _get_accessible_resources(creds["access_token"])
+    resources = await _get_accessible_resources(creds["access_token"])
     normalized = []
     for r in resources:
         normalized.append({
@@ -258,7 +278,7 @@ async def jira_oauth_select(payload: JiraSelectPayload, current_user: dict = Dep
     creds = await storage.get(current_user["id"])
     if not creds or not creds.get("access_token"):
         raise HTTPException(status_code=400, detail="Jira não conectado")
-    resources = _get_accessible_resources(creds["access_token"])
+    resources = await _get_accessible_resources(creds["access_token"])
     chosen = None
     if payload.cloud_id:
         for r in resources:
@@ -277,27 +297,54 @@ async def jira_oauth_select(payload: JiraSelectPayload, current_user: dict = Dep
     creds["site_url"] = chosen.get("url")
     creds["scopes"] = chosen.get("scopes", [])
     await storage.save(current_user["id"], creds)
+    await metadata_cache.publish_reset("jira", current_user["id"])
     return {"cloud_id": creds["cloud_id"], "site_url": creds["site_url"]}
 
 @router.get("/{provider}/targets")
-async def list_targets(provider: str, current_user: dict = Depends(get_current_user)):
-    """Listar alvos genéricos do provedor (boards/projetos)."""
+async def list_targets(provider: str, q: Optional[str] = None, refresh: bool = False, current_user: dict = Depends(get_current_user)):
+    """Listar alvos genéricos do provedor (boards/projetos), opcionalmente filtrados por ``q``.
+
+    ``?refresh=1`` ignora o cache de metadados e busca novamente no provedor.
+    """
     service = get_integration(provider)
     try:
-        boards = await service.get_boards(current_user["id"])  # type: ignore
+        boards = await service.get_boards(current_user["id"], refresh=refresh)  # type: ignore
+        if q:
+            ql = q.strip().lower()
+            boards = [b for b in boards if ql in str(b.get("name") or "").lower()]
         return {"boards": boards}
     except NotImplementedError:
         try:
-            projects = await service.get_projects(current_user["id"])  # type: ignore
+            projects = await service.get_projects(current_user["id"], query=q, refresh=refresh)  # type: ignore
             return {"projects": projects}
         except NotImplementedError:
             raise HTTPException(status_code=400, detail="Provider não possui targets padronizados")
 
+@router.get("/trello/boards/context")
+async def trello_boards_context(ids: str, refresh: bool = False, current_user: dict = Depends(get_current_user)):
+    """Board, listas e membros de vários boards (ids separados por vírgula) via /1/batch."""
+    service = get_integration("trello")
+    board_ids = [b for b in ids.split(",") if b.strip()]
+    if not board_ids:
+        raise HTTPException(status_code=400, detail="Informe ao menos um board id")
+    context = await service.get_board_context(current_user["id"], board_ids, refresh=refresh)  # type: ignore
+    return {"boards": context}
+
+@router.get("/trello/boards/{board_id}/context")
+async def trello_board_context(board_id: str, refresh: bool = False, current_user: dict = Depends(get_current_user)):
+    """Board, listas e membros de um board em uma única chamada ao Trello."""
+    service = get_integration("trello")
+    context = await service.get_board_context(current_user["id"], [board_id], refresh=refresh)  # type: ignore
+    entry = context.get(board_id) or {}
+    if entry.get("board") is None and entry.get("errors"):
+        raise HTTPException(status_code=404, detail="Board não encontrado ou sem acesso")
+    return entry
+
 @router.get("/trello/boards/{board_id}/lists")
-async def trello_lists(board_id: str, current_user: dict = Depends(get_current_user)):
+async def trello_lists(board_id: str, refresh: bool = False, current_user: dict = Depends(get_current_user)):
     """Listar listas do Trello para um board (endpoint de conveniência)."""
     service = get_integration("trello")
-    lists = await service.get_lists(current_user["id"], board_id)  # type: ignore
+    lists = await service.get_lists(current_user["id"], board_id, refresh=refresh)  # type: ignore
     return {"lists": lists}
 
 @router.get("/trello/lists/{list_id}/board")
@@ -308,64 +355,157 @@ async def trello_list_board(list_id: str, current_user: dict = Depends(get_curre
     return {"board_id": board_id}
 
 @router.get("/trello/boards/{board_id}/members")
-async def trello_members(board_id: str, current_user: dict = Depends(get_current_user)):
+async def trello_members(board_id: str, refresh: bool = False, current_user: dict = Depends(get_current_user)):
     """Listar membros do Trello associados a um board."""
     service = get_integration("trello")
-    members = await service.get_members(current_user["id"], board_id)  # type: ignore
+    members = await service.get_members(current_user["id"], board_id, refresh=refresh)  # type: ignore
     return {"members": members}
 
 
 @router.get("/jira/projects/{project_key}/users")
-async def jira_assignable_users(project_key: str, current_user: dict = Depends(get_current_user)):
+async def jira_assignable_users(project_key: str, refresh: bool = False, current_user: dict = Depends(get_current_user)):
     """Listar usuários atribuíveis em um projeto do Jira."""
     service = get_integration("jira")
-    users = await service.get_assignable_users(current_user["id"], project_key)  # type: ignore
+    users = await service.get_assignable_users(current_user["id"], project_key, refresh=refresh)  # type: ignore
     return {"users": users}
 
 @router.get("/jira/projects/{project_key}/roles")
-async def jira_project_roles(project_key: str, current_user: dict = Depends(get_current_user)):
+async def jira_project_roles(project_key: str, refresh: bool = False, current_user: dict = Depends(get_current_user)):
     """Listar roles de um projeto Jira (id e nome)."""
     service = get_integration("jira")
-    roles = await service.get_project_roles(current_user["id"], project_key)  # type: ignore
+    roles = await service.get_project_roles(current_user["id"], project_key, refresh=refresh)  # type: ignore
     return {"roles": roles}
 
 @router.get("/jira/projects/{project_key}/roles/{role_id}/actors")
-async def jira_project_role_actors(project_key: str, role_id: str, current_user: dict = Depends(get_current_user)):
+async def jira_project_role_actors(project_key: str, role_id: str, refresh: bool = False, current_user: dict = Depends(get_current_user)):
     """Listar usuários (actors do tipo user) de um role do projeto Jira."""
     service = get_integration("jira")
-    users = await service.get_project_role_actors(current_user["id"], project_key, role_id)  # type: ignore
+    users = await service.get_project_role_actors(current_user["id"], project_key, role_id, refresh=refresh)  # type: ignore
     return {"users": users}
 
 @router.post("/{provider}/tasks")
-async def create_task(provider: str, payload: Dict[str, Any], current_user: dict = Depends(get_current_user)):
+async def create_task(
+    provider: str,
+    payload: Dict[str, Any],
+    response: Response,
+    idempotency_key: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user),
+):
     """Criar uma tarefa/card no container alvo do provedor.
 
     Payload esperado: {"target_id": "...", "task": { title, description?, priority?, assignee?, due_date? }}
+    Com o header ``Idempotency-Key``, repetições devolvem a resposta já registrada.
+    """
+    service = get_integration(provider)
+
+    async def perform() -> Dict[str, Any]:
+        target_id = payload.get("target_id")
+        task = payload.get("task")
+        if not target_id or not isinstance(task, dict):
+            raise HTTPException(status_code=400, detail="Payload inválido: target_id e task são obrigatórios")
+        # Trello: target_id DEVE ser id da lista (idList); ids já vistos como board são recusados sem ir ao Trello
+        if provider == "trello":
+            await service.ensure_list_target(current_user["id"], target_id)  # type: ignore
+        result = await service.create_task(current_user["id"], target_id, task)
+        return {"result": result}
+
+    return await _run_idempotent(current_user["id"], f"{provider}:tasks", idempotency_key, payload, perform, response)
+
+
+@router.post("/{provider}/tasks/bulk")
+async def create_tasks_bulk(
+    provider: str,
+    payload: Dict[str, Any],
+    response: Response,
+    idempotency_key: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user),
+):
+    """Criar várias tarefas/cards no mesmo alvo em uma única requisição.
+
+    Payload esperado: {"target_id": "...", "tasks": [{ id?, title, description?, priority?, assignee?, due_date? }]}
+    Resposta: {"results": [{ task_id, ok, result?, status?, error? }]} na ordem das tarefas enviadas.
+    Aceita ``Idempotency-Key`` como o envio unitário.
+    """
+    service = get_integration(provider)
+
+    async def perform() -> Dict[str, Any]:
+        target_id = payload.get("target_id")
+        tasks = payload.get("tasks")
+        if not target_id or not isinstance(tasks, list) or not all(isinstance(t, dict) for t in tasks):
+            raise HTTPException(status_code=400, detail="Payload inválido: target_id e tasks são obrigatórios")
+        if provider == "trello":
+            await service.ensure_list_target(current_user["id"], target_id)  # type: ignore
+        results = await service.create_tasks_bulk(current_user["id"], target_id, tasks)
+        return {"results": results}
+
+    return await _run_idempotent(current_user["id"], f"{provider}:tasks/bulk", idempotency_key, payload, perform, response)
+
+
+async def _run_idempotent(
+    user_id: int,
+    scope: str,
+    idempotency_key: Optional[str],
+    payload: Dict[str, Any],
+    perform: Any,
+    response: Response,
+) -> Dict[str, Any]:
+    if not idempotency_key:
+        return await perform()
+    body, replayed = await idempotency_service.run(user_id, scope, idempotency_key, payload, perform)
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return body
+
+@router.post("/{provider}/webhooks")
+async def register_webhooks(provider: str, payload: Optional[Dict[str, Any]] = None, current_user: dict = Depends(get_current_user)):
+    """Registrar webhooks do provedor para manter o cache de metadados atualizado.
+
+    Trello aceita {"board_ids": [...]} (padrão: todos os boards do usuário).
     """
     service = get_integration(provider)
-    target_id = payload.get("target_id")
-    task = payload.get("task")
-    if not target_id or not isinstance(task, dict):
-        raise HTTPException(status_code=400, detail="Payload inválido: target_id e task são obrigatórios")
-    # Validação específica Trello: target_id DEVE ser id da lista (idList)
     if provider == "trello":
-        try:
-            creds = await service.get_user_credentials(current_user["id"])  # type: ignore
-        except Exception:
-            creds = {}
-        trello_key = creds.get("trello_api_key") or creds.get("api_key") or os.getenv("TRELLO_KEY")
-        trello_token = creds.get("trello_token") or creds.get("token") or os.getenv("TRELLO_TOKEN")
-        params = {"key": (trello_key or "").strip(), "token": (trello_token or "").strip()}
-        if not params["key"] or not params["token"]:
-            raise HTTPException(status_code=400, detail="Credenciais do Trello ausentes (key/token)")
-        # Checar se é lista válida
-        lr = requests.get(f"https://api.trello.com/1/lists/{target_id}", params={**params, "fields": "idBoard"})
-        if lr.status_code >= 400:
-            # Talvez seja um board_id; informar que precisa de list_id
-            br = requests.get(f"https://api.trello.com/1/boards/{target_id}", params=params)
-            if br.status_code < 400:
-                raise HTTPException(status_code=400, detail="target_id inválido: informe o ID da lista (idList), não do board")
-        # Se passar, segue com criação
-    result = await service.create_task(current_user["id"], target_id, task)
-    return {"result": result}
+        board_ids = (payload or {}).get("board_ids")
+        results = await service.register_webhooks(current_user["id"], board_ids)  # type: ignore
+        return {"results": results}
+    if provider == "jira":
+        return await service.register_webhooks(current_user["id"])  # type: ignore
+    raise HTTPException(status_code=400, detail="Provider não suporta webhooks")
+
+@router.head("/{provider}/webhooks/{token}")
+async def webhook_probe(provider: str, token: str):
+    """O Trello valida a URL de callback com um HEAD antes de criar o webhook."""
+    if webhooks.parse_webhook_token(provider, token) is None:
+        raise HTTPException(status_code=404, detail="Webhook desconhecido")
+    return Response(status_code=200)
+
+@router.post("/{provider}/webhooks/{token}")
+async def receive_webhook(provider: str, token: str, request: Request):
+    """Receber notificações do provedor e invalidar/corrigir o cache de metadados da conta."""
+    user_id = webhooks.parse_webhook_token(provider, token)
+    if user_id is None:
+        raise HTTPException(status_code=404, detail="Webhook desconhecido")
+    body = await request.body()
+    if provider == "trello":
+        signature_ok = webhooks.verify_trello_signature(
+            body, webhooks.callback_url(provider, user_id), request.headers.get("X-Trello-Webhook")
+        )
+    elif provider == "jira":
+        signature_ok = webhooks.verify_jira_signature(body, request.headers.get("X-Hub-Signature"))
+    else:
+        raise HTTPException(status_code=400, detail="Provider não suporta webhooks")
+    if not signature_ok:
+        raise HTTPException(status_code=401, detail="Assinatura do webhook inválida")
 
+    service = get_integration(provider)
+    if not await IntegrationStorage(provider=provider).get(user_id):
+        # 410 faz o Trello remover o webhook de uma conta desconectada
+        raise HTTPException(status_code=410, detail="Integração desconectada")
+    try:
+        payload = await request.json()
+    except Exception:
+        raise HTTPException(status_code=400, detail="Payload inválido")
+    payload = payload if isinstance(payload, dict) else {}
+    counts = service.handle_webhook(user_id, payload)  # type: ignore
+    # Os demais workers reaplicam o mesmo webhook ao próprio cache
+    await metadata_cache.publish_webhook(provider, user_id, payload)
+    return {"ok": True, **counts}
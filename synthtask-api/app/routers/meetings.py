@@ -1,24 +1,35 @@
 """
 Rotas de gestão de reuniões e tarefas da Sintask API
 """
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
+import asyncio
+import json
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, BackgroundTasks, Query, Header
+from fastapi.responses import StreamingResponse
 from bson import ObjectId
-from typing import List
-from datetime import datetime, timezone
-from zoneinfo import ZoneInfo
-from ..core.config import settings
+from pymongo.errors import ExecutionTimeout
+from typing import List, Optional
 
 from ..models import (
     MeetingText, ProcessedMeeting, Task, TaskUpdate,
-    MessageResponse
+    MessageResponse, SendMeetingRequest, SendJob, TaskSearchResponse,
+    TaskBatchRequest, TaskBatchResponse, MeetingBatchRequest, MeetingBatchResponse
 )
 from ..core.auth import get_current_user
+from ..core.serialization import (
+    FastJSONResponse, format_datetime, meeting_payload,
+    collection_etag, resource_etag, etag_matches, etag_headers, not_modified
+)
+from ..core.database import database, projects_table
 from ..core.utils import (
-    get_user_meeting, get_user_meetings, save_processed_meeting,
-    format_meeting_response, update_meeting_tasks, mark_meeting_sent,
-    validate_object_id, delete_user_meeting
+    DEFAULT_PAGE_SIZE, get_user_meeting, get_user_meeting_summaries, get_user_meeting_version, get_user_meeting_transcript, save_processed_meeting,
+    format_meeting_response, update_meeting_task, push_meeting_task, pull_meeting_task,
+    user_meeting_exists, mark_meeting_sent, apply_meeting_task_operations,
+    delete_user_meetings, mark_user_meetings_sent,
+    validate_object_id, delete_user_meeting, format_send_job_response
 )
 from ..services.ai_service import ai_service 
+from ..services.search_service import search_service
+from ..services.send_service import send_service, TERMINAL_STATUSES
 
 router = APIRouter(prefix="/api/meetings", tags=["Meetings"])
 
@@ -42,16 +53,13 @@ async def process_meeting(
             task["id"] = str(ObjectId())
         
         # Save to MongoDB
-        meeting_id = await save_processed_meeting(
+        saved_meeting = await save_processed_meeting(
             current_user["id"],
             meeting.text,
             processed_data
         )
         
-        # Get saved meeting
-        saved_meeting = await get_user_meeting(meeting_id, current_user["id"])
-        
-        return format_meeting_response(saved_meeting, meeting_id)
+        return format_meeting_response(saved_meeting)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -140,17 +148,14 @@ async def process_meeting_file(
             task["id"] = str(ObjectId())
         
         # Save to MongoDB
-        meeting_id = await save_processed_meeting(
+        saved_meeting = await save_processed_meeting(
             current_user["id"],
             text,
             processed_data,
             file_name
         )
         
-        # Get saved meeting
-        saved_meeting = await get_user_meeting(meeting_id, current_user["id"])
-        
-        return format_meeting_response(saved_meeting, meeting_id)
+        return format_meeting_response(saved_meeting)
         
     except UnicodeDecodeError:
         raise HTTPException(status_code=400, detail="Arquivo não é texto válido (UTF-8)")
@@ -158,41 +163,122 @@ async def process_meeting_file(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("", response_model=List[dict])
-async def get_meetings(current_user: dict = Depends(get_current_user)):
-    """Listar todas as reuniões do usuário atual"""
-    meetings = await get_user_meetings(current_user["id"])
-    result = []
-    tz = ZoneInfo(settings.TIMEZONE)
-    for meeting in meetings:
-        dt = meeting.get("created_at")
-        if isinstance(dt, datetime) and dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        dt_local = dt.astimezone(tz) if isinstance(dt, datetime) else dt
-        created_iso = dt_local.isoformat() if isinstance(dt_local, datetime) else str(dt_local)
-        result.append({
+@router.get("", response_model=List[dict], response_class=FastJSONResponse)
+async def get_meetings(
+    limit: Optional[int] = Query(None, ge=1, le=200),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user)
+):
+    """Listar as reuniões do usuário atual, mais novas primeiro.
+
+    A listagem é paginada (DEFAULT_PAGE_SIZE reuniões sem ``limit``): quando há
+    mais reuniões, o header ``X-Next-Cursor`` traz o valor a enviar em ``?cursor=``
+    para obter a próxima página. A resposta traz ``ETag``; com ``If-None-Match``
+    igual a resposta é 304.
+    """
+    try:
+        meetings, next_cursor = await get_user_meeting_summaries(current_user["id"], limit or DEFAULT_PAGE_SIZE, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    etag = collection_etag("meetings", [(str(m["_id"]), m.get("version", 0)) for m in meetings] + [next_cursor])
+    cursor_header = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, cursor_header)
+    result = [
+        {
             "id": str(meeting["_id"]),
             "file_name": meeting.get("file_name"),
-            "created_at": created_iso,
-            "tasks_count": len(meeting.get("tasks", [])),
-            "sent": meeting.get("sent", meeting.get("sent_to_trello", False)),
-        })
-    return result
+            "created_at": format_datetime(meeting.get("created_at")),
+            "tasks_count": meeting.get("tasks_count", 0),
+            "sent": meeting.get("sent", False),
+        }
+        for meeting in meetings
+    ]
+    return FastJSONResponse(result, headers=etag_headers(etag, cursor_header))
+
+
+@router.post("/batch", response_model=MeetingBatchResponse)
+async def batch_meetings(payload: MeetingBatchRequest, current_user: dict = Depends(get_current_user)):
+    """Apagar ou marcar como enviadas várias reuniões do usuário de uma vez."""
+    meeting_ids = list(dict.fromkeys(payload.meeting_ids))
+    oids = [ObjectId(mid) for mid in meeting_ids if validate_object_id(mid)]
+    if payload.action == "delete":
+        done = await delete_user_meetings(oids, current_user["id"])
+    else:
+        done = await mark_user_meetings_sent(oids, current_user["id"])
+
+    results = []
+    for mid in meeting_ids:
+        if not validate_object_id(mid):
+            status = "invalid"
+        else:
+            status = "ok" if ObjectId(mid) in done else "not_found"
+        results.append({"meeting_id": mid, "status": status})
+    return {"action": payload.action, "results": results}
+
+
+@router.get("/search", response_model=TaskSearchResponse)
+async def search_tasks(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=50),
+    offset: int = Query(0, ge=0),
+    current_user: dict = Depends(get_current_user)
+):
+    """Buscar tarefas por título, descrição, responsável ou nome do arquivo da reunião.
 
+    Os resultados vêm ranqueados por relevância; ``next_offset`` indica o ``offset``
+    da próxima página (ou null quando não há mais resultados).
+    """
+    try:
+        hits, next_offset = await search_service.search_tasks(current_user["id"], q, limit, offset)
+    except ExecutionTimeout:
+        raise HTTPException(status_code=504, detail="Busca excedeu o tempo limite")
+    return {
+        "query": q,
+        "hits": [{**hit, "task": Task(**hit["task"])} for hit in hits],
+        "next_offset": next_offset,
+    }
 
-@router.get("/{meeting_id}", response_model=ProcessedMeeting)
-async def get_meeting(meeting_id: str, current_user: dict = Depends(get_current_user)):
+
+@router.get("/{meeting_id}", response_model=ProcessedMeeting, response_class=FastJSONResponse)
+async def get_meeting(
+    meeting_id: str,
+    if_none_match: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user)
+):
     """Get detailed meeting information"""
     
     if not validate_object_id(meeting_id):
         raise HTTPException(status_code=400, detail="ID de reunião inválido")
     
+    if if_none_match:
+        # Revalidação: basta a versão, sem carregar as tarefas
+        version = await get_user_meeting_version(meeting_id, current_user["id"])
+        if version is None:
+            raise HTTPException(status_code=404, detail="Reunião não encontrada")
+        etag = resource_etag("meeting", meeting_id, version)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+    
     meeting = await get_user_meeting(meeting_id, current_user["id"])
     
     if not meeting:
         raise HTTPException(status_code=404, detail="Reunião não encontrada")
     
-    return format_meeting_response(meeting, meeting_id)
+    etag = resource_etag("meeting", meeting_id, meeting.get("version", 0))
+    return FastJSONResponse(meeting_payload(meeting, meeting_id), headers=etag_headers(etag))
+
+
+@router.get("/{meeting_id}/transcript")
+async def get_meeting_transcript(meeting_id: str, current_user: dict = Depends(get_current_user)):
+    """Texto original da reunião (carregado sob demanda, fora do detalhe da reunião)."""
+    if not validate_object_id(meeting_id):
+        raise HTTPException(status_code=400, detail="ID de reunião inválido")
+    text = await get_user_meeting_transcript(meeting_id, current_user["id"])
+    if text is None:
+        raise HTTPException(status_code=404, detail="Reunião não encontrada")
+    return {"id": meeting_id, "text": text}
 
 
 @router.put("/{meeting_id}/tasks/{task_id}", response_model=MessageResponse)
@@ -207,31 +293,21 @@ async def update_task(
     if not validate_object_id(meeting_id):
         raise HTTPException(status_code=400, detail="ID de reunião inválido")
     
-    meeting = await get_user_meeting(meeting_id, current_user["id"])
-    
-    if not meeting:
-        raise HTTPException(status_code=404, detail="Reunião não encontrada")
-    
-    # Update the task
-    tasks = meeting["tasks"]
-    task_found = False
-    
-    for i, task in enumerate(tasks):
-        if task.get("id") == task_id:
-            tasks[i] = {
-                "id": task_id,
-                "title": task_update.title,
-                "description": task_update.description,
-                "assignee": task_update.assignee,
-                "due_date": task_update.due_date
-            }
-            task_found = True
-            break
-    
-    if not task_found:
-        raise HTTPException(status_code=404, detail="Task não encontrada")
+    # Atualização atômica só dos campos editáveis (preserva external_id etc.)
+    updated = await update_meeting_task(
+        meeting_id,
+        current_user["id"],
+        task_id,
+        {
+            "title": task_update.title,
+            "description": task_update.description,
+            "assignee": task_update.assignee,
+            "due_date": task_update.due_date,
+        },
+    )
     
-    await update_meeting_tasks(meeting_id, tasks)
+    if not updated:
+        await raise_task_not_found(meeting_id, current_user["id"])
     
     return MessageResponse(message="Task atualizada com sucesso")
 
@@ -246,11 +322,6 @@ async def create_task(
     if not validate_object_id(meeting_id):
         raise HTTPException(status_code=400, detail="ID de reunião inválido")
 
-    meeting = await get_user_meeting(meeting_id, current_user["id"])
-
-    if not meeting:
-        raise HTTPException(status_code=404, detail="Reunião não encontrada")
-
     new_task = {
         "id": str(ObjectId()),
         "title": task_data.title,
@@ -259,8 +330,8 @@ async def create_task(
         "due_date": task_data.due_date,
     }
 
-    tasks = meeting["tasks"] + [new_task]
-    await update_meeting_tasks(meeting_id, tasks)
+    if not await push_meeting_task(meeting_id, current_user["id"], new_task):
+        raise HTTPException(status_code=404, detail="Reunião não encontrada")
 
     return Task(**new_task)
 
@@ -276,19 +347,48 @@ async def delete_task(
     if not validate_object_id(meeting_id):
         raise HTTPException(status_code=400, detail="ID de reunião inválido")
     
-    meeting = await get_user_meeting(meeting_id, current_user["id"])
-    
-    if not meeting:
-        raise HTTPException(status_code=404, detail="Reunião não encontrada")
-    
-    # Remove the task
-    tasks = [t for t in meeting["tasks"] if t.get("id") != task_id]
-    
-    await update_meeting_tasks(meeting_id, tasks)
+    if not await pull_meeting_task(meeting_id, current_user["id"], task_id):
+        await raise_task_not_found(meeting_id, current_user["id"])
     
     return MessageResponse(message="Task deletada com sucesso")
 
 
+@router.post("/{meeting_id}/tasks/batch", response_model=TaskBatchResponse)
+async def batch_tasks(
+    meeting_id: str,
+    payload: TaskBatchRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """Criar, editar e apagar várias tarefas da reunião em uma só requisição.
+
+    As operações são aplicadas na ordem enviada e cada uma recebe seu resultado
+    em ``results`` (``ok``, ``not_found``, ``invalid``, ``error`` ou ``skipped``).
+    Só ``error`` e ``skipped`` devem ser reenviadas; as ``ok`` já foram gravadas.
+    """
+    if not validate_object_id(meeting_id):
+        raise HTTPException(status_code=400, detail="ID de reunião inválido")
+
+    operations = [
+        {
+            "op": item.op,
+            "task_id": item.task_id,
+            "task": item.task.model_dump() if item.task else None,
+        }
+        for item in payload.operations
+    ]
+    results = await apply_meeting_task_operations(meeting_id, current_user["id"], operations)
+    if results is None:
+        raise HTTPException(status_code=404, detail="Reunião não encontrada")
+    return {"results": results}
+
+
+async def raise_task_not_found(meeting_id: str, user_id: int) -> None:
+    """Distinguir reunião inexistente de tarefa inexistente (só no caminho de erro)."""
+    if not await user_meeting_exists(meeting_id, user_id):
+        raise HTTPException(status_code=404, detail="Reunião não encontrada")
+    raise HTTPException(status_code=404, detail="Task não encontrada")
+
+
 @router.delete("/{meeting_id}", response_model=MessageResponse)
 async def delete_meeting(meeting_id: str, current_user: dict = Depends(get_current_user)):
     """Apagar uma transcrição/reunião do usuário atual"""
@@ -312,3 +412,69 @@ async def mark_sent(meeting_id: str, current_user: dict = Depends(get_current_us
         raise HTTPException(status_code=404, detail="Reunião não encontrada")
     await mark_meeting_sent(meeting_id)
     return MessageResponse(message="Reunião marcada como enviada")
+
+
+@router.post("/{meeting_id}/send", response_model=SendJob, status_code=202)
+async def send_meeting(
+    meeting_id: str,
+    payload: SendMeetingRequest,
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(get_current_user)
+):
+    """Enviar as tarefas da reunião para o projeto em segundo plano.
+
+    Tarefas que já possuem external_id são ignoradas, então chamar novamente
+    retoma um envio interrompido. Se já houver um job ativo para o mesmo projeto,
+    ele é retornado; se o job ativo for para outro projeto, a resposta é 409.
+    """
+    if not validate_object_id(meeting_id):
+        raise HTTPException(status_code=400, detail="ID de reunião inválido")
+    meeting = await get_user_meeting(meeting_id, current_user["id"])
+    if not meeting:
+        raise HTTPException(status_code=404, detail="Reunião não encontrada")
+    project = await database.fetch_one(projects_table.select().where(
+        (projects_table.c.id == payload.project_id) & (projects_table.c.user_id == current_user["id"])
+    ))
+    if not project:
+        raise HTTPException(status_code=404, detail="Projeto não encontrado")
+
+    job = await send_service.start_job(current_user["id"], meeting_id, dict(project))
+    if job["status"] == "pending":
+        background_tasks.add_task(send_service.run_job, job["_id"])
+    return format_send_job_response(job)
+
+
+@router.get("/{meeting_id}/send/{job_id}", response_model=SendJob)
+async def get_send_job(meeting_id: str, job_id: str, current_user: dict = Depends(get_current_user)):
+    """Consultar o progresso de um job de envio."""
+    if not validate_object_id(job_id):
+        raise HTTPException(status_code=400, detail="ID de job inválido")
+    job = await send_service.get_job(job_id, current_user["id"])
+    if not job or job["meeting_id"] != meeting_id:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return format_send_job_response(job)
+
+
+@router.get("/{meeting_id}/send/{job_id}/events")
+async def stream_send_job(meeting_id: str, job_id: str, current_user: dict = Depends(get_current_user)):
+    """Transmitir o progresso do job via Server-Sent Events até ele terminar."""
+    if not validate_object_id(job_id):
+        raise HTTPException(status_code=400, detail="ID de job inválido")
+    job = await send_service.get_job(job_id, current_user["id"])
+    if not job or job["meeting_id"] != meeting_id:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+
+    async def events():
+        last = None
+        current = job
+        while True:
+            body = format_send_job_response(current).model_dump()
+            if body != last:
+                yield f"data: {json.dumps(body)}\n\n"
+                last = body
+            if current["status"] in TERMINAL_STATUSES:
+                break
+            await asyncio.sleep(1)
+            current = await send_service.get_job(job_id, current_user["id"]) or current
+
+    return StreamingResponse(events(), media_type="text/event-stream")
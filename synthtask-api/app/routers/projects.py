@@ -1,35 +1,56 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from sqlalchemy import and_, or_, select
 from typing import Optional
-from datetime import datetime, timezone
-from zoneinfo import ZoneInfo
 
 from ..core.auth import get_current_user
 from ..core.database import database, projects_table
-from ..core.config import settings
+from ..core.serialization import (
+    FastJSONResponse, project_payload, collection_etag, resource_etag, etag_matches, etag_headers, not_modified
+)
+from ..core.utils import DEFAULT_PAGE_SIZE, decode_cursor, encode_cursor
 
 router = APIRouter(prefix="/api/projects", tags=["Projects"])
 
-@router.get("")
-async def list_projects(current_user: dict = Depends(get_current_user)):
-    query = projects_table.select().where(projects_table.c.user_id == current_user["id"]).order_by(projects_table.c.created_at.desc())
+@router.get("", response_class=FastJSONResponse)
+async def list_projects(
+    limit: Optional[int] = Query(None, ge=1, le=200),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user),
+):
+    """Listar projetos do usuário, mais novos primeiro, paginados por (created_at, id).
+
+    Sem ``limit`` a página tem DEFAULT_PAGE_SIZE projetos. Quando há mais projetos,
+    o header ``X-Next-Cursor`` traz o cursor da próxima página. A resposta traz ``ETag``; com ``If-None-Match`` igual a resposta é 304.
+    """
+    if limit is None:
+        limit = DEFAULT_PAGE_SIZE
+    condition = projects_table.c.user_id == current_user["id"]
+    if cursor:
+        try:
+            created_at, last_id = decode_cursor(cursor)
+            last_id = int(last_id)
+        except (ValueError, TypeError) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        condition = condition & or_(
+            projects_table.c.created_at < created_at,
+            and_(projects_table.c.created_at == created_at, projects_table.c.id < last_id),
+        )
+    query = (
+        projects_table.select()
+        .where(condition)
+        .order_by(projects_table.c.created_at.desc(), projects_table.c.id.desc())
+        .limit(limit + 1)
+    )
     rows = await database.fetch_all(query)
-    result = []
-    tz = ZoneInfo(settings.TIMEZONE)
-    for r in rows:
-        dt = r["created_at"]
-        if isinstance(dt, datetime) and dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        dt_local = dt.astimezone(tz) if isinstance(dt, datetime) else dt
-        created_iso = dt_local.isoformat() if isinstance(dt_local, datetime) else str(dt_local)
-        result.append({
-            "id": r["id"],
-            "name": r["name"],
-            "provider": r["provider"],
-            "target_id": r["target_id"],
-            "target_name": r["target_name"],
-            "created_at": created_iso,
-        })
-    return result
+    cursor_header = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        cursor_header = {"X-Next-Cursor": encode_cursor(rows[-1]["created_at"], rows[-1]["id"])}
+    etag = collection_etag("projects", [(r["id"], r["version"]) for r in rows] + [cursor_header])
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, cursor_header)
+    return FastJSONResponse([project_payload(r) for r in rows], headers=etag_headers(etag, cursor_header))
 
 @router.post("")
 async def create_project(
@@ -67,43 +88,28 @@ async def create_project(
     # Buscar registro recém-criado para montar resposta
     query = projects_table.select().where(projects_table.c.id == project_id)
     r = await database.fetch_one(query)
-    tz = ZoneInfo(settings.TIMEZONE)
-    dt = r["created_at"]
-    if isinstance(dt, datetime) and dt.tzinfo is None:
-        dt = dt.replace(tzinfo=timezone.utc)
-    dt_local = dt.astimezone(tz) if isinstance(dt, datetime) else dt
-    created_iso = dt_local.isoformat() if isinstance(dt_local, datetime) else str(dt_local)
-    return {
-        "id": r["id"],
-        "name": r["name"],
-        "provider": r["provider"],
-        "target_id": r["target_id"],
-        "target_name": r["target_name"],
-        "created_at": created_iso,
-    }
-
-@router.get("/{project_id}")
-async def get_project(project_id: int, current_user: dict = Depends(get_current_user)):
-    query = projects_table.select().where(
-        (projects_table.c.id == project_id) & (projects_table.c.user_id == current_user["id"]) 
-    )
-    r = await database.fetch_one(query)
+    return project_payload(r)
+
+@router.get("/{project_id}", response_class=FastJSONResponse)
+async def get_project(
+    project_id: int,
+    if_none_match: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user),
+):
+    owner = (projects_table.c.id == project_id) & (projects_table.c.user_id == current_user["id"])
+    if if_none_match:
+        # Revalidação: basta a versão
+        version = await database.fetch_val(select(projects_table.c.version).where(owner))
+        if version is None:
+            raise HTTPException(status_code=404, detail="Projeto não encontrado")
+        etag = resource_etag("project", project_id, version)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+    r = await database.fetch_one(projects_table.select().where(owner))
     if not r:
         raise HTTPException(status_code=404, detail="Projeto não encontrado")
-    tz = ZoneInfo(settings.TIMEZONE)
-    dt = r["created_at"]
-    if isinstance(dt, datetime) and dt.tzinfo is None:
-        dt = dt.replace(tzinfo=timezone.utc)
-    dt_local = dt.astimezone(tz) if isinstance(dt, datetime) else dt
-    created_iso = dt_local.isoformat() if isinstance(dt_local, datetime) else str(dt_local)
-    return {
-        "id": r["id"],
-        "name": r["name"],
-        "provider": r["provider"],
-        "target_id": r["target_id"],
-        "target_name": r["target_name"],
-        "created_at": created_iso,
-    }
+    etag = resource_etag("project", project_id, r["version"])
+    return FastJSONResponse(project_payload(r), headers=etag_headers(etag))
 
 @router.put("/{project_id}")
 async def update_project(project_id: int, payload: dict, current_user: dict = Depends(get_current_user)):
@@ -146,24 +152,13 @@ async def update_project(project_id: int, payload: dict, current_user: dict = De
             raise HTTPException(status_code=409, detail="Destino já utilizado em outro projeto")
 
     await database.execute(
-        projects_table.update().where(projects_table.c.id == project_id).values(**values)
+        projects_table.update()
+        .where(projects_table.c.id == project_id)
+        .values(**values, version=projects_table.c.version + 1)
     )
 
     r = await database.fetch_one(q)
-    tz = ZoneInfo(settings.TIMEZONE)
-    dt = r["created_at"]
-    if isinstance(dt, datetime) and dt.tzinfo is None:
-        dt = dt.replace(tzinfo=timezone.utc)
-    dt_local = dt.astimezone(tz) if isinstance(dt, datetime) else dt
-    created_iso = dt_local.isoformat() if isinstance(dt_local, datetime) else str(dt_local)
-    return {
-        "id": r["id"],
-        "name": r["name"],
-        "provider": r["provider"],
-        "target_id": r["target_id"],
-        "target_name": r["target_name"],
-        "created_at": created_iso,
-    }
+    return project_payload(r)
 
 @router.delete("/{project_id}")
 async def delete_project(project_id: int, current_user: dict = Depends(get_current_user)):
@@ -0,0 +1,161 @@
+"""
+Chaves de idempotência (header ``Idempotency-Key``) para criação de tarefas nos provedores.
+
+A primeira requisição com uma chave reserva o registro em ``idempotency_keys`` e
+executa a operação; a resposta fica guardada pela janela de retenção e repetições
+com a mesma chave recebem a resposta salva sem chamar o Trello/Jira. Repetições
+concorrentes aguardam a requisição em andamento (no mesmo worker via future, entre
+workers consultando o registro). Erros 5xx e falhas inesperadas liberam a chave
+para que o cliente possa tentar de novo.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from fastapi import HTTPException
+from pymongo.errors import DuplicateKeyError
+
+from ..core.config import settings
+from ..core.database import idempotency_collection
+
+logger = logging.getLogger("idempotency")
+
+MAX_KEY_LENGTH = 255
+# Reserva sem conclusão por mais que isso é considerada abandonada (worker caiu)
+LOCK_TIMEOUT = timedelta(minutes=5)
+POLL_INTERVAL = 0.25
+PAYLOAD_MISMATCH = "Idempotency-Key já usada com outro payload"
+
+
+def request_fingerprint(payload: Any) -> str:
+    raw = json.dumps(payload, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class IdempotencyService:
+    def __init__(self):
+        # record_id -> (fingerprint do payload, future com (status, corpo))
+        self._inflight: Dict[str, Tuple[str, "asyncio.Future[Tuple[int, Any]]"]] = {}
+
+    async def run(
+        self,
+        user_id: int,
+        scope: str,
+        key: str,
+        payload: Any,
+        handler: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> Tuple[Dict[str, Any], bool]:
+        """Executar ``handler`` uma única vez por chave. Retorna (corpo, é_replay)."""
+        key = key.strip()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(status_code=400, detail=f"Idempotency-Key inválida (1 a {MAX_KEY_LENGTH} caracteres)")
+        record_id = f"{user_id}:{scope}:{key}"
+        fingerprint = request_fingerprint(payload)
+
+        while True:
+            inflight = self._inflight.get(record_id)
+            if inflight is not None:
+                inflight_fingerprint, future = inflight
+                if inflight_fingerprint != fingerprint:
+                    raise HTTPException(status_code=422, detail=PAYLOAD_MISMATCH)
+                status_code, body = await asyncio.shield(future)
+                return self._replay(status_code, body), True
+
+            now = datetime.now(timezone.utc)
+            try:
+                await idempotency_collection.insert_one({
+                    "_id": record_id,
+                    "user_id": user_id,
+                    "scope": scope,
+                    "fingerprint": fingerprint,
+                    "status": "in_progress",
+                    "locked_until": now + LOCK_TIMEOUT,
+                    "created_at": now,
+                    "expires_at": now + timedelta(hours=settings.IDEMPOTENCY_RETENTION_HOURS),
+                })
+            except DuplicateKeyError:
+                existing = await idempotency_collection.find_one({"_id": record_id})
+                if existing is None:
+                    continue
+                if existing.get("fingerprint") != fingerprint:
+                    raise HTTPException(status_code=422, detail=PAYLOAD_MISMATCH)
+                if existing.get("status") == "completed":
+                    return self._replay(existing["status_code"], existing["response"]), True
+                if not await self._take_over_abandoned(record_id):
+                    await self._wait_other_worker(record_id)
+                    continue
+            return await self._execute(record_id, fingerprint, handler), False
+
+    async def _execute(
+        self, record_id: str, fingerprint: str, handler: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        future: "asyncio.Future[Tuple[int, Any]]" = asyncio.get_running_loop().create_future()
+        self._inflight[record_id] = (fingerprint, future)
+        try:
+            try:
+                body = await handler()
+            except HTTPException as e:
+                if e.status_code >= 500 or e.status_code == 429:
+                    await idempotency_collection.delete_one({"_id": record_id})
+                    future.set_exception(e)
+                    raise
+                await self._complete(record_id, e.status_code, e.detail)
+                future.set_result((e.status_code, e.detail))
+                raise
+            except BaseException as e:
+                await idempotency_collection.delete_one({"_id": record_id})
+                future.set_exception(e if isinstance(e, Exception) else HTTPException(status_code=500, detail="Requisição interrompida"))
+                raise
+            await self._complete(record_id, 200, body)
+            future.set_result((200, body))
+            return body
+        finally:
+            self._inflight.pop(record_id, None)
+            if not future.done():
+                # Falha ao gravar o resultado: não deixar quem aguardava preso
+                future.set_exception(HTTPException(status_code=500, detail="Falha ao registrar Idempotency-Key"))
+            # Evita "Future exception was never retrieved" quando ninguém aguardava
+            future.exception()
+
+    async def _complete(self, record_id: str, status_code: int, response: Any) -> None:
+        await idempotency_collection.update_one(
+            {"_id": record_id},
+            {"$set": {"status": "completed", "status_code": status_code, "response": response}, "$unset": {"locked_until": ""}},
+        )
+
+    async def _take_over_abandoned(self, record_id: str) -> bool:
+        now = datetime.now(timezone.utc)
+        taken = await idempotency_collection.find_one_and_update(
+            {"_id": record_id, "status": "in_progress", "locked_until": {"$lt": now}},
+            {"$set": {"locked_until": now + LOCK_TIMEOUT}},
+        )
+        if taken is not None:
+            logger.warning(f"Retomando Idempotency-Key abandonada {record_id}")
+        return taken is not None
+
+    async def _wait_other_worker(self, record_id: str) -> None:
+        """Aguardar a conclusão (ou abandono) de uma requisição em outro worker."""
+        deadline = asyncio.get_running_loop().time() + LOCK_TIMEOUT.total_seconds()
+        while asyncio.get_running_loop().time() < deadline:
+            await asyncio.sleep(POLL_INTERVAL)
+            doc = await idempotency_collection.find_one({"_id": record_id}, {"status": 1, "locked_until": 1})
+            if doc is None or doc.get("status") == "completed":
+                return
+            locked_until = doc.get("locked_until")
+            if locked_until is not None:
+                if locked_until.tzinfo is None:
+                    locked_until = locked_until.replace(tzinfo=timezone.utc)
+                if locked_until < datetime.now(timezone.utc):
+                    return
+        raise HTTPException(status_code=409, detail="Requisição com esta Idempotency-Key ainda em andamento")
+
+    def _replay(self, status_code: int, body: Any) -> Dict[str, Any]:
+        if status_code >= 400:
+            raise HTTPException(status_code=status_code, detail=body)
+        return body
+
+
+idempotency_service = IdempotencyService()
@@ -0,0 +1,179 @@
+"""
+Busca textual nas tarefas das reuniões do usuário (título, descrição, responsável
+e nome do arquivo).
+
+O backend padrão usa o índice de texto ``meetings_text`` do MongoDB (prefixado por
+user_id) para selecionar as reuniões candidatas, ordenadas por textScore, e
+ranqueia as tarefas de cada uma por campo casado. Sem suporte a índice de texto
+(SEARCH_BACKEND=memory, ou na requisição em que o índice não existe) a busca recorre a um índice
+invertido em memória por usuário, reconstruído a cada SEARCH_MEMORY_INDEX_TTL.
+"""
+import logging
+import re
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from pymongo.errors import ExecutionTimeout, OperationFailure
+
+from ..core.config import settings
+from ..core.database import meetings_collection
+from ..modules.integrations.directory import fold
+
+logger = logging.getLogger("search")
+
+# Peso de cada campo na pontuação de uma tarefa
+FIELD_WEIGHTS: Dict[str, int] = {"title": 10, "assignee": 5, "file_name": 3, "description": 2}
+# Reuniões candidatas lidas por busca (limita a latência e a profundidade da paginação)
+MAX_CANDIDATE_MEETINGS = 100
+# Tempo máximo da consulta no MongoDB
+SEARCH_MAX_TIME_MS = settings.SEARCH_MAX_TIME_MS
+MEMORY_INDEX_TTL = settings.SEARCH_MEMORY_INDEX_TTL
+MEMORY_INDEX_MAX_USERS = 256
+MIN_TERM_LENGTH = 2
+# Código do MongoDB para $text sem índice de texto na coleção
+INDEX_NOT_FOUND = 27
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: Any) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(fold(text)) if len(t) >= MIN_TERM_LENGTH]
+
+
+def _term_matches(term: str, token: str) -> bool:
+    # Prefixo cobre plurais/flexões simples ("fatura" casa "faturas")
+    return token.startswith(term) or (len(token) >= 4 and term.startswith(token))
+
+
+def score_task(terms: List[str], task: Dict[str, Any], file_name: Optional[str]) -> int:
+    """Pontuar a tarefa pelos termos da busca casados em cada campo."""
+    fields = {
+        "title": task.get("title"),
+        "assignee": task.get("assignee"),
+        "description": task.get("description"),
+        "file_name": file_name,
+    }
+    score = 0
+    for name, value in fields.items():
+        tokens = tokenize(value)
+        for term in terms:
+            if any(_term_matches(term, tok) for tok in tokens):
+                score += FIELD_WEIGHTS[name]
+    return score
+
+
+def _is_missing_text_index(error: OperationFailure) -> bool:
+    return error.code == INDEX_NOT_FOUND or "text index required" in str(error)
+
+
+def _hit(meeting_id: Any, file_name: Optional[str], task: Dict[str, Any], score: float) -> Dict[str, Any]:
+    return {"meeting_id": str(meeting_id), "file_name": file_name, "task": task, "score": score}
+
+
+@dataclass
+class MemoryIndex:
+    """Índice invertido das tarefas de um usuário (vocabulário ordenado para prefixos)."""
+    built_at: float
+    entries: List[Tuple[Any, Optional[str], Dict[str, Any]]] = field(default_factory=list)
+    postings: Dict[str, Set[int]] = field(default_factory=dict)
+    vocabulary: List[str] = field(default_factory=list)
+
+    def add(self, meeting_id: Any, file_name: Optional[str], task: Dict[str, Any]) -> None:
+        n = len(self.entries)
+        self.entries.append((meeting_id, file_name, task))
+        text = " ".join(str(task.get(f) or "") for f in ("title", "assignee", "description"))
+        for token in set(tokenize(text) + tokenize(file_name)):
+            self.postings.setdefault(token, set()).add(n)
+
+    def finalize(self) -> None:
+        self.vocabulary = sorted(self.postings)
+
+    def candidates(self, term: str) -> Set[int]:
+        found: Set[int] = set()
+        i = bisect_left(self.vocabulary, term)
+        while i < len(self.vocabulary) and self.vocabulary[i].startswith(term):
+            found |= self.postings[self.vocabulary[i]]
+            i += 1
+        # Tokens mais curtos que o termo ("fatura" para a busca "faturas")
+        for k in range(4, len(term)):
+            found |= self.postings.get(term[:k], set())
+        return found
+
+
+class SearchService:
+    def __init__(self):
+        self.backend = settings.SEARCH_BACKEND
+        self._memory: Dict[int, MemoryIndex] = {}
+
+    async def search_tasks(self, user_id: int, query: str, limit: int = 20, offset: int = 0) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Tarefas ranqueadas que casam com ``query``. Retorna (hits, próximo offset ou None)."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return [], None
+        hits: Optional[List[Dict[str, Any]]] = None
+        if self.backend == "mongo":
+            try:
+                hits = await self._search_mongo(user_id, query, terms)
+            except ExecutionTimeout:
+                raise
+            except OperationFailure as e:
+                # Só a falta do índice de texto justifica o fallback; demais erros sobem
+                if not _is_missing_text_index(e):
+                    raise
+                logger.warning(f"Índice de texto ausente no MongoDB, usando índice em memória: {e}")
+        if hits is None:
+            hits = await self._search_memory(user_id, terms)
+        page = hits[offset:offset + limit]
+        next_offset = offset + limit if len(hits) > offset + limit else None
+        return page, next_offset
+
+    async def _search_mongo(self, user_id: int, query: str, terms: List[str]) -> List[Dict[str, Any]]:
+        pipeline = [
+            {"$match": {"user_id": user_id, "$text": {"$search": query}}},
+            {"$sort": {"score": {"$meta": "textScore"}}},
+            {"$limit": MAX_CANDIDATE_MEETINGS},
+            {"$project": {"file_name": 1, "tasks": 1, "score": {"$meta": "textScore"}}},
+        ]
+        meetings = await meetings_collection.aggregate(pipeline, maxTimeMS=SEARCH_MAX_TIME_MS).to_list(length=MAX_CANDIDATE_MEETINGS)
+        hits = []
+        for m in meetings:
+            for task in m.get("tasks") or []:
+                score = score_task(terms, task, m.get("file_name"))
+                if score:
+                    hits.append(_hit(m["_id"], m.get("file_name"), task, score + float(m.get("score") or 0)))
+        hits.sort(key=lambda h: h["score"], reverse=True)
+        return hits
+
+    async def _search_memory(self, user_id: int, terms: List[str]) -> List[Dict[str, Any]]:
+        index = self._memory.get(user_id)
+        if index is None or time.monotonic() - index.built_at > MEMORY_INDEX_TTL:
+            index = await self._build_memory_index(user_id)
+            self._memory.pop(user_id, None)
+            self._memory[user_id] = index
+            while len(self._memory) > MEMORY_INDEX_MAX_USERS:
+                self._memory.pop(next(iter(self._memory)))
+        matched: Set[int] = set()
+        for term in terms:
+            matched |= index.candidates(term)
+        hits = []
+        for n in matched:
+            meeting_id, file_name, task = index.entries[n]
+            score = score_task(terms, task, file_name)
+            if score:
+                hits.append(_hit(meeting_id, file_name, task, float(score)))
+        hits.sort(key=lambda h: h["score"], reverse=True)
+        return hits
+
+    async def _build_memory_index(self, user_id: int) -> MemoryIndex:
+        index = MemoryIndex(built_at=time.monotonic())
+        cursor = meetings_collection.find({"user_id": user_id}, {"file_name": 1, "tasks": 1})
+        async for m in cursor:
+            for task in m.get("tasks") or []:
+                index.add(m["_id"], m.get("file_name"), task)
+        index.finalize()
+        return index
+
+
+search_service = SearchService()
@@ -0,0 +1,171 @@
+"""
+Envio de reuniões para projetos (Trello/Jira) como job em segundo plano.
+
+O job envia as tarefas em lotes pela integração do provedor, grava o id externo
+(issue/card) em cada tarefa no MongoDB e registra o progresso em ``send_jobs``.
+Ao reenviar, tarefas que já possuem ``external_id`` são ignoradas, então um envio
+interrompido pode ser retomado sem duplicar cards/issues.
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from ..core.database import send_jobs_collection
+from ..core.utils import get_user_meeting, mark_meeting_sent, record_task_external_refs
+from ..modules.integrations.registry import get_integration
+
+logger = logging.getLogger("send_jobs")
+
+# Tarefas por chamada a create_tasks_bulk (coincide com o lote do Jira)
+SEND_CHUNK_SIZE = 50
+# Job "running" sem atualização há mais que isso é considerado abandonado
+JOB_STALE_AFTER = timedelta(minutes=10)
+
+ACTIVE_STATUSES = ("pending", "running")
+TERMINAL_STATUSES = ("completed", "partial", "failed")
+
+
+def external_refs_from_result(provider: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Extrair id/url externos do retorno de create_task de cada provedor."""
+    refs: Dict[str, Any] = {
+        "external_provider": provider,
+        "external_id": str(result.get("id")) if result.get("id") is not None else None,
+        "external_url": result.get("url") or result.get("shortUrl"),
+    }
+    if result.get("key"):
+        refs["external_key"] = result.get("key")
+    return refs
+
+
+class SendService:
+    async def start_job(self, user_id: int, meeting_id: str, project: Dict[str, Any]) -> Dict[str, Any]:
+        """Criar (ou reaproveitar) o job de envio da reunião para o projeto.
+
+        O índice único parcial ``one_active_send_job`` garante um só job ativo por
+        reunião: se duas requisições concorrentes tentarem criar o job, a segunda
+        recebe DuplicateKeyError e reaproveita o job da primeira. Um job ativo para
+        outro projeto não é reaproveitado: a chamada falha com 409.
+        """
+        while True:
+            now = datetime.now(timezone.utc)
+            active = await send_jobs_collection.find_one(
+                {"user_id": user_id, "meeting_id": meeting_id, "status": {"$in": list(ACTIVE_STATUSES)}},
+                sort=[("created_at", -1)],
+            )
+            if active:
+                updated_at = active["updated_at"]
+                if updated_at.tzinfo is None:
+                    updated_at = updated_at.replace(tzinfo=timezone.utc)
+                if now - updated_at < JOB_STALE_AFTER:
+                    if active.get("project_id") != project["id"]:
+                        raise HTTPException(
+                            status_code=409,
+                            detail=f"Já existe um envio em andamento desta reunião para outro projeto (job {active['_id']})",
+                        )
+                    return active
+                # Condicional ao status/updated_at lidos: outro worker pode ter retomado o job
+                await send_jobs_collection.update_one(
+                    {"_id": active["_id"], "status": active["status"], "updated_at": active["updated_at"]},
+                    {"$set": {"status": "failed", "updated_at": now, "errors": active.get("errors", []) + [{"error": "Job abandonado"}]}},
+                )
+            try:
+                return await self._insert_job(user_id, meeting_id, project, now)
+            except DuplicateKeyError:
+                # Outra requisição criou o job ativo entre a leitura e o insert
+                continue
+
+    async def _insert_job(self, user_id: int, meeting_id: str, project: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+        job = {
+            "user_id": user_id,
+            "meeting_id": meeting_id,
+            "project_id": project["id"],
+            "provider": project["provider"],
+            "target_id": project["target_id"],
+            "status": "pending",
+            "total": 0,
+            "sent": 0,
+            "skipped": 0,
+            "failed": 0,
+            "errors": [],
+            "created_at": now,
+            "updated_at": now,
+        }
+        result = await send_jobs_collection.insert_one(job)
+        job["_id"] = result.inserted_id
+        return job
+
+    async def get_job(self, job_id: str, user_id: int) -> Optional[Dict[str, Any]]:
+        try:
+            return await send_jobs_collection.find_one({"_id": ObjectId(job_id), "user_id": user_id})
+        except Exception as e:
+            raise ValueError(f"ID de job inválido: {str(e)}")
+
+    async def _update_job(self, job_id: ObjectId, **fields) -> None:
+        fields["updated_at"] = datetime.now(timezone.utc)
+        await send_jobs_collection.update_one({"_id": job_id}, {"$set": fields})
+
+    async def run_job(self, job_id: ObjectId) -> None:
+        """Executar o job: enviar tarefas pendentes em lotes e registrar progresso."""
+        # Reivindicar o job: uma tarefa em segundo plano repetida/duplicada não o executa de novo
+        job = await send_jobs_collection.find_one_and_update(
+            {"_id": job_id, "status": "pending"},
+            {"$set": {"status": "running", "updated_at": datetime.now(timezone.utc)}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if not job:
+            return
+        user_id = job["user_id"]
+        meeting_id = job["meeting_id"]
+        provider = job["provider"]
+        errors: List[Dict[str, Any]] = []
+        sent = failed = 0
+        try:
+            meeting = await get_user_meeting(meeting_id, user_id)
+            if not meeting:
+                await self._update_job(job_id, status="failed", errors=[{"error": "Reunião não encontrada"}])
+                return
+            tasks = meeting.get("tasks", [])
+            pending = [t for t in tasks if not t.get("external_id")]
+            skipped = len(tasks) - len(pending)
+            await self._update_job(job_id, status="running", total=len(tasks), skipped=skipped)
+
+            service = get_integration(provider)
+            for offset in range(0, len(pending), SEND_CHUNK_SIZE):
+                chunk = pending[offset:offset + SEND_CHUNK_SIZE]
+                try:
+                    results = await service.create_tasks_bulk(user_id, job["target_id"], chunk)
+                except HTTPException as e:
+                    results = [
+                        {"task_id": t.get("id"), "ok": False, "status": e.status_code, "error": e.detail}
+                        for t in chunk
+                    ]
+                refs: Dict[str, Dict[str, Any]] = {}
+                for r in results:
+                    if r.get("ok") and r.get("task_id"):
+                        refs[r["task_id"]] = external_refs_from_result(provider, r.get("result") or {})
+                        sent += 1
+                    else:
+                        failed += 1
+                        errors.append({"task_id": r.get("task_id"), "status": r.get("status"), "error": r.get("error")})
+                # Grava os ids externos antes de avançar, para permitir retomada
+                await record_task_external_refs(meeting_id, user_id, refs)
+                await self._update_job(job_id, sent=sent, failed=failed, errors=errors)
+
+            if failed:
+                status = "partial" if (sent or skipped) else "failed"
+            else:
+                status = "completed"
+                await mark_meeting_sent(meeting_id)
+            await self._update_job(job_id, status=status)
+        except Exception as e:
+            logger.exception(f"Falha no job de envio {job_id}")
+            errors.append({"error": str(e)})
+            await self._update_job(job_id, status="failed", errors=errors)
+
+
+send_service = SendService()
@@ -0,0 +1,82 @@
+"""
+Microbenchmark da serialização de GET /api/meetings/{id}.
+
+Compara o caminho anterior (ProcessedMeeting/Task do Pydantic, revalidação pelo
+response_model e JSONResponse) com o atual (meeting_payload + FastJSONResponse)
+para reuniões com muitas tarefas, sem banco nem servidor:
+
+    python -m devtools.bench_serialization --tasks 50 200 1000 --repeat 200
+"""
+import argparse
+import timeit
+from datetime import datetime, timezone
+from typing import Any, Dict
+from zoneinfo import ZoneInfo
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+from app.core.serialization import FastJSONResponse, meeting_payload
+from app.models import ProcessedMeeting, Task
+
+_response_adapter = TypeAdapter(ProcessedMeeting)
+
+
+def make_meeting(tasks: int) -> Dict[str, Any]:
+    return {
+        "_id": ObjectId(),
+        "user_id": 1,
+        "created_at": datetime.now(timezone.utc).replace(tzinfo=None),
+        "sent": False,
+        "tasks": [
+            {
+                "id": str(ObjectId()),
+                "title": f"Tarefa {n} da reunião de planejamento",
+                "description": "Revisar o escopo, alinhar com o time e atualizar o quadro. " * 3,
+                "assignee": "Maria Souza" if n % 2 else None,
+                "due_date": "2024-05-10",
+                "external_id": f"PRJ-{n}" if n % 3 == 0 else None,
+            }
+            for n in range(tasks)
+        ],
+    }
+
+
+def legacy_response(meeting: Dict[str, Any]) -> bytes:
+    """Caminho anterior: modelos Pydantic + validação do response_model + json.dumps."""
+    dt = meeting["created_at"].replace(tzinfo=timezone.utc)
+    model = ProcessedMeeting(
+        id=str(meeting["_id"]),
+        tasks=[Task(**task) for task in meeting.get("tasks", [])],
+        created_at=dt.astimezone(ZoneInfo(settings.TIMEZONE)).isoformat(),
+        sent=meeting.get("sent", False),
+    )
+    validated = _response_adapter.validate_python(model, from_attributes=True)
+    content = jsonable_encoder(_response_adapter.dump_python(validated, mode="json"))
+    return JSONResponse(content).body
+
+
+def fast_response(meeting: Dict[str, Any]) -> bytes:
+    return FastJSONResponse(meeting_payload(meeting)).body
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, nargs="+", default=[20, 200, 1000])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'tarefas':>8} {'anterior (µs)':>14} {'atual (µs)':>11} {'ganho':>7}")
+    for count in args.tasks:
+        meeting = make_meeting(count)
+        assert len(legacy_response(meeting)) and len(fast_response(meeting))
+        legacy = min(timeit.repeat(lambda: legacy_response(meeting), number=args.repeat, repeat=3)) / args.repeat
+        fast = min(timeit.repeat(lambda: fast_response(meeting), number=args.repeat, repeat=3)) / args.repeat
+        print(f"{count:>8} {legacy * 1e6:>14.1f} {fast * 1e6:>11.1f} {legacy / fast:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+"""
+Servidor local que imita os endpoints do Trello e do Jira usados pela API.
+
+Permite exercitar TrelloService e JiraService em volume sem contas reais:
+
+    uvicorn devtools.fake_providers:app --port 9000
+
+e, na API, aponte:
+
+    TRELLO_API_BASE_URL=http://localhost:9000/trello/1
+    ATLASSIAN_API_BASE_URL=http://localhost:9000
+    ATLASSIAN_AUTH_BASE_URL=http://localhost:9000
+
+Para Jira com credenciais básicas use base_url=http://localhost:9000/ex/jira/local.
+
+Comportamento configurável por variáveis de ambiente:
+    FAKE_LATENCY_MS          latência base por requisição (padrão 50)
+    FAKE_LATENCY_JITTER_MS   variação aleatória somada à latência (padrão 20)
+    FAKE_429_RATE            probabilidade de responder 429 (padrão 0)
+    FAKE_RETRY_AFTER         valor do Retry-After nos 429 (padrão 1)
+    FAKE_PROJECTS            quantidade de projetos Jira (padrão 250)
+    FAKE_PAGE_MAX            maxResults máximo aceito em /project/search (padrão 50)
+    FAKE_BOARDS              quantidade de boards Trello (padrão 5)
+    FAKE_MEMBERS             membros por board/projeto (padrão 20)
+"""
+import asyncio
+import itertools
+import os
+import random
+import uuid
+from typing import Any, Dict, List, Optional
+
+import requests
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+
+LATENCY_MS = float(os.getenv("FAKE_LATENCY_MS", "50"))
+LATENCY_JITTER_MS = float(os.getenv("FAKE_LATENCY_JITTER_MS", "20"))
+RATE_429 = float(os.getenv("FAKE_429_RATE", "0"))
+RETRY_AFTER = os.getenv("FAKE_RETRY_AFTER", "1")
+PROJECTS = int(os.getenv("FAKE_PROJECTS", "250"))
+PAGE_MAX = int(os.getenv("FAKE_PAGE_MAX", "50"))
+BOARDS = int(os.getenv("FAKE_BOARDS", "5"))
+MEMBERS = int(os.getenv("FAKE_MEMBERS", "20"))
+
+CLOUD_ID = "11111111-2222-3333-4444-555555555555"
+FIRST_NAMES = ["Ana", "Bruno", "Carla", "Diego", "Elisa", "Fábio", "Gabriela", "Heitor", "Íris", "João", "Marcela", "Otávio"]
+
+app = FastAPI(title="Fake providers (Trello/Jira)")
+_ids = itertools.count(10000)
+
+
+def hex_id() -> str:
+    return uuid.uuid4().hex[:24]
+
+
+def person(n: int) -> Dict[str, str]:
+    first = FIRST_NAMES[n % len(FIRST_NAMES)]
+    return {"name": f"{first} Silva {n}", "username": f"{first.lower()}{n}", "email": f"{first.lower()}.{n}@example.com"}
+
+
+# --- Estado em memória -------------------------------------------------------
+
+TRELLO_MEMBERS = [{"id": hex_id(), "username": p["username"], "fullName": p["name"]} for p in map(person, range(MEMBERS))]
+TRELLO_BOARDS: Dict[str, Dict[str, Any]] = {}
+TRELLO_LISTS: Dict[str, Dict[str, Any]] = {}
+TRELLO_CARDS: Dict[str, Dict[str, Any]] = {}
+for b in range(BOARDS):
+    board_id = hex_id()
+    TRELLO_BOARDS[board_id] = {"id": board_id, "name": f"Board {b + 1}"}
+    for name in ("A fazer", "Fazendo", "Feito"):
+        list_id = hex_id()
+        TRELLO_LISTS[list_id] = {"id": list_id, "name": name, "idBoard": board_id}
+
+JIRA_USERS = [
+    {"accountId": f"712020:{uuid.uuid4()}", "displayName": p["name"], "emailAddress": p["email"]}
+    for p in map(person, range(MEMBERS))
+]
+JIRA_PROJECTS = [
+    {"id": str(next(_ids)), "key": f"P{n:04d}", "name": f"Projeto {n}"}
+    for n in range(PROJECTS)
+]
+JIRA_ISSUES: Dict[str, Dict[str, Any]] = {}
+# Webhooks registrados: Trello por board (idModel) e Jira por site
+TRELLO_WEBHOOKS: Dict[str, Dict[str, Any]] = {}
+JIRA_WEBHOOKS: Dict[str, Dict[str, Any]] = {}
+
+
+@app.middleware("http")
+async def simulate_network(request: Request, call_next):
+    delay = LATENCY_MS + random.uniform(0, LATENCY_JITTER_MS)
+    await asyncio.sleep(delay / 1000)
+    if RATE_429 and random.random() < RATE_429:
+        return JSONResponse({"message": "rate limit exceeded"}, status_code=429, headers={"Retry-After": RETRY_AFTER})
+    return await call_next(request)
+
+
+@app.get("/_stats")
+async def stats():
+    """Contadores para conferir o resultado de um teste de carga."""
+    return {"cards": len(TRELLO_CARDS), "issues": len(JIRA_ISSUES), "webhooks": len(TRELLO_WEBHOOKS) + len(JIRA_WEBHOOKS)}
+
+
+async def deliver(callbacks: List[str], payload: Dict[str, Any]) -> None:
+    """Entregar a notificação aos callbacks registrados (como o provedor faria)."""
+    for url in callbacks:
+        try:
+            await asyncio.to_thread(requests.post, url, json=payload, timeout=10)
+        except Exception:
+            pass
+
+
+@app.post("/_events/trello/lists/{list_id}/rename")
+async def fire_trello_list_rename(list_id: str, name: str):
+    """Renomear uma lista e disparar o webhook updateList para os callbacks do board."""
+    lst = TRELLO_LISTS.get(list_id)
+    if not lst:
+        raise HTTPException(status_code=404, detail="Lista não encontrada")
+    old, lst["name"] = lst["name"], name
+    board = TRELLO_BOARDS[lst["idBoard"]]
+    payload = {
+        "model": {"id": board["id"], "name": board["name"]},
+        "action": {"type": "updateList", "data": {"board": dict(board), "list": dict(lst), "old": {"name": old}}},
+    }
+    callbacks = [w["callbackURL"] for w in TRELLO_WEBHOOKS.values() if w["idModel"] == board["id"]]
+    await deliver(callbacks, payload)
+    return {"delivered": len(callbacks)}
+
+
+@app.post("/_events/jira/projects/{key}/rename")
+async def fire_jira_project_rename(key: str, name: str):
+    """Renomear um projeto e disparar o webhook project_updated."""
+    project = jira_project(key)
+    project["name"] = name
+    callbacks = [w["url"] for w in JIRA_WEBHOOKS.values()]
+    await deliver(callbacks, {"webhookEvent": "project_updated", "project": dict(project)})
+    return {"delivered": len(callbacks)}
+
+
+# --- Trello -------------------------------------------------------------------
+
+def trello_fields(obj: Dict[str, Any], fields: Optional[str]) -> Dict[str, Any]:
+    if not fields or fields == "all":
+        return dict(obj)
+    wanted = set(fields.split(",")) | {"id"}
+    return {k: v for k, v in obj.items() if k in wanted}
+
+
+def trello_board(board_id: str) -> Dict[str, Any]:
+    board = TRELLO_BOARDS.get(board_id)
+    if not board:
+        raise HTTPException(status_code=404, detail="The requested resource was not found.")
+    return board
+
+
+@app.get("/trello/1/members/me")
+async def trello_me():
+    return {"id": TRELLO_MEMBERS[0]["id"], "username": "fake", "fullName": "Fake User", "email": "fake@example.com"}
+
+
+@app.get("/trello/1/members/me/boards")
+async def trello_my_boards(fields: Optional[str] = None):
+    return [trello_fields(b, fields) for b in TRELLO_BOARDS.values()]
+
+
+@app.get("/trello/1/boards/{board_id}")
+async def trello_get_board(board_id: str, fields: Optional[str] = None):
+    return trello_fields(trello_board(board_id), fields)
+
+
+@app.get("/trello/1/boards/{board_id}/lists")
+async def trello_board_lists(board_id: str, fields: Optional[str] = None):
+    trello_board(board_id)
+    return [trello_fields(l, fields) for l in TRELLO_LISTS.values() if l["idBoard"] == board_id]
+
+
+@app.get("/trello/1/boards/{board_id}/members")
+async def trello_board_members(board_id: str):
+    trello_board(board_id)
+    return TRELLO_MEMBERS
+
+
+@app.get("/trello/1/lists/{list_id}")
+async def trello_get_list(list_id: str, fields: Optional[str] = None):
+    lst = TRELLO_LISTS.get(list_id)
+    if not lst:
+        raise HTTPException(status_code=404, detail="The requested resource was not found.")
+    return trello_fields(lst, fields)
+
+
+@app.post("/trello/1/cards")
+async def trello_create_card(idList: str, name: str = "", desc: str = "", due: Optional[str] = None, idMembers: Optional[str] = None):
+    if idList not in TRELLO_LISTS:
+        return JSONResponse({"message": "invalid value for idList"}, status_code=400)
+    card_id = hex_id()
+    card = {"id": card_id, "name": name, "desc": desc, "due": due, "idList": idList,
+            "idMembers": [idMembers] if idMembers else [], "shortUrl": f"https://trello.example/c/{card_id[:8]}"}
+    TRELLO_CARDS[card_id] = card
+    return card
+
+
+@app.get("/trello/1/batch")
+async def trello_batch(urls: str):
+    routes = urls.split(",")
+    if len(routes) > 10:
+        return JSONResponse({"message": "too many urls"}, status_code=400)
+    out: List[Any] = []
+    for route in routes:
+        path, _, query = route.partition("?")
+        parts = [p for p in path.split("/") if p]
+        fields = query.split("=", 1)[1] if query.startswith("fields=") else None
+        board = TRELLO_BOARDS.get(parts[1]) if len(parts) >= 2 and parts[0] == "boards" else None
+        if board is None:
+            out.append({"name": "NotFoundError", "message": "The requested resource was not found.", "statusCode": 404})
+        elif len(parts) == 2:
+            out.append({"200": trello_fields(board, fields)})
+        elif parts[2] == "lists":
+            out.append({"200": [trello_fields(l, fields) for l in TRELLO_LISTS.values() if l["idBoard"] == board["id"]]})
+        elif parts[2] == "members":
+            out.append({"200": TRELLO_MEMBERS})
+        else:
+            out.append({"name": "NotFoundError", "message": "Unsupported route", "statusCode": 404})
+    return out
+
+
+@app.post("/trello/1/webhooks")
+async def trello_create_webhook(callbackURL: str, idModel: str, description: str = ""):
+    for hook in TRELLO_WEBHOOKS.values():
+        if hook["callbackURL"] == callbackURL and hook["idModel"] == idModel:
+            return JSONResponse({"message": "A webhook with that callback, model, and token already exists"}, status_code=400)
+    trello_board(idModel)
+    hook_id = hex_id()
+    TRELLO_WEBHOOKS[hook_id] = {"id": hook_id, "callbackURL": callbackURL, "idModel": idModel, "description": description, "active": True}
+    return TRELLO_WEBHOOKS[hook_id]
+
+
+# --- Atlassian OAuth ------------------------------------------------------------
+
+@app.post("/oauth/token")
+async def atlassian_token():
+    return {"access_token": f"fake-{uuid.uuid4().hex}", "refresh_token": "fake-refresh", "expires_in": 3600, "token_type": "Bearer"}
+
+
+@app.get("/oauth/token/accessible-resources")
+async def atlassian_resources():
+    return [{
+        "id": CLOUD_ID,
+        "url": "https://fake.atlassian.net",
+        "name": "fake-jira",
+        "scopes": ["read:jira-work", "write:jira-work", "read:jira-user"],
+        "resourceType": "jira",
+    }]
+
+
+@app.get("/oauth/userinfo")
+async def atlassian_userinfo():
+    user = JIRA_USERS[0]
+    return {"sub": user["accountId"], "email": user["emailAddress"], "name": user["displayName"]}
+
+
+@app.get("/me")
+async def atlassian_me():
+    user = JIRA_USERS[0]
+    return {"account_id": user["accountId"], "email": user["emailAddress"]}
+
+
+# --- Jira REST (v2/v3) -------------------------------------------------------------
+
+JIRA = "/ex/jira/{cloud_id}/rest/api/{version}"
+
+
+def jira_project(key_or_id: str) -> Dict[str, Any]:
+    for p in JIRA_PROJECTS:
+        if key_or_id in (p["id"], p["key"]):
+            return p
+    raise HTTPException(status_code=404, detail="No project could be found")
+
+
+def create_issue(fields: Dict[str, Any]) -> Dict[str, Any]:
+    project = jira_project(str((fields.get("project") or {}).get("key") or ""))
+    if not fields.get("summary"):
+        raise ValueError("summary: You must specify a summary of the issue.")
+    issue_id = str(next(_ids))
+    key = f"{project['key']}-{len(JIRA_ISSUES) + 1}"
+    JIRA_ISSUES[issue_id] = {"id": issue_id, "key": key, "fields": fields}
+    return {"id": issue_id, "key": key, "self": f"/rest/api/3/issue/{issue_id}"}
+
+
+@app.get(JIRA + "/project/search")
+async def jira_project_search(cloud_id: str, version: str, startAt: int = 0, maxResults: int = 50):
+    size = max(1, min(maxResults, PAGE_MAX))
+    page = JIRA_PROJECTS[startAt:startAt + size]
+    return {
+        "startAt": startAt,
+        "maxResults": size,
+        "total": len(JIRA_PROJECTS),
+        "isLast": startAt + size >= len(JIRA_PROJECTS),
+        "values": page,
+    }
+
+
+@app.get(JIRA + "/project/{key}")
+async def jira_get_project(cloud_id: str, version: str, key: str):
+    return jira_project(key)
+
+
+@app.get(JIRA + "/project/{key}/role")
+async def jira_project_roles(cloud_id: str, version: str, key: str):
+    jira_project(key)
+    return {name: f"/rest/api/2/project/{key}/role/{rid}" for name, rid in (("Administrators", "10002"), ("Developers", "10001"))}
+
+
+@app.get(JIRA + "/project/{key}/role/{role_id}")
+async def jira_project_role(cloud_id: str, version: str, key: str, role_id: str):
+    jira_project(key)
+    users = JIRA_USERS[:5] if role_id == "10002" else JIRA_USERS
+    return {
+        "id": int(role_id),
+        "actors": [
+            {"type": "atlassian-user-role-actor", "displayName": u["displayName"], "actorUser": {"accountId": u["accountId"]}}
+            for u in users
+        ],
+    }
+
+
+@app.get(JIRA + "/user/assignable/search")
+async def jira_assignable(cloud_id: str, version: str, project: str, startAt: int = 0, maxResults: int = 50):
+    jira_project(project)
+    return JIRA_USERS[startAt:startAt + maxResults]
+
+
+@app.get(JIRA + "/user/search")
+async def jira_user_search(cloud_id: str, version: str, query: str = ""):
+    q = query.lower()
+    return [u for u in JIRA_USERS if q in u["displayName"].lower() or q in u["emailAddress"].lower()]
+
+
+@app.post(JIRA + "/issue")
+async def jira_create_issue(cloud_id: str, version: str, payload: Dict[str, Any]):
+    try:
+        return JSONResponse(create_issue(payload.get("fields") or {}), status_code=201)
+    except ValueError as e:
+        field, _, msg = str(e).partition(": ")
+        return JSONResponse({"errorMessages": [], "errors": {field: msg}}, status_code=400)
+
+
+@app.post(JIRA + "/issue/bulk")
+async def jira_bulk_create(cloud_id: str, version: str, payload: Dict[str, Any]):
+    updates = payload.get("issueUpdates") or []
+    if len(updates) > 50:
+        return JSONResponse({"errorMessages": ["Bulk create supports at most 50 issues"]}, status_code=400)
+    issues: List[Dict[str, Any]] = []
+    errors: List[Dict[str, Any]] = []
+    for n, update in enumerate(updates):
+        try:
+            issues.append(create_issue(update.get("fields") or {}))
+        except (ValueError, HTTPException) as e:
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            field, _, msg = str(detail).partition(": ")
+            errors.append({
+                "status": 400,
+                "elementErrors": {"errorMessages": [], "errors": {field or "project": msg or str(detail)}},
+                "failedElementNumber": n,
+            })
+    return JSONResponse({"issues": issues, "errors": errors}, status_code=201 if issues else 400)
+
+
+@app.post("/ex/jira/{cloud_id}/rest/webhooks/1.0/webhook")
+async def jira_register_webhook(cloud_id: str, payload: Dict[str, Any]):
+    hook_id = str(next(_ids))
+    JIRA_WEBHOOKS[hook_id] = {**payload, "self": f"/rest/webhooks/1.0/webhook/{hook_id}"}
+    return JSONResponse(JIRA_WEBHOOKS[hook_id], status_code=201)
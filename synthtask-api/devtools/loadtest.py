@@ -0,0 +1,135 @@
+"""
+Teste de carga das integrações contra o servidor falso (devtools/fake_providers.py).
+
+Suba o servidor falso e a API apontando para ele (veja o docstring de
+fake_providers.py) e rode:
+
+    python -m devtools.loadtest --api http://localhost:8000 --fake http://localhost:9000
+
+O script registra um usuário descartável, conecta Trello e Jira (credenciais
+básicas) no servidor falso e executa os cenários em paralelo, reportando vazão,
+erros e latência (p50/p95/p99) por cenário, além dos contadores do servidor falso.
+"""
+import argparse
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+import requests
+
+SCENARIOS = ("trello_targets", "trello_context", "trello_bulk", "jira_projects", "jira_bulk")
+
+
+class Client:
+    def __init__(self, api: str, fake: str, tasks_per_send: int):
+        self.api = api.rstrip("/")
+        self.fake = fake.rstrip("/")
+        self.tasks_per_send = tasks_per_send
+        self.session = requests.Session()
+        self.board_id = ""
+        self.list_id = ""
+        self.project_key = ""
+
+    def call(self, method: str, path: str, **kwargs: Any) -> requests.Response:
+        resp = self.session.request(method, f"{self.api}{path}", timeout=120, **kwargs)
+        resp.raise_for_status()
+        return resp
+
+    def setup(self) -> None:
+        email = f"load-{uuid.uuid4().hex[:8]}@example.com"
+        token = self.call("POST", "/api/auth/register", json={"email": email, "password": "loadtest", "name": "Load Test"}).json()["token"]
+        self.session.headers["Authorization"] = f"Bearer {token}"
+        self.call("POST", "/api/integrations/trello/connect", json={"api_key": "fake", "token": f"fake-{uuid.uuid4().hex}"})
+        self.call("POST", "/api/integrations/jira/connect", json={
+            "base_url": f"{self.fake}/ex/jira/local", "email": email, "api_token": "fake",
+        })
+        boards = self.call("GET", "/api/integrations/trello/targets").json()["boards"]
+        self.board_id = boards[0]["id"]
+        context = self.call("GET", f"/api/integrations/trello/boards/{self.board_id}/context").json()
+        self.list_id = context["lists"][0]["id"]
+        self.project_key = self.call("GET", "/api/integrations/jira/targets").json()["projects"][0]["key"]
+
+    def tasks(self) -> List[Dict[str, Any]]:
+        return [
+            {"id": uuid.uuid4().hex, "title": f"Tarefa {n}", "description": "Gerada pelo teste de carga", "assignee": "Marcela"}
+            for n in range(self.tasks_per_send)
+        ]
+
+    def trello_targets(self) -> None:
+        self.call("GET", "/api/integrations/trello/targets")
+
+    def trello_context(self) -> None:
+        self.call("GET", f"/api/integrations/trello/boards/{self.board_id}/context")
+
+    def trello_bulk(self) -> None:
+        self.call("POST", "/api/integrations/trello/tasks/bulk", json={"target_id": self.list_id, "tasks": self.tasks()})
+
+    def jira_projects(self) -> None:
+        self.call("GET", "/api/integrations/jira/targets", params={"refresh": 1})
+
+    def jira_bulk(self) -> None:
+        self.call("POST", "/api/integrations/jira/tasks/bulk", json={"target_id": self.project_key, "tasks": self.tasks()})
+
+
+def run_scenario(fn: Callable[[], None], iterations: int, concurrency: int) -> Tuple[List[float], int, float]:
+    latencies: List[float] = []
+    errors = 0
+
+    def once(_: int) -> None:
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            fn()
+            latencies.append(time.perf_counter() - started)
+        except Exception:
+            errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(once, range(iterations)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--api", default="http://localhost:8000")
+    parser.add_argument("--fake", default="http://localhost:9000")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--tasks", type=int, default=30, help="tarefas por envio em lote")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    args = parser.parse_args()
+
+    client = Client(args.api, args.fake, args.tasks)
+    client.setup()
+    before = requests.get(f"{client.fake}/_stats", timeout=10).json()
+
+    print(f"{'cenário':<16}{'ok':>6}{'erros':>7}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for name in args.scenarios.split(","):
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise SystemExit(f"Cenário desconhecido: {name}")
+        latencies, errors, elapsed = run_scenario(getattr(client, name), args.iterations, args.concurrency)
+        rps = len(latencies) / elapsed if elapsed else 0.0
+        print(
+            f"{name:<16}{len(latencies):>6}{errors:>7}{rps:>9.1f}"
+            f"{percentile(latencies, 50) * 1000:>9.0f}{percentile(latencies, 95) * 1000:>9.0f}"
+            f"{percentile(latencies, 99) * 1000:>9.0f}"
+            + (f"  (média {statistics.mean(latencies) * 1000:.0f} ms)" if latencies else "")
+        )
+
+    after = requests.get(f"{client.fake}/_stats", timeout=10).json()
+    print(f"servidor falso: +{after['cards'] - before['cards']} cards, +{after['issues'] - before['issues']} issues")
+
+
+if __name__ == "__main__":
+    main()
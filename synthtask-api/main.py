@@ -1,13 +1,18 @@
+import ipaddress
 import logging
-from fastapi import FastAPI
+import secrets
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 from app.core.config import settings
-from app.core.database import database, metadata, engine, drop_legacy_trello_columns
+from app.core.database import database, metadata, engine, drop_legacy_trello_columns, ensure_projects_indexes, ensure_projects_version_column
+from app.core.indexes import ensure_indexes
 from app.routers.auth import router as auth_router
 from app.routers.meetings import router as meetings_router
 from app.routers.integrations import router as integrations_router
 from app.routers.projects import router as projects_router
+from app.modules.integrations import metrics as integration_metrics
 
 logging.basicConfig(level=logging.INFO)
 app = FastAPI(title=settings.APP_NAME, version=settings.VERSION)
@@ -20,8 +25,25 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+@app.middleware("http")
+async def trace_integration_calls(request: Request, call_next):
+    # Anexa ao trace as chamadas feitas aos provedores durante a requisição
+    token = integration_metrics.start_trace()
+    try:
+        response = await call_next(request)
+    finally:
+        calls = integration_metrics.end_trace(token)
+    header = integration_metrics.server_timing_header(calls)
+    if header:
+        response.headers["Server-Timing"] = header
+    if calls:
+        logging.getLogger("integrations.trace").debug(f"{request.method} {request.url.path} outbound={calls}")
+    return response
+
+
 # Routers
 app.include_router(auth_router)
 app.include_router(meetings_router)
@@ -35,7 +57,20 @@ async def on_startup():
     metadata.create_all(engine)
     # Remove colunas legadas de Trello no users, se existirem
     drop_legacy_trello_columns()
+    ensure_projects_indexes()
+    ensure_projects_version_column()
     await database.connect()
+    # Índices do MongoDB (idempotente); falha não impede a API de subir
+    try:
+        _, failed = await ensure_indexes()
+    except Exception as e:
+        logging.getLogger("indexes").warning(f"Não foi possível garantir os índices do MongoDB: {e}")
+    else:
+        if failed:
+            logging.getLogger("indexes").error(
+                f"{len(failed)} índice(s) do MongoDB não foram criados: {', '.join(failed)}"
+                " (rode python -m app.core.indexes para detalhes)"
+            )
 
 
 @app.on_event("shutdown")
@@ -48,6 +83,46 @@ async def health():
     return {"status": "ok"}
 
 
+METRICS_NETWORKS = [
+    ipaddress.ip_network(net.strip(), strict=False)
+    for net in settings.METRICS_ALLOWED_NETWORKS.split(",") if net.strip()
+]
+_metrics_denied_hosts: set = set()
+
+
+def _metrics_client_allowed(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in net for net in METRICS_NETWORKS)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics(request: Request):
+    """Métricas das chamadas aos provedores no formato do Prometheus (por worker).
+
+    Exige ``Authorization: Bearer <METRICS_TOKEN>``; sem METRICS_TOKEN configurado,
+    só responde a clientes em METRICS_ALLOWED_NETWORKS (loopback por padrão).
+    """
+    if settings.METRICS_TOKEN:
+        supplied = request.headers.get("authorization", "").removeprefix("Bearer ").strip()
+        if not secrets.compare_digest(supplied.encode(), settings.METRICS_TOKEN.encode()):
+            raise HTTPException(status_code=401, detail="Token de métricas inválido")
+    else:
+        host = request.client.host if request.client else ""
+        if not _metrics_client_allowed(host):
+            if host not in _metrics_denied_hosts:
+                # Um aviso por origem: atrás de proxy o cliente é o proxy, não o Prometheus
+                _metrics_denied_hosts.add(host)
+                logging.getLogger("metrics").warning(
+                    f"/metrics recusado para {host or 'cliente desconhecido'}: defina METRICS_TOKEN "
+                    "ou inclua a rede em METRICS_ALLOWED_NETWORKS"
+                )
+            raise HTTPException(status_code=404, detail="Not Found")
+    return integration_metrics.render_prometheus()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -51,6 +51,18 @@ api.interceptors.response.use(
   }
 );
 
+// Listagens paginadas por cursor: segue o header X-Next-Cursor até a última página
+export async function getAllPages<T>(url: string, pageSize = 200): Promise<T[]> {
+  const items: T[] = [];
+  let cursor: string | undefined;
+  do {
+    const res = await api.get<T[]>(url, { params: { limit: pageSize, cursor } });
+    items.push(...res.data);
+    cursor = res.headers["x-next-cursor"] || undefined;
+  } while (cursor);
+  return items;
+}
+
 // Utilitário para cancelamento de requisições
 export function createCancel() {
   const controller = new AbortController();
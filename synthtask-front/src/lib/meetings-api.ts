@@ -1,4 +1,4 @@
-import { api } from "@/lib/http";
+import { api, getAllPages } from "@/lib/http";
 
 export interface MeetingListItem {
   id: string;
@@ -24,8 +24,7 @@ export interface ProcessedMeeting {
 }
 
 export async function getMeetings(): Promise<MeetingListItem[]> {
-  const res = await api.get("/api/meetings");
-  return res.data;
+  return getAllPages<MeetingListItem>("/api/meetings");
 }
 
 export async function uploadTranscript(file: File): Promise<ProcessedMeeting> {
@@ -1,4 +1,4 @@
-import { api } from "@/lib/http";
+import { api, getAllPages } from "@/lib/http";
 import type { Provider } from "@/types/providers";
 
 export interface ProjectListItem {
@@ -11,8 +11,7 @@ export interface ProjectListItem {
 }
 
 export async function getProjects(): Promise<ProjectListItem[]> {
-  const res = await api.get("/api/projects");
-  return res.data;
+  return getAllPages<ProjectListItem>("/api/projects");
 }
 
 export async function createProject(payload: {